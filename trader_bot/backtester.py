@@ -1,31 +1,63 @@
 """
 Backtesting engine for testing trading strategies on historical data.
 """
+import bisect
+import numpy as np
 import pandas as pd
 from typing import Dict, List
-from datetime import datetime
 from portfolio import Portfolio
 from order_executor import OrderExecutor
 from strategies.base_strategy import BaseStrategy
 from data_fetcher import DataFetcher
 from config import Config
+from vectorized_engine import simulate_signals, BUY
+from event_engine import as_event_strategy, run_events
+from chunked_engine import run_chunked
+from round_trips import match_round_trips, round_trip_stats
+from result_store import ResultStore, run_fingerprint
+from profiling import profiled, profiler
+from risk_exits import REASONS, RiskExits, price_arrays
+
+
+ENGINES = ('loop', 'vectorized', 'event')
 
 
 class Backtester:
     """Backtests trading strategies on historical data."""
     
-    def __init__(self, strategy: BaseStrategy, initial_capital: float = 100000, config: Config = None):
+    def __init__(self, strategy: BaseStrategy, initial_capital: float = 100000, config: Config = None,
+                 engine: str = 'loop', verbose: bool = True, store: ResultStore = None,
+                 risk_exits: RiskExits = None):
         """
         Initialize backtester.
         
         Args:
-            strategy: Trading strategy to test
+            strategy: Trading strategy to test (signal-based, or an EventStrategy
+                      for the event engine)
             initial_capital: Starting capital
             config: Configuration object
+            engine: 'loop' (bar-by-bar), 'vectorized' (NumPy array engine) or
+                    'event' (on_bar strategies; built-in strategies run on
+                    streaming indicators)
+            verbose: Print the run header and every executed trade
+            store: Result store; ``run`` returns a stored run with the same
+                   strategy, settings and data instead of recomputing it
+            risk_exits: Intrabar stop-loss, take-profit and trailing-stop
+                        rules (loop and vectorized engines; event
+                        strategies exit in on_bar)
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if risk_exits and engine == 'event':
+            raise ValueError("Risk exits run in the loop and vectorized engines; event strategies exit in on_bar")
+        
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.config = config or Config()
+        self.engine = engine
+        self.verbose = verbose
+        self.store = store
+        self.risk_exits = risk_exits if risk_exits else None
         self.results = None
         
     def run(self, symbol: str, start_date: str, end_date: str, data_fetcher: DataFetcher = None) -> Dict:
@@ -45,34 +77,167 @@ class Backtester:
         if data_fetcher is None:
             data_fetcher = DataFetcher(self.config.DATA_CACHE_DIR)
         
-        print(f"\n{'='*60}")
-        print(f"Running backtest: {self.strategy}")
-        print(f"Symbol: {symbol}")
-        print(f"Period: {start_date} to {end_date}")
-        print(f"Initial Capital: ${self.initial_capital:,.2f}")
-        print(f"{'='*60}\n")
+        self._print_header(symbol, start_date, end_date)
         
         data = data_fetcher.get_historical_data(symbol, start_date, end_date)
         
+        if self.store is None:
+            return self.run_data(symbol, data)
+            
+        fingerprint = run_fingerprint(self.strategy, self.engine, self.initial_capital, self.config, symbol, data,
+                                      self.risk_exits)
+        stored = self.store.load(fingerprint)
+        if stored is not None:
+            if self.verbose:
+                print(f"Loaded stored run {fingerprint[:12]} from {self.store.path}")
+            self.results = stored
+            return stored
+            
+        results = self.run_data(symbol, data)
+        self.store.save(fingerprint, results, self.strategy, self.engine, self.risk_exits)
+        return results
+    
+    def run_chunked(self, symbol: str, start_date: str, end_date: str, data_fetcher: DataFetcher = None,
+                    block_bars: int = None) -> Dict:
+        """
+        Run backtest on a single symbol, streaming its bars from the data cache.
+        
+        The bars are read from the symbol's columnar store in blocks (see
+        chunked_engine), so memory stays flat however long the history is.
+        Fills equal those of ``run`` with the loop or event engine; the
+        result store is not used, as fingerprinting the data would read
+        all of it.
+        
+        Args:
+            symbol: Stock symbol to trade
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            data_fetcher: DataFetcher instance with a cacheable source
+                          (creates new one if None)
+            block_bars: Bars per block (defaults to Config.CHUNK_BARS)
+            
+        Returns:
+            Dictionary with backtest results (the equity curve stays on
+            disk at 'equity_path')
+        """
+        if self.risk_exits:
+            raise ValueError("Chunked backtests run on the event engine, which has no risk exits")
+        if data_fetcher is None:
+            data_fetcher = DataFetcher(self.config.DATA_CACHE_DIR)
+        
+        self._print_header(symbol, start_date, end_date)
+        
+        store = data_fetcher.cache_range(symbol, start_date, end_date)
+        start, stop = store.row_range(start_date, end_date)
+        
+        # Metrics are accumulated while streaming, so they count as execution
+        with profiler.stage('execution'):
+            self.results = run_chunked(
+                self.strategy, symbol, store.directory, self.initial_capital, self.config, start, stop,
+                block_bars, verbose=self.verbose
+            )
+        return self.results
+    
+    def _print_header(self, symbol: str, start_date: str, end_date: str):
+        """Print the run header (when verbose)."""
+        if self.verbose:
+            print(f"\n{'='*60}")
+            print(f"Running backtest: {self.strategy}")
+            print(f"Symbol: {symbol}")
+            print(f"Period: {start_date} to {end_date}")
+            print(f"Initial Capital: ${self.initial_capital:,.2f}")
+            if self.risk_exits:
+                print(f"Risk Exits: {self.risk_exits}")
+            print(f"{'='*60}\n")
+    
+    def run_data(self, symbol: str, data: pd.DataFrame, signals=None) -> Dict:
+        """
+        Run backtest on already loaded data.
+        
+        Args:
+            symbol: Stock symbol to trade
+            data: DataFrame with OHLCV data
+            signals: Precomputed signals aligned with data (generated by the
+                     strategy if None; not used by the event engine)
+            
+        Returns:
+            Dictionary with backtest results
+        """
+        if self.engine == 'event':
+            # Event strategies update their indicators bar by bar, so signals are part of execution
+            with profiler.stage('execution'):
+                portfolio, equity_curve = run_events(
+                    as_event_strategy(self.strategy), symbol, data, self.initial_capital, self.config,
+                    verbose=self.verbose
+                )
+            self.results = self._calculate_results(portfolio, data, symbol, equity_curve)
+            return self.results
+            
         # Generate signals
-        signals = self.strategy.generate_signals(data)
+        if signals is None:
+            with profiler.stage('signals'):
+                signals = self.strategy.generate_signals(data)
+        else:
+            signals = pd.Series(signals, index=data.index)
+        
+        if self.engine == 'vectorized':
+            portfolio, equity_curve, exit_reasons = self._run_vectorized(symbol, data, signals)
+            self.results = self._calculate_results(portfolio, data, symbol, equity_curve, exit_reasons)
+            return self.results
         
+        portfolio, exit_reasons = self._run_loop(symbol, data, signals)
+        self.results = self._calculate_results(portfolio, data, symbol, exit_reasons=exit_reasons)
+        return self.results
+    
+    @profiled('execution')
+    def _run_loop(self, symbol: str, data: pd.DataFrame, signals: pd.Series) -> tuple:
+        """
+        Execute signals bar by bar with the loop engine.
+        
+        Returns:
+            Tuple of (portfolio with its equity history, reasons of the risk
+            exits in order)
+        """
         # Initialize portfolio and executor
         portfolio = Portfolio(self.initial_capital)
+        portfolio.reserve(len(data))
         executor = OrderExecutor(portfolio, self.config)
         
+        # Risk exits: at every signal (and exit) bar, the first exit of the
+        # open position up to the next signal bar is found ahead of time
+        exits = self.risk_exits
+        check_exits = exits is not None
+        exit_bar = -1
+        exit_reasons = []
+        if check_exits:
+            open_, high, low = price_arrays(data)
+            event_bars = np.flatnonzero(signals.to_numpy()).tolist()
+            peak = None
+        
         # Execute trades based on signals
-        for date, signal in signals.items():
+        for i, (date, signal) in enumerate(signals.items()):
             current_price = data.loc[date, 'Close']
             current_prices = {symbol: current_price}
             
+            exited = i == exit_bar
+            if exited:
+                position_size = portfolio.get_position_size(symbol)
+                success = executor.execute_sell(symbol, exit_price, position_size, date)
+                if success:
+                    # A position reopened on this bar trails from its own entry
+                    peak = None
+                    exit_reasons.append(exit_reason)
+                    if self.verbose:
+                        print(f"{date.date()}: SELL {position_size} shares @ ${exit_price:.2f} "
+                              f"({exit_reason.replace('_', ' ')})")
+            
             if signal == 1:  # Buy signal
                 # Calculate shares to buy (10% of portfolio)
                 shares = executor.calculate_shares_to_buy(symbol, current_price, allocation_pct=0.1)
                 
                 if shares > 0:
                     success = executor.execute_buy(symbol, current_price, shares, date)
-                    if success:
+                    if success and self.verbose:
                         print(f"{date.date()}: BUY  {shares} shares @ ${current_price:.2f}")
             
             elif signal == -1:  # Sell signal
@@ -81,9 +246,22 @@ class Backtester:
                 
                 if position_size > 0:
                     success = executor.execute_sell(symbol, current_price, position_size, date)
-                    if success:
+                    if success and self.verbose:
                         print(f"{date.date()}: SELL {position_size} shares @ ${current_price:.2f}")
             
+            if check_exits and (signal != 0 or exited):
+                exit_bar = -1
+                position_size = portfolio.get_position_size(symbol)
+                if position_size > 0:
+                    peak = current_price if peak is None else peak
+                    k = bisect.bisect_right(event_bars, i)
+                    next_event = event_bars[k] if k < len(event_bars) else len(data) - 1
+                    exit_bar, exit_price, exit_reason, peak = exits.scan(
+                        open_, high, low, i + 1, next_event + 1, portfolio.positions[symbol]['avg_price'], peak
+                    )
+                else:
+                    peak = None
+            
             # Record portfolio value
             portfolio.record_equity(date, current_prices)
         
@@ -94,16 +272,69 @@ class Backtester:
         
         if position_size > 0:
             executor.execute_sell(symbol, final_price, position_size, final_date)
-            print(f"{final_date.date()}: SELL {position_size} shares @ ${final_price:.2f} (closing position)")
+            if self.verbose:
+                print(f"{final_date.date()}: SELL {position_size} shares @ ${final_price:.2f} (closing position)")
         
-        # Calculate results
-        self.results = self._calculate_results(portfolio, data, symbol)
+        return portfolio, exit_reasons
+    
+    @profiled('execution')
+    def _run_vectorized(self, symbol: str, data: pd.DataFrame, signals: pd.Series) -> tuple:
+        """
+        Execute signals with the vectorized engine.
         
-        return self.results
+        Returns:
+            Tuple of (portfolio holding the final cash and trade history,
+            equity curve DataFrame, reasons of the risk exits in order)
+        """
+        sim = simulate_signals(
+            signals.to_numpy(), data['Close'].to_numpy(), self.initial_capital, self.config,
+            risk_exits=self.risk_exits, bars=price_arrays(data) if self.risk_exits else None
+        )
+        
+        dates = data.index
+        
+        portfolio = Portfolio(self.initial_capital)
+        portfolio.cash = sim['final_cash']
+        portfolio.record_trades(
+            dates[sim['trade_bar']], [symbol] * len(sim['trade_bar']), sim['trade_action'],
+            sim['trade_shares'], sim['trade_price'], sim['trade_commission'], sim['trade_total']
+        )
+        
+        if self.verbose:
+            closing_trade = len(sim['trade_bar']) - 1 if sim['closed_at_end'] else None
+            closes = data['Close'].to_numpy()
+            
+            for i, (bar, action, shares) in enumerate(zip(
+                    sim['trade_bar'].tolist(), sim['trade_action'].tolist(), sim['trade_shares'].tolist())):
+                date = dates[bar]
+                market_price = closes[bar]
+                if action == BUY:
+                    print(f"{date.date()}: BUY  {shares} shares @ ${market_price:.2f}")
+                elif i in sim['exit_reasons']:
+                    # Market price of the stop or target before slippage
+                    fill_price = sim['trade_price'][i] / (1 - self.config.SLIPPAGE_RATE)
+                    print(f"{date.date()}: SELL {shares} shares @ ${fill_price:.2f} "
+                          f"({sim['exit_reasons'][i].replace('_', ' ')})")
+                elif i == closing_trade:
+                    print(f"{date.date()}: SELL {shares} shares @ ${market_price:.2f} (closing position)")
+                else:
+                    print(f"{date.date()}: SELL {shares} shares @ ${market_price:.2f}")
+                    
+        equity_curve = pd.DataFrame({
+            'date': dates,
+            'value': sim['value'],
+            'cash': sim['cash'],
+            'positions_value': sim['positions_value']
+        })
+        
+        return portfolio, equity_curve, list(sim['exit_reasons'].values())
     
-    def _calculate_results(self, portfolio: Portfolio, data: pd.DataFrame, symbol: str) -> Dict:
+    @profiled('metrics')
+    def _calculate_results(self, portfolio: Portfolio, data: pd.DataFrame, symbol: str,
+                           equity_curve: pd.DataFrame = None, exit_reasons: List[str] = None) -> Dict:
         """Calculate backtest performance metrics."""
-        equity_curve = pd.DataFrame(portfolio.equity_curve)
+        if equity_curve is None:
+            equity_curve = portfolio.equity_frame()
         
         # Basic metrics
         final_value = equity_curve['value'].iloc[-1]
@@ -123,19 +354,9 @@ class Backtester:
         drawdown = (cumulative - running_max) / running_max
         max_drawdown = drawdown.min() * 100
         
-        # Win rate
-        trades = portfolio.trade_history
-        buy_trades = [t for t in trades if t['action'] == 'BUY']
-        sell_trades = [t for t in trades if t['action'] == 'SELL']
-        
-        winning_trades = 0
-        total_trades = min(len(buy_trades), len(sell_trades))
-        
-        for i in range(total_trades):
-            if sell_trades[i]['price'] > buy_trades[i]['price']:
-                winning_trades += 1
-        
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+        # Win rate from FIFO round trips
+        round_trips = match_round_trips(portfolio.trade_columns(), data)
+        trade_stats = round_trip_stats(round_trips)
         
         # Buy and hold comparison
         buy_hold_return = ((data['Close'].iloc[-1] - data['Close'].iloc[0]) / data['Close'].iloc[0]) * 100
@@ -149,23 +370,31 @@ class Backtester:
             'buy_hold_return': buy_hold_return,
             'sharpe_ratio': sharpe_ratio,
             'max_drawdown': max_drawdown,
-            'total_trades': total_trades,
-            'win_rate': win_rate,
+            'total_trades': trade_stats['total_trades'],
+            'win_rate': trade_stats['win_rate'],
             'equity_curve': equity_curve,
-            'trade_history': trades,
+            'trade_history': portfolio.trade_history,
+            'round_trips': round_trips,
             'portfolio': portfolio
         }
+        if self.risk_exits:
+            results['risk_exits'] = {reason: exit_reasons.count(reason) for reason in REASONS
+                                     if reason in self.risk_exits.get_parameters()}
         
         return results
     
-    def print_results(self):
-        """Print backtest results summary."""
-        if self.results is None:
+    def print_results(self, results: Dict = None):
+        """
+        Print backtest results summary.
+        
+        Args:
+            results: Results to print (defaults to those of the last run)
+        """
+        r = results or self.results
+        if r is None:
             print("No results available. Run backtest first.")
             return
-        
-        r = self.results
-        
+            
         print(f"\n{'='*60}")
         print(f"BACKTEST RESULTS")
         print(f"{'='*60}")
@@ -179,4 +408,7 @@ class Backtester:
         print(f"Max Drawdown:      {r['max_drawdown']:.2f}%")
         print(f"Total Trades:      {r['total_trades']}")
         print(f"Win Rate:          {r['win_rate']:.2f}%")
+        if r.get('risk_exits'):
+            exits = ', '.join(f"{n} {reason.replace('_', ' ')}" for reason, n in r['risk_exits'].items())
+            print(f"Risk Exits:        {exits}")
         print(f"{'='*60}\n")
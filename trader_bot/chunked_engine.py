@@ -0,0 +1,185 @@
+"""
+Out-of-core chunked backtesting.
+
+Backtester.run loads the whole price history into one DataFrame, which
+stops being practical for years of minute bars. ``run_chunked`` streams
+the bars of a columnar frame (column_store.py) in fixed-size blocks
+instead: every block is read with plain file reads, replayed through an
+EventRunner, whose strategy indicators and portfolio carry across block
+boundaries, and its equity is written straight to disk with a
+BlockWriter. Return, Sharpe ratio and drawdown are accumulated block by
+block and round-trip excursions are measured in a second streaming pass,
+so peak memory depends on the block size and the number of trades, not
+on the length of the history.
+
+Strategies must not need the whole history up front: EventStrategy
+subclasses and the built-in strategies (through their streaming adapters)
+can be streamed, other signal-based strategies cannot.
+"""
+import math
+from pathlib import Path
+from typing import Dict
+import numpy as np
+from column_store import BlockWriter, iter_blocks, read_meta, to_datetime_index
+from config import Config
+from event_engine import EventRunner, SignalAdapter, as_event_strategy
+from round_trips import block_excursions, match_round_trips, round_trip_stats
+
+
+EQUITY_COLUMNS = ('value', 'cash', 'positions_value')
+
+
+class _EquityStats:
+    """
+    Accumulates the return, Sharpe ratio and drawdown of an equity curve
+    block by block, with the same definitions as Backtester.
+    
+    Drawdown is exact; the Sharpe ratio merges per-block means and
+    variances, so it equals the in-memory one up to floating-point
+    rounding.
+    """
+    
+    def __init__(self):
+        self.last_value = math.nan
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.growth = 1.0
+        self.peak = -math.inf
+        self.max_drawdown = math.inf
+        
+    def update(self, values: np.ndarray):
+        """Add the portfolio values of the next block of bars."""
+        if not len(values):
+            return
+            
+        returns = values / np.append(self.last_value, values[:-1]) - 1
+        returns = returns[~np.isnan(returns)]
+        self.last_value = values[-1]
+        if not len(returns):
+            return
+            
+        # Merge the block's mean and sum of squared deviations (Chan et al.)
+        n, mean = len(returns), returns.mean()
+        m2 = np.square(returns - mean).sum()
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        
+        # Continue the cumulative product and running peak from the previous block
+        cumulative = np.cumprod(np.append(self.growth, 1 + returns))[1:]
+        running_max = np.maximum.accumulate(np.append(self.peak, cumulative))[1:]
+        self.growth, self.peak = cumulative[-1], running_max[-1]
+        self.max_drawdown = min(self.max_drawdown, ((cumulative - running_max) / running_max).min())
+        
+    @property
+    def sharpe_ratio(self) -> float:
+        """Annualized Sharpe ratio (252 bars per year, like Backtester)."""
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+        return (self.mean / std) * (252 ** 0.5) if std > 0 else 0
+        
+    @property
+    def max_drawdown_pct(self) -> float:
+        """Maximum drawdown in percent (NaN without returns)."""
+        return self.max_drawdown * 100 if self.count else math.nan
+
+
+def run_chunked(strategy, symbol: str, directory: Path, initial_capital: float = 100000,
+                config: Config = None, start: int = 0, stop: int = None, block_bars: int = None,
+                equity_dir: Path = None, allocation_pct: float = 0.1, verbose: bool = True) -> Dict:
+    """
+    Backtest a strategy on a stored frame, streaming it block by block.
+    
+    Fills equal those of the event engine (and so the loop engine) on the
+    same bars, whatever the block size.
+    
+    Args:
+        strategy: EventStrategy, or a built-in strategy with a streaming adapter
+        symbol: Stock symbol to trade
+        directory: Columnar frame with OHLCV data (e.g. a SymbolStore directory)
+        initial_capital: Starting capital
+        config: Configuration object
+        start: First row of the frame to replay
+        stop: Row to stop before (defaults to the end of the frame)
+        block_bars: Bars per block (defaults to Config.CHUNK_BARS)
+        equity_dir: Directory to write the equity curve to as a columnar
+                    frame (defaults to {symbol}_{strategy class} in
+                    Config.CHUNKED_EQUITY_DIR, replaced by the next run)
+        allocation_pct: Fraction of portfolio value allocated per buy
+        verbose: Print every executed trade
+        
+    Returns:
+        Dictionary with the keys of Backtester's results, except that the
+        equity curve stays on disk: 'equity_path' is the columnar frame
+        with value, cash and positions_value per bar (load it with
+        column_store.read_frame)
+    """
+    config = config or Config()
+    block_bars = block_bars or config.CHUNK_BARS
+    event_strategy = as_event_strategy(strategy)
+    if isinstance(event_strategy, SignalAdapter):
+        raise ValueError(f"{strategy} needs its whole history to generate signals and cannot be streamed")
+        
+    meta = read_meta(directory)
+    stop = meta['rows'] if stop is None else min(stop, meta['rows'])
+    n_bars = stop - start
+    if n_bars <= 0:
+        raise ValueError(f"No data found for {symbol}")
+        
+    if equity_dir is None:
+        equity_dir = Path(config.CHUNKED_EQUITY_DIR) / f"{symbol}_{type(strategy).__name__}"
+        
+    runner = EventRunner(event_strategy, symbol, initial_capital, config, allocation_pct, verbose)
+    runner.start()
+    stats = _EquityStats()
+    first_close = None
+    values = np.empty(min(block_bars, n_bars))
+    cash = np.empty(len(values))
+    fields = [field for field in EventRunner.FIELDS if field in meta['columns']]
+    
+    with BlockWriter(equity_dir, EQUITY_COLUMNS, ['float64'] * len(EQUITY_COLUMNS), n_bars, meta['tz']) as writer:
+        for index, columns in iter_blocks(directory, block_bars, start, stop, fields):
+            n = len(index)
+            block_values, block_cash = values[:n], cash[:n]
+            lists = [columns[field].tolist() if field in columns else [math.nan] * n
+                     for field in EventRunner.FIELDS]
+                     
+            runner.replay(to_datetime_index(index, meta['tz']), lists, block_values, block_cash)
+            
+            writer.write(index, {'value': block_values, 'cash': block_cash,
+                                 'positions_value': block_values - block_cash})
+            stats.update(block_values)
+            if first_close is None:
+                first_close = lists[3][0]
+                
+    runner.finish()
+    portfolio = runner.portfolio
+    
+    # Excursions need each trip's Low/High range: a second streaming pass
+    round_trips = match_round_trips(portfolio.trade_columns())
+    if len(round_trips['pnl']):
+        price_fields = [field for field in ('Low', 'High', 'Close') if field in meta['columns']]
+        round_trips = block_excursions(round_trips, iter_blocks(directory, block_bars, start, stop, price_fields))
+    trade_stats = round_trip_stats(round_trips)
+    
+    final_value = stats.last_value
+    last_close = runner.last_close
+    
+    return {
+        'strategy': str(strategy),
+        'symbol': symbol,
+        'initial_capital': initial_capital,
+        'final_value': final_value,
+        'total_return': ((final_value - initial_capital) / initial_capital) * 100,
+        'buy_hold_return': ((last_close - first_close) / first_close) * 100,
+        'sharpe_ratio': stats.sharpe_ratio,
+        'max_drawdown': stats.max_drawdown_pct,
+        'total_trades': trade_stats['total_trades'],
+        'win_rate': trade_stats['win_rate'],
+        'equity_path': Path(equity_dir),
+        'trade_history': portfolio.trade_history,
+        'round_trips': round_trips,
+        'portfolio': portfolio
+    }
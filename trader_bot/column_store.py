@@ -0,0 +1,483 @@
+"""
+Columnar on-disk storage for OHLCV data.
+
+A stored frame is a directory with a single ``columns.npy`` block and a
+small ``meta.json`` describing column names, dtypes and timezone. Every
+column (and the datetime64 index) is 8 bytes wide, so the block is stored
+as a (columns x rows) array of raw 64-bit words: row 0 is the index and
+each following row is one contiguous, typed column. Opening the block
+memory-mapped costs a single ``open`` instead of parsing text.
+"""
+import json
+import os
+import shutil
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+META_FILE = 'meta.json'
+BLOCK_FILE = 'columns.npy'
+
+
+def _typed_values(series: pd.Series) -> np.ndarray:
+    """Coerce a column to int64 or float64."""
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.to_numpy(dtype=np.int64)
+    return series.to_numpy(dtype=np.float64)
+
+
+def frame_exists(directory: Path) -> bool:
+    """Check whether a columnar frame has been written to a directory."""
+    return (Path(directory) / META_FILE).exists()
+
+
+def write_frame(directory: Path, data: pd.DataFrame, extra_meta: dict = None):
+    """
+    Write a DataFrame with a DatetimeIndex as a typed columnar block.
+    
+    The frame is written to a temporary sibling directory and renamed into
+    place, so readers never observe a half-written frame.
+    
+    Args:
+        directory: Target directory (replaced if it exists)
+        data: DataFrame indexed by date
+        extra_meta: Additional JSON-serializable entries for meta.json
+    """
+    directory = Path(directory)
+    index = pd.DatetimeIndex(data.index).as_unit('ns')
+    tz = str(index.tz) if index.tz is not None else None
+    
+    tmp_dir = directory.parent / f".{directory.name}.{uuid.uuid4().hex}.tmp"
+    tmp_dir.mkdir(parents=True)
+    
+    try:
+        block = np.empty((len(data.columns) + 1, len(data)), dtype=np.int64)
+        block[0] = index.asi8
+        dtypes = []
+        
+        for i, column in enumerate(data.columns, start=1):
+            values = _typed_values(data[column])
+            block[i] = values.view(np.int64)
+            dtypes.append(values.dtype.name)
+            
+        np.save(tmp_dir / BLOCK_FILE, block)
+        
+        meta = {'columns': list(data.columns), 'dtypes': dtypes, 'tz': tz, 'rows': len(data)}
+        meta.update(extra_meta or {})
+        with open(tmp_dir / META_FILE, 'w') as f:
+            json.dump(meta, f)
+            
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def read_meta(directory: Path) -> dict:
+    """Read the metadata of a stored frame."""
+    with open(Path(directory) / META_FILE) as f:
+        return json.load(f)
+
+
+def read_columns(directory: Path, mmap: bool = True, meta: dict = None) -> tuple:
+    """
+    Read the raw arrays of a stored frame.
+    
+    Args:
+        directory: Frame directory
+        mmap: Open the arrays memory-mapped (read-only)
+        meta: The frame's metadata, if already read
+        
+    Returns:
+        Tuple of (datetime64[ns] index array, dict of column -> array, meta)
+    """
+    directory = Path(directory)
+    meta = meta or read_meta(directory)
+    block = np.load(directory / BLOCK_FILE, mmap_mode='r' if mmap else None)
+    
+    index = block[0].view('M8[ns]')
+    columns = {
+        column: block[i].view(dtype)
+        for i, (column, dtype) in enumerate(zip(meta['columns'], meta['dtypes']), start=1)
+    }
+    
+    return index, columns, meta
+
+
+def to_datetime_index(index: np.ndarray, tz: str = None) -> pd.DatetimeIndex:
+    """Build a (possibly tz-aware) DatetimeIndex from a stored index array."""
+    dates = pd.DatetimeIndex(index, name='Date')
+    if tz is not None:
+        dates = dates.tz_localize('UTC').tz_convert(tz)
+    return dates
+
+
+def _block_offset(f) -> int:
+    """Skip the .npy header of an open block file and return where the data starts."""
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        np.lib.format.read_array_header_1_0(f)
+    else:
+        np.lib.format.read_array_header_2_0(f)
+    return f.tell()
+
+
+def iter_blocks(directory: Path, block_rows: int, start: int = 0, stop: int = None,
+                columns: list = None):
+    """
+    Read rows of a stored frame in blocks of consecutive rows.
+    
+    Blocks are read with plain file reads into fresh arrays instead of
+    through a memory map, so only the current block is resident however
+    long the frame is.
+    
+    Args:
+        directory: Frame directory
+        block_rows: Rows per block
+        start: First row to read
+        stop: Row to stop before (defaults to the end of the frame)
+        columns: Columns to read (defaults to all)
+        
+    Yields:
+        Tuple of (datetime64[ns] index array, dict of column -> array) per block
+    """
+    directory = Path(directory)
+    meta = read_meta(directory)
+    rows = meta['rows']
+    stop = rows if stop is None else min(stop, rows)
+    positions = {column: (i, dtype) for i, (column, dtype)
+                 in enumerate(zip(meta['columns'], meta['dtypes']), start=1)}
+    names = list(columns) if columns is not None else meta['columns']
+    
+    with open(directory / BLOCK_FILE, 'rb') as f:
+        offset = _block_offset(f)
+        
+        def read_row(row: int, block_start: int, n: int) -> np.ndarray:
+            values = np.empty(n, dtype=np.int64)
+            f.seek(offset + (row * rows + block_start) * 8)
+            f.readinto(memoryview(values).cast('B'))
+            return values
+            
+        for block_start in range(start, stop, block_rows):
+            n = min(block_rows, stop - block_start)
+            index = read_row(0, block_start, n).view('M8[ns]')
+            yield index, {
+                column: read_row(positions[column][0], block_start, n).view(positions[column][1])
+                for column in names
+            }
+
+
+class BlockWriter:
+    """
+    Writes a stored frame block by block.
+    
+    For frames too long to build in memory: the number of rows is fixed
+    up front and blocks of consecutive rows are written in order. Like
+    ``write_frame``, the frame is assembled in a temporary sibling
+    directory and only renamed into place by ``close``.
+    """
+    
+    def __init__(self, directory: Path, columns: list, dtypes: list, rows: int, tz: str = None,
+                 extra_meta: dict = None):
+        """
+        Initialize writer.
+        
+        Args:
+            directory: Target directory (replaced on close if it exists)
+            columns: Column names
+            dtypes: Column dtypes ('int64' or 'float64')
+            rows: Total number of rows
+            tz: Timezone of the index (index values are UTC for tz-aware frames)
+            extra_meta: Additional JSON-serializable entries for meta.json
+        """
+        self.directory = Path(directory)
+        self.meta = {'columns': list(columns), 'dtypes': list(dtypes), 'tz': tz, 'rows': rows}
+        self.meta.update(extra_meta or {})
+        self.rows_written = 0
+        
+        self._tmp_dir = self.directory.parent / f".{self.directory.name}.{uuid.uuid4().hex}.tmp"
+        self._tmp_dir.mkdir(parents=True)
+        self._file = open(self._tmp_dir / BLOCK_FILE, 'wb')
+        np.lib.format.write_array_header_1_0(
+            self._file, {'descr': '<i8', 'fortran_order': False, 'shape': (len(columns) + 1, rows)}
+        )
+        self._offset = self._file.tell()
+        self._file.truncate(self._offset + (len(columns) + 1) * rows * 8)
+        
+    def write(self, index: np.ndarray, columns: dict):
+        """
+        Write the next block of rows.
+        
+        Args:
+            index: datetime64[ns] index values of the block
+            columns: Dictionary of column -> array with the block's values
+        """
+        n = len(index)
+        if self.rows_written + n > self.meta['rows']:
+            raise ValueError(f"Block overflows the {self.meta['rows']} rows of {self.directory}")
+            
+        rows = self.meta['rows']
+        arrays = [np.asarray(index).astype('M8[ns]').view(np.int64)] + [
+            np.asarray(columns[column], dtype=dtype).view(np.int64)
+            for column, dtype in zip(self.meta['columns'], self.meta['dtypes'])
+        ]
+        for row, values in enumerate(arrays):
+            self._file.seek(self._offset + (row * rows + self.rows_written) * 8)
+            self._file.write(np.ascontiguousarray(values).tobytes())
+        self.rows_written += n
+        
+    def close(self):
+        """Finish the frame and move it into place."""
+        self._file.close()
+        if self.rows_written != self.meta['rows']:
+            self.abort()
+            raise ValueError(f"Wrote {self.rows_written} of {self.meta['rows']} rows of {self.directory}")
+            
+        with open(self._tmp_dir / META_FILE, 'w') as f:
+            json.dump(self.meta, f)
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        os.replace(self._tmp_dir, self.directory)
+        
+    def abort(self):
+        """Discard the partially written frame."""
+        self._file.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_frame(directory: Path, mmap: bool = True) -> pd.DataFrame:
+    """
+    Read a stored frame back into a DataFrame.
+    
+    Args:
+        directory: Frame directory
+        mmap: Open the arrays memory-mapped (read-only)
+        
+    Returns:
+        DataFrame with a DatetimeIndex and typed columns
+    """
+    index, columns, meta = read_columns(directory, mmap)
+    return pd.DataFrame(columns, index=to_datetime_index(index, meta['tz']), copy=False)
+
+
+def read_csv_frame(csv_file: Path, tz: str = None) -> pd.DataFrame:
+    """
+    Read a legacy CSV cache file.
+    
+    Timestamps in the CSV carry UTC offsets that change with daylight
+    saving time, so they are parsed as UTC and then expressed in ``tz``
+    if every offset in the file matches it (they stay in UTC otherwise).
+    """
+    data = pd.read_csv(csv_file, index_col=0)
+    stamps = data.index.astype(str)
+    index = pd.to_datetime(stamps, utc=True).rename('Date')
+    if tz is not None:
+        local = index.tz_convert(tz)
+        if (local.strftime('%z') == stamps.str[-6:].str.replace(':', '')).all():
+            index = local
+    data.index = index
+    return data
+
+
+def normalize_date(date) -> str:
+    """Normalize a date-like value to a YYYY-MM-DD string."""
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+
+@lru_cache(maxsize=1024)
+def _day_start(date, tz: str) -> np.datetime64:
+    """
+    Start of a date's day in a timezone, as a stored (UTC for tz-aware
+    frames) index value. Memoized, since reads search the same few dates
+    over and over.
+    """
+    return np.datetime64(pd.Timestamp(normalize_date(date), tz=tz).as_unit('ns').value, 'ns')
+
+
+def merge_ranges(ranges: list) -> list:
+    """Coalesce overlapping or adjacent [start, end) date ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def subtract_ranges(ranges: list, start: str, end: str) -> list:
+    """
+    Find the parts of [start, end) not covered by a list of ranges.
+    
+    Args:
+        ranges: Merged, sorted list of [start, end) date ranges
+        start: Requested start date (YYYY-MM-DD)
+        end: Requested end date (YYYY-MM-DD, exclusive)
+        
+    Returns:
+        List of (start, end) gaps
+    """
+    gaps = []
+    cursor = start
+    
+    for range_start, range_end in ranges:
+        if range_end <= cursor:
+            continue
+        if range_start >= end:
+            break
+        if range_start > cursor:
+            gaps.append((cursor, range_start))
+        cursor = max(cursor, range_end)
+        if cursor >= end:
+            break
+            
+    if cursor < end:
+        gaps.append((cursor, end))
+        
+    return gaps
+
+
+class SymbolStore:
+    """
+    Range-aware columnar store holding all cached bars of one symbol.
+    
+    The store records which [start, end) date ranges have been downloaded,
+    so any sub-range can be served by slicing and only missing gaps need to
+    be fetched and merged in. The metadata is read once, and the stored
+    bars are mapped into one DataFrame on first read; later reads slice it.
+    """
+    
+    def __init__(self, directory: Path):
+        """
+        Initialize store.
+        
+        Args:
+            directory: Directory holding the symbol's columnar frame
+        """
+        self.directory = Path(directory)
+        self._meta = read_meta(self.directory) if frame_exists(self.directory) else None
+        self._mapped = None
+        self._frame = None
+        
+    @property
+    def ranges(self) -> list:
+        """Covered [start, end) date ranges."""
+        return self._meta['ranges'] if self._meta else []
+        
+    @property
+    def tz(self) -> str:
+        """Timezone of the stored index (None if naive or not stored yet)."""
+        return self._meta['tz'] if self._meta else None
+        
+    @property
+    def migrated(self) -> bool:
+        """Whether legacy per-range cache files have been merged into the store."""
+        return bool(self._meta and self._meta.get('migrated'))
+        
+    def missing_ranges(self, start_date: str, end_date: str) -> list:
+        """Get the (start, end) gaps of a request not covered by the store."""
+        return subtract_ranges(self.ranges, normalize_date(start_date), normalize_date(end_date))
+        
+    def read(self, start_date: str, end_date: str, mmap: bool = True) -> pd.DataFrame:
+        """
+        Read bars in [start_date, end_date) by slicing the stored columns.
+        
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD, exclusive)
+            mmap: Return a slice over the memory-mapped columns (read-only)
+                  instead of an in-memory copy
+            
+        Returns:
+            DataFrame with OHLCV data
+        """
+        i, j = self.row_range(start_date, end_date)
+        if self._frame is None:
+            index, columns = self._map()
+            self._frame = pd.DataFrame(columns, index=to_datetime_index(index, self.tz), copy=False)
+            
+        data = self._frame.iloc[i:j]
+        return data if mmap else data.copy()
+        
+    def row_range(self, start_date: str, end_date: str) -> tuple:
+        """
+        Find the rows of bars in [start_date, end_date) without reading them.
+        
+        The index is searched memory-mapped, which touches only a few
+        pages, so the range can then be streamed with ``iter_blocks``.
+        
+        Returns:
+            Tuple of (start row, stop row)
+        """
+        return self._search(self._map()[0], self.tz, start_date, end_date)
+        
+    def _map(self) -> tuple:
+        """Memory-map the stored index and columns (once per version of the store)."""
+        if self._mapped is None:
+            self._mapped = read_columns(self.directory, meta=self._meta)[:2]
+        return self._mapped
+        
+    @staticmethod
+    def _search(index: np.ndarray, tz: str, start_date: str, end_date: str) -> tuple:
+        """Binary-search the rows of [start_date, end_date) in a stored index."""
+        i, j = np.searchsorted(index, [_day_start(start_date, tz), _day_start(end_date, tz)])
+        return int(i), int(j)
+        
+    def merge(self, frames: list, covered: list, migrated: bool = None):
+        """
+        Merge newly downloaded bars into the store.
+        
+        Args:
+            frames: DataFrames of new bars (may be empty)
+            covered: [start, end) date ranges the new frames cover
+            migrated: Record that legacy cache files have been merged in
+                (defaults to the store's current flag)
+        """
+        existing = [read_frame(self.directory, mmap=False)] if self._meta else []
+        frames = [f for f in frames if not f.empty]
+        
+        tz = self._meta['tz'] if self._meta else None
+        if not self._meta and frames:
+            tz = frames[0].index.tz
+        frames = [self._align_tz(f, tz) for f in frames]
+        
+        data = pd.concat(existing + frames) if existing or frames else pd.DataFrame(
+            index=pd.DatetimeIndex([], tz=tz, name='Date'))
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        
+        ranges = merge_ranges(
+            [list(r) for r in self.ranges] +
+            [[normalize_date(s), normalize_date(e)] for s, e in covered]
+        )
+        
+        write_frame(self.directory, data, {'ranges': ranges,
+                                           'migrated': self.migrated if migrated is None else migrated})
+        self._meta = read_meta(self.directory)
+        self._mapped = self._frame = None
+        
+    @staticmethod
+    def _align_tz(data: pd.DataFrame, tz) -> pd.DataFrame:
+        """Express a frame's index in the store's timezone."""
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is None and tz is not None:
+            index = index.tz_localize(tz)
+        elif index.tz is not None:
+            index = index.tz_convert(tz) if tz is not None else index.tz_convert(None)
+        data = data.copy()
+        data.index = index.rename('Date')
+        return data
@@ -0,0 +1,138 @@
+"""
+Parallel comparison of strategies across symbols.
+
+Every (strategy, symbol) backtest is an independent task on a process
+pool. Price data is loaded once per symbol in the parent and published
+through the same shared-memory block as ParameterSweep, so every strategy
+on a symbol reads one copy of its bars. Results come back in strategy x
+symbol order whatever order the workers finish in, so the comparison
+table equals the one of a serial run. With a ResultStore, runs already
+stored are loaded instead of being sent to the pool.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+from backtester import Backtester
+from config import Config
+from data_fetcher import DataFetcher
+from data_sources import get_source
+from indicators import indicator_cache
+from profiling import profiler
+from result_store import ResultStore, run_fingerprint
+from shared_data import SharedPriceData, init_worker, merge_cache_stats, report_progress, set_worker_data, worker_data
+from strategies import BaseStrategy
+
+
+def _run_backtest(strategy: BaseStrategy, symbol: str, initial_capital: float, config: Config,
+                  engine: str) -> tuple:
+    """
+    Backtest one strategy on one loaded symbol.
+    
+    Returns:
+        Tuple of (results, process id, indicator cache stats of the process)
+    """
+    backtester = Backtester(strategy, initial_capital, config, engine=engine, verbose=False)
+    results = backtester.run_data(symbol, worker_data[symbol])
+    return results, os.getpid(), indicator_cache.stats()
+
+
+class StrategyComparison:
+    """Backtests several strategies on several symbols across a process pool."""
+    
+    def __init__(self, strategies: Dict[str, BaseStrategy], initial_capital: float = 100000,
+                 config: Config = None, engine: str = None, jobs: int = None, source_name: str = None,
+                 store: ResultStore = None):
+        """
+        Initialize comparison.
+        
+        Args:
+            strategies: Dictionary of strategy key -> strategy instance
+            initial_capital: Starting capital per backtest
+            config: Configuration object
+            engine: Backtest engine (defaults to Config.BACKTEST_ENGINE)
+            jobs: Number of worker processes (None = CPU count, 1 = in-process)
+            source_name: Data source name (defaults to Config.DATA_SOURCE)
+            store: Result store to load stored runs from and save new ones to
+        """
+        self.strategies = strategies
+        self.initial_capital = initial_capital
+        self.config = config or Config()
+        self.engine = engine or self.config.BACKTEST_ENGINE
+        self.jobs = jobs
+        self.source_name = source_name or self.config.DATA_SOURCE
+        self.store = store
+        self.symbols = []
+        self.errors = {}
+        self.cache_stats = {}
+        
+    def run(self, symbols: List[str], start_date: str, end_date: str) -> List[Dict]:
+        """
+        Backtest every strategy on every symbol.
+        
+        Args:
+            symbols: Stock symbols to test
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            
+        Returns:
+            List of backtest results, strategy by strategy and symbol by
+            symbol in the given order (symbols whose data could not be
+            loaded are skipped: ``self.symbols`` holds the ones tested and
+            ``self.errors`` the others)
+        """
+        # Load once in the parent; workers attach to a shared copy
+        data_fetcher = DataFetcher(self.config.DATA_CACHE_DIR, source=get_source(self.source_name))
+        data = data_fetcher.get_multiple_symbols(symbols, start_date, end_date)
+        self.symbols = list(data)
+        self.errors = data_fetcher.errors
+        
+        runs = [(strategy, symbol) for strategy in self.strategies.values() for symbol in self.symbols]
+        results = [None] * len(runs)
+        fingerprints = [None] * len(runs)
+        
+        if self.store is not None:
+            for i, (strategy, symbol) in enumerate(runs):
+                fingerprints[i] = run_fingerprint(strategy, self.engine, self.initial_capital, self.config,
+                                                  symbol, data[symbol])
+                results[i] = self.store.load(fingerprints[i])
+                
+        # Only runs missing from the store are computed
+        pending = [i for i, result in enumerate(results) if result is None]
+        tasks = [runs[i] for i in pending]
+        stored = len(runs) - len(tasks)
+        print(f"\nComparing {len(self.strategies)} strategies x {len(self.symbols)} symbols"
+              + (f" ({stored} loaded from the result store)..." if stored else "..."))
+        computed = [None] * len(tasks)
+        worker_stats = {}
+        started = time.perf_counter()
+        
+        with profiler.stage('execution'):
+            if self.jobs == 1:
+                set_worker_data(data)
+                baseline = indicator_cache.stats()
+                for i, (strategy, symbol) in enumerate(tasks):
+                    computed[i], _, stats = _run_backtest(strategy, symbol, self.initial_capital, self.config,
+                                                          self.engine)
+                    report_progress(i + 1, len(tasks), started)
+                if tasks:
+                    worker_stats[os.getpid()] = {key: stats[key] - baseline[key] for key in ('hits', 'misses')}
+            elif tasks:
+                with SharedPriceData.publish(data) as shared, ProcessPoolExecutor(
+                    max_workers=self.jobs, initializer=init_worker, initargs=(shared.spec,)
+                ) as pool:
+                    futures = {
+                        pool.submit(_run_backtest, strategy, symbol, self.initial_capital, self.config, self.engine): i
+                        for i, (strategy, symbol) in enumerate(tasks)
+                    }
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        computed[futures[future]], pid, worker_stats[pid] = future.result()
+                        report_progress(done, len(tasks), started)
+                    
+        for i, result in zip(pending, computed):
+            results[i] = result
+            if self.store is not None:
+                self.store.save(fingerprints[i], result, runs[i][0], self.engine)
+                
+        self.cache_stats = merge_cache_stats(worker_stats)
+        return results
@@ -14,7 +14,15 @@ class Config:
     
     # Risk management
     MAX_POSITION_SIZE = 0.2  # Maximum 20% of portfolio in single position
-    STOP_LOSS_PCT = 0.05     # 5% stop loss
+    
+    # Intrabar risk exits (opt-in with --stop-loss/--take-profit/--trailing-stop,
+    # which default to these levels)
+    STOP_LOSS_PCT = 0.05      # 5% stop loss
+    TAKE_PROFIT_PCT = 0.10    # 10% take profit
+    TRAILING_STOP_PCT = 0.08  # 8% trailing stop
+    
+    # Backtest engine: 'loop' (bar-by-bar), 'vectorized' (NumPy arrays) or 'event' (on_bar API)
+    BACKTEST_ENGINE = 'loop'
     
     # Strategy parameters
     STRATEGY_PARAMS = {
@@ -33,8 +41,31 @@ class Config:
         }
     }
     
+    # Chunked backtests: bars per block streamed from the columnar store and
+    # where their equity curves are written
+    CHUNK_BARS = 50000
+    CHUNKED_EQUITY_DIR = 'results/equity'
+    
     # Data settings
     DATA_CACHE_DIR = 'data_cache'
+    DATA_SOURCE = 'yfinance'  # 'yfinance' or 'synthetic'
+    BATCH_DOWNLOAD_MIN_SYMBOLS = 20  # Download cache misses of this many symbols in batched requests
+    LEGACY_CACHE_TZ = 'America/New_York'  # Exchange timezone of per-range CSV cache files
+    
+    # Indicator cache: memory bound for memoized indicator results (0 disables)
+    INDICATOR_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    
+    # Monte Carlo: number of simulated paths and memory bound per chunk of paths
+    MONTE_CARLO_SIMULATIONS = 10000
+    MONTE_CARLO_MAX_BYTES = 64 * 1024 * 1024
+    
+    # Charts: LTTB point budget per line trace (0 keeps every point) and the
+    # trace length above which Plotly renders with WebGL (Scattergl)
+    PLOT_MAX_POINTS = 5000
+    PLOT_WEBGL_THRESHOLD = 2000
+    
+    # Result store: SQLite file memoizing backtest runs (see result_store.py)
+    RESULT_STORE_PATH = 'results/backtests.db'
     
     # Logging
     LOG_DIR = 'logs'
@@ -1,31 +1,48 @@
 """
-Fetches historical market data using yfinance.
+Fetches historical market data from a pluggable data source (yfinance by default).
 """
-import yfinance as yf
 import pandas as pd
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-import os
+from column_store import SymbolStore, frame_exists, normalize_date, read_frame, read_csv_frame
+from config import Config
+from data_sources import DataSource, YFinanceSource
+from profiling import profiled
 
 
 class DataFetcher:
     """Fetches and caches historical market data."""
     
-    def __init__(self, cache_dir: str = 'data_cache'):
+    def __init__(self, cache_dir: str = 'data_cache', source: DataSource = None,
+                 max_workers: int = 8):
         """
         Initialize data fetcher.
         
         Args:
             cache_dir: Directory to cache downloaded data
+            source: Data source for downloads (defaults to Yahoo Finance)
+            max_workers: Maximum concurrent fetches in get_multiple_symbols
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.source = source or YFinanceSource()
+        self.max_workers = max_workers
+        self.errors = {}
+        self._stores = {}
         
+    @profiled('fetch')
     def get_historical_data(self, symbol: str, start_date: str, end_date: str, 
                            use_cache: bool = True) -> pd.DataFrame:
         """
         Fetch historical OHLCV data for a symbol.
         
+        Each symbol has a single store recording which date ranges it
+        covers; cached sub-ranges are served by slicing and only the
+        missing gaps are downloaded and merged in.
+        
         Args:
             symbol: Stock symbol (e.g., 'AAPL')
             start_date: Start date (YYYY-MM-DD)
@@ -35,72 +52,251 @@ class DataFetcher:
         Returns:
             DataFrame with OHLCV data
         """
-        cache_file = self.cache_dir / f"{symbol}_{start_date}_{end_date}.csv"
+        if not self.source.cacheable:
+            print(f"Fetching {symbol} data (uncached source)...")
+            data = self.source.fetch(symbol, start_date, end_date)
+            if data.empty:
+                raise ValueError(f"No data found for {symbol}")
+            return data
+        
+        store = self._store(symbol)
+        
+        if use_cache:
+            gaps = store.missing_ranges(start_date, end_date)
+        else:
+            gaps = [(normalize_date(start_date), normalize_date(end_date))]
         
         # Check cache
-        if use_cache and cache_file.exists():
-            print(f"Loading {symbol} from cache...")
-            return pd.read_csv(cache_file, index_col=0, parse_dates=True)
+        if not gaps:
+            return store.read(start_date, end_date)
         
-        # Download data
-        print(f"Downloading {symbol} data...")
+        # Download missing data
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(start=start_date, end=end_date)
-            
-            if data.empty:
-                raise ValueError(f"No data found for {symbol}")
-            
-            # Cache the data
-            data.to_csv(cache_file)
+            frames = []
+            for gap_start, gap_end in gaps:
+                print(f"Downloading {symbol} data ({gap_start} to {gap_end})...")
+                frames.append(self.source.fetch(symbol, gap_start, gap_end))
             
-            return data
+            return self._store_and_read(symbol, store, frames, gaps, start_date, end_date)
             
         except Exception as e:
             print(f"Error fetching data for {symbol}: {e}")
             raise
     
-    def get_current_price(self, symbol: str) -> float:
+    @profiled('fetch')
+    def cache_range(self, symbol: str, start_date: str, end_date: str) -> SymbolStore:
         """
-        Get current price for a symbol.
+        Make sure a symbol's store covers a date range, without reading it back.
+        
+        Used by chunked backtests, which stream the bars from the store in
+        blocks instead of loading them as one DataFrame.
         
         Args:
             symbol: Stock symbol
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
             
         Returns:
-            Current price
+            The symbol's SymbolStore
+        """
+        if not self.source.cacheable:
+            raise ValueError(f"{type(self.source).__name__} is not cacheable, so {symbol} has no store")
+            
+        store = self._store(symbol)
+        gaps = store.missing_ranges(start_date, end_date)
+        
+        frames = []
+        for gap_start, gap_end in gaps:
+            print(f"Downloading {symbol} data ({gap_start} to {gap_end})...")
+            frames.append(self.source.fetch(symbol, gap_start, gap_end))
+        if gaps:
+            self._merge_gaps(store, frames, gaps)
+            
+        return store
+    
+    def _store(self, symbol: str) -> SymbolStore:
         """
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period='1d')
+        Get a symbol's store.
         
+        Stores are opened (and legacy cache files migrated) once per
+        fetcher, so repeated reads reuse their metadata and mapped bars.
+        """
+        store = self._stores.get(symbol)
+        if store is None:
+            store = SymbolStore(self.cache_dir / symbol)
+            self._migrate_legacy_cache(symbol, store)
+            self._stores[symbol] = store
+        return store
+    
+    @staticmethod
+    def _merge_gaps(store: SymbolStore, frames: list, gaps: list):
+        """Merge downloaded gap frames into a symbol's store."""
+        # Ranges reaching into the future stay uncovered
+        today = datetime.now().strftime('%Y-%m-%d')
+        covered = [(s, min(e, today)) for s, e in gaps if s < today]
+        # Stores are only written after _migrate_legacy_cache has run on them
+        store.merge(frames, covered, migrated=True)
+    
+    def _store_and_read(self, symbol: str, store: SymbolStore, frames: list, gaps: list,
+                        start_date: str, end_date: str) -> pd.DataFrame:
+        """Merge downloaded gap frames into a symbol's store and read the request back."""
+        # Cache the data
+        self._merge_gaps(store, frames, gaps)
+        
+        data = store.read(start_date, end_date)
         if data.empty:
-            raise ValueError(f"Could not fetch current price for {symbol}")
+            raise ValueError(f"No data found for {symbol}")
+        
+        return data
+    
+    def _migrate_legacy_cache(self, symbol: str, store: SymbolStore):
+        """
+        Merge per-range cache entries of a symbol into its store.
+        
+        Older caches kept one file per (symbol, start, end) request, either
+        as CSV or as a columnar frame named ``{symbol}_{start}_{end}``.
+        They are merged once per store (recorded in its metadata) and left
+        in place.
+        """
+        if store.migrated:
+            return
+            
+        frames, covered = [], []
+        for path in sorted(self.cache_dir.glob(f"{symbol}_*")):
+            name = path.name[:-len('.csv')] if path.suffix == '.csv' else path.name
+            parts = name.rsplit('_', 2)
+            
+            if len(parts) != 3 or parts[0] != symbol:
+                continue
+            
+            if path.suffix == '.csv':
+                data = read_csv_frame(path, store.tz or Config.LEGACY_CACHE_TZ)
+            elif frame_exists(path):
+                data = read_frame(path, mmap=False)
+            else:
+                continue
+            
+            print(f"Migrating {path.name} into {symbol} store...")
+            frames.append(data)
+            covered.append((parts[1], parts[2]))
+            
+        # A new store without legacy files is flagged when it is first written
+        if frames or store.ranges:
+            store.merge(frames, covered, migrated=True)
+    
+    def get_current_price(self, symbol: str) -> float:
+        """
+        Get current price for a symbol.
         
-        return data['Close'].iloc[-1]
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            Current price
+        """
+        return self.source.get_current_price(symbol)
     
-    def get_multiple_symbols(self, symbols: list, start_date: str, end_date: str) -> dict:
+    @profiled('fetch')
+    def get_multiple_symbols(self, symbols: list, start_date: str, end_date: str,
+                             max_workers: int = None, batch_download: bool = None) -> dict:
         """
-        Fetch data for multiple symbols.
+        Fetch data for multiple symbols concurrently.
+        
+        Cache hits and downloads run on a bounded thread pool. Symbols that
+        fail are skipped and their exceptions recorded in ``self.errors``.
         
         Args:
             symbols: List of stock symbols
             start_date: Start date
             end_date: End date
+            max_workers: Maximum concurrent fetches (defaults to self.max_workers)
+            batch_download: Download cache misses with one batched source
+                request per date range instead of one request per symbol
+                (defaults to batching from Config.BATCH_DOWNLOAD_MIN_SYMBOLS
+                symbols up)
             
         Returns:
-            Dictionary of symbol -> DataFrame
+            Dictionary of symbol -> DataFrame, in the order of ``symbols``
         """
+        symbols = list(dict.fromkeys(symbols))
+        self.errors = {}
+        if batch_download is None:
+            batch_download = len(symbols) >= Config.BATCH_DOWNLOAD_MIN_SYMBOLS
+        
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as pool:
+            if batch_download and self.source.cacheable:
+                results = self._fetch_batched(pool, symbols, start_date, end_date)
+            else:
+                results = dict(zip(symbols, pool.map(
+                    lambda symbol: self._capture(self.get_historical_data, symbol, start_date, end_date),
+                    symbols
+                )))
+        
         data = {}
         for symbol in symbols:
-            try:
-                data[symbol] = self.get_historical_data(symbol, start_date, end_date)
-            except Exception as e:
-                print(f"Skipping {symbol}: {e}")
+            result = results[symbol]
+            if isinstance(result, Exception):
+                print(f"Skipping {symbol}: {result}")
+                self.errors[symbol] = result
+            else:
+                data[symbol] = result
         
         return data
     
+    def _fetch_batched(self, pool: ThreadPoolExecutor, symbols: list,
+                       start_date: str, end_date: str) -> dict:
+        """Serve cache hits from the pool and download misses in batches."""
+        stores = dict(zip(symbols, pool.map(self._store, symbols)))
+        
+        # Group cache misses by their exact gaps so each group is one request per gap
+        groups = defaultdict(list)
+        for symbol, store in stores.items():
+            gaps = tuple(store.missing_ranges(start_date, end_date))
+            if gaps:
+                groups[gaps].append(symbol)
+        
+        downloaded = defaultdict(list)
+        for gaps, group in groups.items():
+            for gap_start, gap_end in gaps:
+                print(f"Downloading {len(group)} symbols ({gap_start} to {gap_end})...")
+                try:
+                    batch = self.source.fetch_many(group, gap_start, gap_end)
+                except Exception as e:
+                    batch = {}
+                    print(f"Error fetching batch: {e}")
+                for symbol in group:
+                    downloaded[symbol].append(batch.get(symbol))
+        
+        gaps_by_symbol = {symbol: list(gaps) for gaps, group in groups.items() for symbol in group}
+        
+        def load(symbol):
+            store = stores[symbol]
+            if symbol not in gaps_by_symbol:
+                return store.read(start_date, end_date)
+            
+            frames = downloaded[symbol]
+            if any(frame is None for frame in frames):
+                raise ValueError(f"No data found for {symbol}")
+            
+            return self._store_and_read(symbol, store, frames, gaps_by_symbol[symbol],
+                                        start_date, end_date)
+        
+        return dict(zip(symbols, pool.map(lambda symbol: self._capture(load, symbol), symbols)))
+    
+    @staticmethod
+    def _capture(func, *args):
+        """Call a function, returning any exception instead of raising it."""
+        try:
+            return func(*args)
+        except Exception as e:
+            return e
+    
     def clear_cache(self):
         """Clear all cached data."""
         for file in self.cache_dir.glob("*.csv"):
             file.unlink()
+        for path in self.cache_dir.iterdir():
+            if path.is_dir() and frame_exists(path):
+                shutil.rmtree(path)
+        self._stores.clear()
         print("Cache cleared.")
@@ -0,0 +1,311 @@
+"""
+Market data sources used by DataFetcher.
+"""
+from abc import ABC, abstractmethod
+import zlib
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+
+class DataSource(ABC):
+    """Abstract base class for historical market data sources."""
+    
+    # Whether fetched bars should be written to the DataFetcher cache
+    cacheable = True
+    
+    @abstractmethod
+    def fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Fetch OHLCV bars for one symbol.
+        
+        Args:
+            symbol: Stock symbol
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD, exclusive)
+            
+        Returns:
+            DataFrame with OHLCV data (empty if there are no bars)
+        """
+        pass
+        
+    def fetch_many(self, symbols: list, start_date: str, end_date: str) -> dict:
+        """
+        Fetch OHLCV bars for several symbols over the same date range.
+        
+        Sources with a batch endpoint override this; symbols that fail are
+        left out of the result.
+        
+        Args:
+            symbols: List of stock symbols
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD, exclusive)
+            
+        Returns:
+            Dictionary of symbol -> DataFrame
+        """
+        data = {}
+        for symbol in symbols:
+            try:
+                data[symbol] = self.fetch(symbol, start_date, end_date)
+            except Exception as e:
+                print(f"Error fetching data for {symbol}: {e}")
+        return data
+        
+    @abstractmethod
+    def get_current_price(self, symbol: str) -> float:
+        """
+        Get current price for a symbol.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            Current price
+        """
+        pass
+
+
+class YFinanceSource(DataSource):
+    """Downloads data from Yahoo Finance."""
+    
+    def fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch OHLCV bars for one symbol with ``Ticker.history``."""
+        return yf.Ticker(symbol).history(start=start_date, end=end_date)
+        
+    def get_current_price(self, symbol: str) -> float:
+        """Get the latest close from a one-day history request."""
+        data = yf.Ticker(symbol).history(period='1d')
+        
+        if data.empty:
+            raise ValueError(f"Could not fetch current price for {symbol}")
+            
+        return data['Close'].iloc[-1]
+        
+    def fetch_many(self, symbols: list, start_date: str, end_date: str) -> dict:
+        """
+        Fetch OHLCV bars for several symbols with one ``yf.download`` call.
+        
+        A symbol whose columns cannot be converted is left out, without
+        affecting the rest of the batch.
+        """
+        batch = yf.download(
+            symbols, start=start_date, end=end_date, group_by='ticker',
+            auto_adjust=True, actions=True, ignore_tz=False,
+            progress=False, threads=True
+        )
+        
+        data = {}
+        for symbol in symbols:
+            if symbol not in batch.columns.get_level_values(0):
+                continue
+                
+            try:
+                frame = batch[symbol].dropna(how='all')
+                frame.columns.name = None
+                if 'Volume' in frame.columns:
+                    # Bars with prices but no reported volume count as zero volume
+                    frame = frame.fillna({'Volume': 0}).astype({'Volume': 'int64'})
+                data[symbol] = frame
+            except Exception as e:
+                print(f"Error fetching data for {symbol}: {e}")
+            
+        return data
+
+
+class FrameSource(DataSource):
+    """
+    Serves bars from in-memory DataFrames.
+    
+    Useful as an offline stand-in for a network source, e.g. in tests.
+    """
+    
+    def __init__(self, frames: dict):
+        """
+        Initialize source.
+        
+        Args:
+            frames: Dictionary of symbol -> DataFrame indexed by date
+        """
+        self.frames = frames
+        
+    def fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Slice the stored frame of a symbol to [start_date, end_date)."""
+        if symbol not in self.frames:
+            raise ValueError(f"No data found for {symbol}")
+            
+        data = self.frames[symbol]
+        tz = data.index.tz
+        start = pd.Timestamp(start_date, tz=tz)
+        end = pd.Timestamp(end_date, tz=tz)
+        
+        return data[(data.index >= start) & (data.index < end)]
+        
+    def get_current_price(self, symbol: str) -> float:
+        """Get the last close of the stored frame of a symbol."""
+        if symbol not in self.frames or self.frames[symbol].empty:
+            raise ValueError(f"Could not fetch current price for {symbol}")
+            
+        return float(self.frames[symbol]['Close'].iloc[-1])
+
+
+class SyntheticSource(DataSource):
+    """
+    Generates reproducible synthetic OHLCV bars.
+    
+    Closes follow a geometric Brownian motion with Poisson-distributed
+    normal jumps (Merton jump diffusion). Every symbol gets its own random
+    stream derived from the seed and the symbol name, so the same request
+    always yields the same bars. Series are generated in fixed-size chunks
+    straight into NumPy arrays, which keeps temporaries bounded for paths
+    of tens of millions of bars.
+    """
+    
+    cacheable = False
+    CHUNK_SIZE = 1_000_000
+    
+    def __init__(self, seed: int = 0, freq: str = 'B', bars_per_year: int = 252,
+                 start_price: float = 100.0, mu: float = 0.08, sigma: float = 0.25,
+                 jump_intensity: float = 2.0, jump_mean: float = -0.02, jump_std: float = 0.06,
+                 base_volume: float = 1_000_000):
+        """
+        Initialize source.
+        
+        Args:
+            seed: Base random seed
+            freq: Pandas frequency of generated bars (e.g. 'B', 'min')
+            bars_per_year: Bars per year, used to scale drift and volatility
+            start_price: Price of the first bar
+            mu: Annualized drift
+            sigma: Annualized volatility
+            jump_intensity: Expected number of jumps per year
+            jump_mean: Mean log jump size
+            jump_std: Standard deviation of log jump size
+            base_volume: Median volume per bar
+        """
+        self.seed = seed
+        self.freq = freq
+        self.bars_per_year = bars_per_year
+        self.start_price = start_price
+        self.mu = mu
+        self.sigma = sigma
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.base_volume = base_volume
+        
+    def _rng(self, symbol: str) -> np.random.Generator:
+        """Random generator seeded by the base seed and the symbol name."""
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        
+    def generate_arrays(self, symbol: str, n_bars: int) -> dict:
+        """
+        Generate OHLCV arrays for one symbol.
+        
+        Args:
+            symbol: Stock symbol
+            n_bars: Number of bars
+            
+        Returns:
+            Dictionary of column -> array (float64 prices, int64 volume)
+        """
+        columns = {
+            'Open': np.empty(n_bars),
+            'High': np.empty(n_bars),
+            'Low': np.empty(n_bars),
+            'Close': np.empty(n_bars),
+            'Volume': np.empty(n_bars, dtype=np.int64)
+        }
+        self._fill(symbol, columns)
+        return columns
+        
+    def generate_panel(self, symbols: list, n_bars: int) -> dict:
+        """
+        Generate aligned OHLCV arrays for many symbols.
+        
+        Column j of every array equals ``generate_arrays(symbols[j], n_bars)``.
+        
+        Args:
+            symbols: List of stock symbols
+            n_bars: Number of bars
+            
+        Returns:
+            Dictionary of column -> (bars x symbols) array
+        """
+        shape = (n_bars, len(symbols))
+        panel = {
+            'Open': np.empty(shape),
+            'High': np.empty(shape),
+            'Low': np.empty(shape),
+            'Close': np.empty(shape),
+            'Volume': np.empty(shape, dtype=np.int64)
+        }
+        
+        for j, symbol in enumerate(symbols):
+            self._fill(symbol, {column: values[:, j] for column, values in panel.items()})
+            
+        return panel
+        
+    def _fill(self, symbol: str, columns: dict):
+        """Write a generated path into preallocated column arrays."""
+        rng = self._rng(symbol)
+        n_bars = len(columns['Close'])
+        dt = 1.0 / self.bars_per_year
+        drift = (self.mu - 0.5 * self.sigma ** 2) * dt
+        vol = self.sigma * np.sqrt(dt)
+        jump_prob = self.jump_intensity * dt
+        
+        last_close = self.start_price
+        
+        for start in range(0, n_bars, self.CHUNK_SIZE):
+            end = min(start + self.CHUNK_SIZE, n_bars)
+            size = end - start
+            
+            # Diffusion plus a compound Poisson jump term
+            n_jumps = rng.poisson(jump_prob, size)
+            log_returns = drift + vol * rng.standard_normal(size)
+            log_returns += n_jumps * self.jump_mean + np.sqrt(n_jumps) * self.jump_std * rng.standard_normal(size)
+            
+            close = last_close * np.exp(np.cumsum(log_returns))
+            open_ = np.empty(size)
+            open_[0] = last_close
+            open_[1:] = close[:-1]
+            
+            # Intrabar range scales with per-bar volatility
+            wick_up = np.exp(np.abs(rng.standard_normal(size)) * vol * 0.5)
+            wick_down = np.exp(-np.abs(rng.standard_normal(size)) * vol * 0.5)
+            
+            columns['Open'][start:end] = open_
+            columns['Close'][start:end] = close
+            columns['High'][start:end] = np.maximum(open_, close) * wick_up
+            columns['Low'][start:end] = np.minimum(open_, close) * wick_down
+            columns['Volume'][start:end] = (
+                self.base_volume * np.exp(0.5 * rng.standard_normal(size)) * (1 + 10 * np.abs(log_returns))
+            ).astype(np.int64)
+            
+            last_close = close[-1]
+            
+    def fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Generate bars at ``self.freq`` in [start_date, end_date)."""
+        dates = pd.date_range(start_date, end_date, freq=self.freq, inclusive='left', name='Date')
+        return pd.DataFrame(self.generate_arrays(symbol, len(dates)), index=dates, copy=False)
+        
+    def get_current_price(self, symbol: str) -> float:
+        """Get the last close of a year of bars ending today."""
+        end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        start = end - pd.DateOffset(years=1)
+        data = self.fetch(symbol, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        return float(data['Close'].iloc[-1])
+
+
+SOURCES = {
+    'yfinance': YFinanceSource,
+    'synthetic': SyntheticSource
+}
+
+
+def get_source(name: str) -> DataSource:
+    """Get data source instance by name."""
+    if name not in SOURCES:
+        raise ValueError(f"Unknown data source: {name}")
+    return SOURCES[name]()
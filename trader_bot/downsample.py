@@ -0,0 +1,85 @@
+"""
+Downsampling of long series for plotting.
+
+Largest-Triangle-Three-Buckets (LTTB, Steinarsson 2013) keeps the first
+and last point and, from each of ``n_out - 2`` equal buckets in between,
+the point that forms the largest triangle with the point kept from the
+previous bucket and the average of the next bucket. Peaks, troughs and
+drawdown spikes survive, unlike with every-nth-point decimation.
+
+Bucket averages are computed for all buckets at once; only the choice of
+one point per bucket, which depends on the previous choice, loops in
+Python, so the cost is O(n) NumPy work plus O(n_out) Python steps.
+"""
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select the positions of at most ``n_out`` points with LTTB.
+    
+    Args:
+        x: Increasing x values (numbers or datetimes)
+        y: Y values; points where y is NaN or infinite are dropped
+        n_out: Number of points to keep (at least 3)
+        
+    Returns:
+        Sorted int64 positions into x and y
+    """
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    if not finite.all():
+        positions = np.flatnonzero(finite)
+        return positions[lttb_indices(np.asarray(x)[positions], y[positions], n_out)]
+        
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+        
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        x = x.view(np.int64)
+    x = x.astype(np.float64) - float(x[0])
+    
+    # Bucket k covers [edges[k], edges[k + 1]); first and last point are kept
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], edges[:-1]) / counts, y[-1])
+    
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        start, stop = edges[k], edges[k + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area (sign dropped) for every point of the bucket
+        area = np.abs((ax - avg_x[k + 1]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (avg_y[k + 1] - ay))
+        a = start + int(np.argmax(area))
+        selected[k + 1] = a
+        
+    return selected
+
+
+def downsample(x, y, max_points: int) -> tuple:
+    """
+    Downsample a series to at most ``max_points`` points with LTTB.
+    
+    Args:
+        x: X values (e.g. a DatetimeIndex or date column)
+        y: Y values
+        max_points: Point budget (0 or None keeps every point)
+        
+    Returns:
+        Tuple of (x, y) with x as a pandas Index and y as a float array
+    """
+    x = pd.Index(x)
+    y = np.asarray(y, dtype=np.float64)
+    if not max_points or len(y) <= max_points:
+        return x, y
+        
+    values = x.asi8 if isinstance(x, pd.DatetimeIndex) else x.to_numpy()
+    index = lttb_indices(values, y, max(max_points, 3))
+    return x[index], y[index]
@@ -0,0 +1,402 @@
+"""
+Event-driven backtest engine with a bar-by-bar strategy API.
+
+Strategies implement ``on_bar(bar, portfolio)`` and see one bar at a time
+together with the live portfolio, so the same code can drive a paper or
+live trading loop and react to fills (e.g. stops). The engine walks plain
+Python lists taken from the data once, reuses a single ``Bar`` object and
+records equity into preallocated arrays, so a replay costs a few
+microseconds per bar.
+
+Existing signal-based strategies run unchanged through ``SignalAdapter``
+(precomputed signals) or the streaming adapters, which rebuild the
+built-in strategies on the incremental indicators in
+streaming_indicators.py.
+"""
+from abc import ABC, abstractmethod
+import math
+import numpy as np
+import pandas as pd
+from config import Config
+from order_executor import OrderExecutor
+from portfolio import Portfolio
+from strategies import BaseStrategy, MovingAverageStrategy, RSIStrategy, MomentumStrategy
+from strategies.moving_average import crossover_side
+from streaming_indicators import StreamingSMA, StreamingRSI, StreamingMomentum
+
+
+class Bar:
+    """One bar of market data, updated in place as the engine advances."""
+    
+    __slots__ = ('symbol', 'index', 'Open', 'High', 'Low', 'Close', 'Volume', '_dates', '_offset')
+    
+    def __init__(self, symbol: str, dates: pd.DatetimeIndex, offset: int = 0):
+        """
+        Initialize bar.
+        
+        Args:
+            symbol: Stock symbol
+            dates: Dates of the bars being replayed
+            offset: Bar number of the first of the dates (when bars are
+                    replayed a block at a time)
+        """
+        self.symbol = symbol
+        self.index = -1
+        self.Open = self.High = self.Low = self.Close = math.nan
+        self.Volume = 0
+        self._dates = dates
+        self._offset = offset
+        
+    @property
+    def date(self) -> pd.Timestamp:
+        """Timestamp of the bar (built on access only)."""
+        return self._dates[self.index - self._offset]
+        
+    def __repr__(self) -> str:
+        return (f"Bar({self.symbol} {self.date}: O={self.Open:.2f} H={self.High:.2f} "
+                f"L={self.Low:.2f} C={self.Close:.2f} V={self.Volume})")
+
+
+class EventStrategy(ABC):
+    """Abstract base class for bar-by-bar strategies."""
+    
+    def __init__(self, name: str = None):
+        """
+        Initialize strategy.
+        
+        Args:
+            name: Strategy name (defaults to the class name)
+        """
+        self.name = name or type(self).__name__
+        
+    def on_start(self, symbol: str, data: pd.DataFrame):
+        """
+        Called once before the first bar.
+        
+        Args:
+            symbol: Stock symbol being traded
+            data: Full DataFrame that will be replayed (None live or when
+                  bars are streamed from disk in blocks)
+        """
+        pass
+        
+    @abstractmethod
+    def on_bar(self, bar: Bar, portfolio: Portfolio) -> int:
+        """
+        Handle one bar.
+        
+        Args:
+            bar: Current bar (only valid during the call)
+            portfolio: Portfolio after all previous fills
+            
+        Returns:
+            Signal: 1 (buy), -1 (sell), 0 or None (hold)
+        """
+        pass
+        
+    def get_parameters(self) -> dict:
+        """Get strategy parameters."""
+        return {}
+        
+    def __str__(self) -> str:
+        """String representation of strategy."""
+        params = self.get_parameters()
+        param_str = ", ".join(f"{k}={v}" for k, v in params.items())
+        return f"{self.name}({param_str})"
+
+
+class SignalAdapter(EventStrategy):
+    """Runs any signal-based strategy by precomputing its signals in ``on_start``."""
+    
+    def __init__(self, strategy: BaseStrategy):
+        """
+        Initialize adapter.
+        
+        Args:
+            strategy: Strategy implementing generate_signals
+        """
+        super().__init__(strategy.name)
+        self.strategy = strategy
+        self._signals = []
+        
+    def on_start(self, symbol: str, data: pd.DataFrame):
+        """Generate every signal up front."""
+        self._signals = self.strategy.generate_signals(data).tolist()
+        
+    def on_bar(self, bar: Bar, portfolio: Portfolio) -> int:
+        """Return the precomputed signal of the bar."""
+        return self._signals[bar.index]
+        
+    def get_parameters(self) -> dict:
+        """Get parameters of the wrapped strategy."""
+        return self.strategy.get_parameters()
+
+
+class StreamingMovingAverage(EventStrategy):
+    """MovingAverageStrategy on streaming SMAs."""
+    
+    def __init__(self, strategy: MovingAverageStrategy):
+        """
+        Initialize adapter.
+        
+        Args:
+            strategy: Strategy whose parameters to use
+        """
+        super().__init__(strategy.name)
+        self.strategy = strategy
+        self._short = StreamingSMA(strategy.short_window)
+        self._long = StreamingSMA(strategy.long_window)
+        self._side = None
+        
+    def on_bar(self, bar: Bar, portfolio: Portfolio) -> int:
+        """Signal when the short SMA crosses the long SMA."""
+        short_ma = self._short.update(bar)
+        long_ma = self._long.update(bar)
+        side = crossover_side(short_ma, long_ma)
+        
+        previous, self._side = self._side, side
+        if previous is None or side == previous:
+            return 0
+        return 1 if side > previous else -1
+        
+    def get_parameters(self) -> dict:
+        """Get parameters of the wrapped strategy."""
+        return self.strategy.get_parameters()
+
+
+class StreamingEntryExit(EventStrategy):
+    """
+    Long/flat state machine over per-bar entry and exit conditions.
+    
+    Mirrors ``long_flat_signals``: an entry while flat buys and an exit
+    while long sells. The position is the strategy's own, so the signals
+    equal the batch ones whether or not orders fill.
+    """
+    
+    def __init__(self, strategy: BaseStrategy):
+        """
+        Initialize adapter.
+        
+        Args:
+            strategy: Strategy whose parameters to use
+        """
+        super().__init__(strategy.name)
+        self.strategy = strategy
+        self._long = False
+        
+    @abstractmethod
+    def conditions(self, bar: Bar) -> tuple:
+        """Return (entry, exit) for the bar."""
+        pass
+        
+    def on_bar(self, bar: Bar, portfolio: Portfolio) -> int:
+        """Apply the entry/exit state machine to the bar."""
+        entry, exit_ = self.conditions(bar)
+        
+        if entry and not self._long:
+            self._long = True
+            return 1
+        if exit_ and self._long:
+            self._long = False
+            return -1
+        return 0
+        
+    def get_parameters(self) -> dict:
+        """Get parameters of the wrapped strategy."""
+        return self.strategy.get_parameters()
+
+
+class StreamingRSIStrategy(StreamingEntryExit):
+    """RSIStrategy on a streaming RSI."""
+    
+    def __init__(self, strategy: RSIStrategy):
+        super().__init__(strategy)
+        self._rsi = StreamingRSI(strategy.period)
+        
+    def conditions(self, bar: Bar) -> tuple:
+        """Enter when oversold, exit when overbought."""
+        rsi = self._rsi.update(bar)
+        return rsi < self.strategy.oversold, rsi > self.strategy.overbought
+
+
+class StreamingMomentumStrategy(StreamingEntryExit):
+    """MomentumStrategy on a streaming momentum."""
+    
+    def __init__(self, strategy: MomentumStrategy):
+        super().__init__(strategy)
+        self._momentum = StreamingMomentum(strategy.lookback_period)
+        
+    def conditions(self, bar: Bar) -> tuple:
+        """Enter on strong momentum, exit when it turns negative or weakens."""
+        momentum = self._momentum.update(bar)
+        threshold = self.strategy.threshold
+        return momentum > threshold, momentum < -threshold or momentum < threshold / 2
+
+
+STREAMING_ADAPTERS = {
+    MovingAverageStrategy: StreamingMovingAverage,
+    RSIStrategy: StreamingRSIStrategy,
+    MomentumStrategy: StreamingMomentumStrategy
+}
+
+
+def as_event_strategy(strategy, streaming: bool = True) -> EventStrategy:
+    """
+    Wrap a strategy for the event engine.
+    
+    Args:
+        strategy: EventStrategy (returned as is) or signal-based strategy
+        streaming: Use the streaming adapter of built-in strategies instead
+                   of precomputed signals
+                   
+    Returns:
+        EventStrategy
+    """
+    if isinstance(strategy, EventStrategy):
+        return strategy
+    if streaming and type(strategy) in STREAMING_ADAPTERS:
+        return STREAMING_ADAPTERS[type(strategy)](strategy)
+    return SignalAdapter(strategy)
+
+
+class EventRunner:
+    """
+    Replays bars through an event strategy one block of bars at a time.
+    
+    The portfolio, the executor and the strategy (with its indicator
+    state) live on the runner, so feeding consecutive blocks gives the
+    same fills as replaying all bars at once. ``run_events`` replays a
+    DataFrame as a single block; chunked_engine streams blocks from disk.
+    """
+    
+    FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+    
+    def __init__(self, strategy: EventStrategy, symbol: str, initial_capital: float, config: Config = None,
+                 allocation_pct: float = 0.1, verbose: bool = True):
+        """
+        Initialize runner.
+        
+        Args:
+            strategy: Event strategy to drive
+            symbol: Stock symbol to trade
+            initial_capital: Starting cash balance
+            config: Configuration object
+            allocation_pct: Fraction of portfolio value allocated per buy
+            verbose: Print every executed trade
+        """
+        self.strategy = strategy
+        self.symbol = symbol
+        self.allocation_pct = allocation_pct
+        self.verbose = verbose
+        self.portfolio = Portfolio(initial_capital)
+        self.executor = OrderExecutor(self.portfolio, config or Config())
+        self.bars = 0
+        self.last_date = None
+        self.last_close = math.nan
+        self._bar = Bar(symbol, None)
+        self._prices = {symbol: math.nan}
+        
+    def start(self, data: pd.DataFrame = None):
+        """Notify the strategy before the first bar (data as in EventStrategy.on_start)."""
+        self.strategy.on_start(self.symbol, data)
+        
+    def replay(self, dates: pd.DatetimeIndex, columns: list, values: np.ndarray, cash: np.ndarray):
+        """
+        Replay the next block of bars.
+        
+        Args:
+            dates: Dates of the block
+            columns: Lists of the block's values for each of FIELDS
+            values: Output array for the portfolio value after each bar
+            cash: Output array for the cash balance after each bar
+        """
+        if not len(dates):
+            return
+            
+        strategy, portfolio, executor = self.strategy, self.portfolio, self.executor
+        symbol, prices, allocation_pct, verbose = self.symbol, self._prices, self.allocation_pct, self.verbose
+        bar = self._bar
+        bar._dates = dates
+        bar._offset = offset = self.bars
+        
+        for i, (open_, high, low, close, volume) in enumerate(zip(*columns)):
+            bar.index = offset + i
+            bar.Open = open_
+            bar.High = high
+            bar.Low = low
+            bar.Close = close
+            bar.Volume = volume
+            prices[symbol] = close
+            
+            signal = strategy.on_bar(bar, portfolio)
+            
+            if signal == 1:
+                shares = executor.calculate_shares_to_buy(symbol, close, allocation_pct=allocation_pct)
+                if shares > 0:
+                    date = bar.date
+                    if executor.execute_buy(symbol, close, shares, date) and verbose:
+                        print(f"{date.date()}: BUY  {shares} shares @ ${close:.2f}")
+                        
+            elif signal == -1:
+                position_size = portfolio.get_position_size(symbol)
+                if position_size > 0:
+                    date = bar.date
+                    if executor.execute_sell(symbol, close, position_size, date) and verbose:
+                        print(f"{date.date()}: SELL {position_size} shares @ ${close:.2f}")
+                        
+            values[i] = portfolio.get_portfolio_value(prices)
+            cash[i] = portfolio.cash
+            
+        self.bars += len(dates)
+        self.last_date = dates[-1]
+        self.last_close = columns[3][-1]
+        
+    def finish(self):
+        """Close any open position at the last bar replayed."""
+        position_size = self.portfolio.get_position_size(self.symbol)
+        if position_size > 0:
+            self.executor.execute_sell(self.symbol, self.last_close, position_size, self.last_date)
+            if self.verbose:
+                print(f"{self.last_date.date()}: SELL {position_size} shares @ ${self.last_close:.2f} "
+                      f"(closing position)")
+
+
+def run_events(strategy: EventStrategy, symbol: str, data: pd.DataFrame, initial_capital: float,
+               config: Config = None, allocation_pct: float = 0.1, verbose: bool = True) -> tuple:
+    """
+    Replay bars through an event strategy.
+    
+    Orders are sized and filled like in Backtester's loop engine, so a
+    SignalAdapter reproduces its trades and equity curve.
+    
+    Args:
+        strategy: Event strategy to drive
+        symbol: Stock symbol to trade
+        data: DataFrame with OHLCV data
+        initial_capital: Starting cash balance
+        config: Configuration object
+        allocation_pct: Fraction of portfolio value allocated per buy
+        verbose: Print every executed trade
+        
+    Returns:
+        Tuple of (portfolio, equity curve DataFrame)
+    """
+    runner = EventRunner(strategy, symbol, initial_capital, config, allocation_pct, verbose)
+    
+    n_bars = len(data)
+    values = np.empty(n_bars)
+    cash = np.empty(n_bars)
+    columns = [data[f].tolist() if f in data.columns else [math.nan] * n_bars for f in EventRunner.FIELDS]
+    
+    runner.start(data)
+    runner.replay(data.index, columns, values, cash)
+    runner.finish()
+    
+    equity_curve = pd.DataFrame({
+        'date': data.index,
+        'value': values,
+        'cash': cash,
+        'positions_value': values - cash
+    })
+    
+    return runner.portfolio, equity_curve
@@ -1,10 +1,224 @@
 """
 Technical indicators for trading strategies.
+
+Indicator functions are memoized in ``indicator_cache``: repeated calls
+with the same input data and parameters (e.g. the same SMA window across a
+parameter sweep) return the stored result instead of recomputing it.
 """
+import functools
+import hashlib
+import inspect
+import threading
+import weakref
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+from config import Config
+
+
+class IndicatorCache:
+    """
+    Memory-bounded LRU cache of indicator results.
+    
+    Entries are keyed by (indicator name, data fingerprints, parameters).
+    When the stored results exceed ``max_bytes`` the least recently used
+    entries are evicted.
+    """
+    
+    def __init__(self, max_bytes: int = Config.INDICATOR_CACHE_MAX_BYTES):
+        """
+        Initialize cache.
+        
+        Args:
+            max_bytes: Upper bound on the size of stored results (0 disables caching)
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+    @property
+    def enabled(self) -> bool:
+        """Whether results are being cached."""
+        return self.max_bytes > 0
+        
+    @property
+    def size_bytes(self) -> int:
+        """Total size of stored results."""
+        return self._bytes
+        
+    def get(self, key):
+        """Get a stored result (None on a miss) and count the lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+            
+    def put(self, key, value):
+        """Store a result, evicting least recently used entries to fit."""
+        nbytes = _result_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+            
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+                
+    def clear(self):
+        """Drop every stored result and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, hit_rate (%), evictions, entries and bytes
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups * 100 if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+
+
+indicator_cache = IndicatorCache()
+
+# Bars per block in calculate_ema_windows
+EMA_BLOCK_SIZE = 32
+
+
+# Index arrays are immutable and shared by every view of an index (pandas 3
+# hands out a new view on each column access), so their digests are kept
+# while the array lives
+_index_digests = {}
+
+
+def fingerprint(data) -> tuple:
+    """
+    Fingerprint price data by content.
+    
+    Args:
+        data: Series, DataFrame or array
+        
+    Returns:
+        Hashable key covering type, shape, dtypes, labels, index and values
+    """
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        labels = (data.name,) if isinstance(data, pd.Series) else tuple(data.columns)
+        index_digest = _index_digest(data.index)
+        values = data.to_numpy()
+    else:
+        labels = ()
+        index_digest = None
+        values = np.asarray(data)
+        
+    return (type(data).__name__, values.shape, str(values.dtype), labels, index_digest, _digest(values))
 
 
+def _digest(values: np.ndarray) -> bytes:
+    """Hash array contents, as raw bytes when the dtype allows it."""
+    if values.dtype.kind in 'biufmM':
+        data = np.ascontiguousarray(values).view(np.uint8)
+    else:
+        data = repr(values.tolist()).encode()
+    return hashlib.sha256(data).digest()[:16]
+
+
+def _index_digest(index: pd.Index) -> tuple:
+    """Hash an index once per backing array (per object for a MultiIndex, which has none)."""
+    owner = index if isinstance(index, pd.MultiIndex) else index.array
+    key = id(owner)
+    entry = _index_digests.get(key)
+    if entry is None or entry[0]() is not owner:
+        entry = (weakref.ref(owner, lambda _, key=key: _index_digests.pop(key, None)), _digest(index.to_numpy()))
+        _index_digests[key] = entry
+    return (str(index.dtype), index.name, entry[1])
+
+
+def _result_nbytes(value) -> int:
+    """Approximate memory held by an indicator result."""
+    if isinstance(value, tuple):
+        return sum(_result_nbytes(v) for v in value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    return int(getattr(value, 'nbytes', 0))
+
+
+def _copy_result(value):
+    """
+    Copy a cached result for one caller.
+    
+    Callers own what an indicator returns, cached or not, so writing into
+    it must not reach the stored result. A shallow copy only guarantees
+    that under pandas Copy-on-Write, which pandas 2 leaves off by default,
+    so the values are copied (a copy costs a fraction of computing them).
+    """
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    if isinstance(value, (pd.Series, pd.DataFrame, np.ndarray)):
+        return value.copy()
+    return value
+
+
+def _key_part(value):
+    """Turn an indicator argument into a hashable cache key part."""
+    if isinstance(value, (pd.Series, pd.DataFrame, np.ndarray)):
+        return fingerprint(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def cached_indicator(func):
+    """Memoize an indicator function in ``indicator_cache``."""
+    signature = inspect.signature(func)
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not indicator_cache.enabled:
+            return func(*args, **kwargs)
+            
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__,) + tuple(_key_part(value) for value in bound.arguments.values())
+        
+        result = indicator_cache.get(key)
+        if result is None:
+            result = func(*args, **kwargs)
+            indicator_cache.put(key, result)
+            
+        return _copy_result(result)
+        
+    return wrapper
+
+
+@cached_indicator
 def calculate_sma(data: pd.Series, window: int) -> pd.Series:
     """
     Calculate Simple Moving Average.
@@ -19,6 +233,7 @@ def calculate_sma(data: pd.Series, window: int) -> pd.Series:
     return data.rolling(window=window).mean()
 
 
+@cached_indicator
 def calculate_ema(data: pd.Series, window: int) -> pd.Series:
     """
     Calculate Exponential Moving Average.
@@ -33,6 +248,7 @@ def calculate_ema(data: pd.Series, window: int) -> pd.Series:
     return data.ewm(span=window, adjust=False).mean()
 
 
+@cached_indicator
 def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
     """
     Calculate Relative Strength Index.
@@ -55,6 +271,7 @@ def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
     return rsi
 
 
+@cached_indicator
 def calculate_macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
     """
     Calculate MACD (Moving Average Convergence Divergence).
@@ -78,6 +295,7 @@ def calculate_macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int
     return macd_line, signal_line, histogram
 
 
+@cached_indicator
 def calculate_bollinger_bands(data: pd.Series, window: int = 20, num_std: float = 2) -> tuple:
     """
     Calculate Bollinger Bands.
@@ -99,6 +317,7 @@ def calculate_bollinger_bands(data: pd.Series, window: int = 20, num_std: float
     return upper_band, middle_band, lower_band
 
 
+@cached_indicator
 def calculate_momentum(data: pd.Series, period: int = 20) -> pd.Series:
     """
     Calculate price momentum (rate of change).
@@ -113,6 +332,7 @@ def calculate_momentum(data: pd.Series, period: int = 20) -> pd.Series:
     return ((data - data.shift(period)) / data.shift(period)) * 100
 
 
+@cached_indicator
 def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
     """
     Calculate Average True Range.
@@ -136,6 +356,7 @@ def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int
     return atr
 
 
+@cached_indicator
 def calculate_stochastic(high: pd.Series, low: pd.Series, close: pd.Series, 
                          k_period: int = 14, d_period: int = 3) -> tuple:
     """
@@ -158,3 +379,166 @@ def calculate_stochastic(high: pd.Series, low: pd.Series, close: pd.Series,
     d = k.rolling(window=d_period).mean()
     
     return k, d
+
+
+def _rolling_means(values: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """
+    Rolling means of one series for many windows from a single cumulative sum.
+    
+    A window containing a NaN yields NaN, as with ``Series.rolling().mean()``.
+    The series is offset by its first valid value before summing, which keeps
+    the cumulative sum small and the differences accurate.
+    
+    Args:
+        values: 1D array of values
+        windows: 1D array of window sizes
+        
+    Returns:
+        (len(values) x len(windows)) array of means
+    """
+    n_bars = len(values)
+    missing = np.isnan(values)
+    valid = values[~missing]
+    offset = valid[0] if len(valid) else 0.0
+    
+    sums = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, values - offset))))
+    nan_counts = np.concatenate(([0], np.cumsum(missing))) if len(valid) < n_bars else None
+    
+    # Fill window-major so each window is one contiguous slice
+    means = np.full((len(windows), n_bars), np.nan)
+    for j, window in enumerate(windows.tolist()):
+        if window > n_bars:
+            continue
+        row = means[j, window - 1:]
+        np.subtract(sums[window:], sums[:n_bars + 1 - window], out=row)
+        row /= window
+        row += offset
+        if nan_counts is not None:
+            row[nan_counts[window:] != nan_counts[:n_bars + 1 - window]] = np.nan
+            
+    return means.T
+
+
+@cached_indicator
+def calculate_sma_windows(data: pd.Series, windows: list) -> np.ndarray:
+    """
+    Calculate Simple Moving Averages for many windows in one pass.
+    
+    Every column comes from one cumulative sum of the series, so adding
+    windows costs a subtraction per bar instead of another rolling pass.
+    Values agree with ``calculate_sma`` up to floating point rounding
+    (about 1e-13 relative), which crossover comparisons absorb with
+    their tie tolerance (see strategies.moving_average.crossover_side).
+    
+    Args:
+        data: Price data
+        windows: Window sizes
+        
+    Returns:
+        (bars x windows) array of SMA values
+    """
+    values = np.asarray(data, dtype=np.float64)
+    return _rolling_means(values, np.asarray(windows, dtype=np.int64))
+
+
+@cached_indicator
+def calculate_ema_windows(data: pd.Series, windows: list) -> np.ndarray:
+    """
+    Calculate Exponential Moving Averages for many windows in one pass.
+    
+    The EMA recurrence is solved in blocks of bars: within a block every
+    value is a weighted sum of the block's prices plus the decayed carry of
+    the previous block, which is a matrix product for all windows at once.
+    Only the carry is stepped block by block. Values agree with
+    ``calculate_ema`` up to floating point rounding.
+    
+    Args:
+        data: Price data
+        windows: Window sizes (spans)
+        
+    Returns:
+        (bars x windows) array of EMA values
+    """
+    values = np.asarray(data, dtype=np.float64)
+    n_bars = len(values)
+    
+    # Missing values change the EMA weighting; leave those series to pandas
+    if n_bars == 0 or np.isnan(values).any():
+        series = pd.Series(values)
+        columns = [series.ewm(span=w, adjust=False).mean().to_numpy() for w in windows]
+        return np.column_stack(columns) if columns else np.empty((n_bars, 0))
+        
+    alpha = 2.0 / (np.asarray(windows, dtype=np.float64) + 1.0)
+    decay = 1.0 - alpha
+    block = EMA_BLOCK_SIZE
+    n_blocks = -(-n_bars // block)
+    
+    padded = np.zeros(n_blocks * block)
+    padded[:n_bars] = values
+    blocks = padded.reshape(n_blocks, block)
+    
+    # weights[k, j, i] = alpha * decay^(j - i) for i <= j within a block
+    lags = np.arange(block)[:, None] - np.arange(block)[None, :]
+    powers = decay[:, None, None] ** np.maximum(lags, 0)[None, :, :]
+    weights = np.where(lags[None, :, :] >= 0, alpha[:, None, None] * powers, 0.0)
+    
+    # In-block sums for every window: (windows x blocks x bars per block)
+    partial = blocks[None, :, :] @ weights.transpose(0, 2, 1)
+    carry_decay = decay[:, None] ** np.arange(1, block + 1)[None, :]
+    
+    emas = np.empty((len(alpha), n_blocks, block))
+    carry = np.full(len(alpha), values[0])  # the first EMA value is the first price
+    for b in range(n_blocks):
+        emas[:, b, :] = partial[:, b, :] + carry_decay * carry[:, None]
+        carry = emas[:, b, -1]
+        
+    return emas.reshape(len(alpha), -1)[:, :n_bars].T
+
+
+@cached_indicator
+def calculate_momentum_windows(data: pd.Series, periods: list) -> np.ndarray:
+    """
+    Calculate price momentum for many lookback periods in one pass.
+    
+    Args:
+        data: Price data
+        periods: Lookback periods
+        
+    Returns:
+        (bars x periods) array of momentum values (percentage change)
+    """
+    values = np.asarray(data, dtype=np.float64)
+    past_index = np.arange(len(values))[:, None] - np.asarray(periods, dtype=np.int64)[None, :]
+    past = np.where(past_index >= 0, values[np.maximum(past_index, 0)], np.nan)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((values[:, None] - past) / past) * 100
+
+
+@cached_indicator
+def calculate_rsi_windows(data: pd.Series, periods: list) -> np.ndarray:
+    """
+    Calculate Relative Strength Index for many periods in one pass.
+    
+    Average gains and losses for every period come from one cumulative
+    sum each. Values agree with ``calculate_rsi`` up to floating point
+    rounding.
+    
+    Args:
+        data: Price data
+        periods: RSI periods
+        
+    Returns:
+        (bars x periods) array of RSI values (0-100)
+    """
+    values = np.asarray(data, dtype=np.float64)
+    delta = np.diff(values, prepend=np.nan)
+    periods = np.asarray(periods, dtype=np.int64)
+    
+    # Like the batch version, a missing change counts as no gain or loss
+    gain = _rolling_means(np.where(delta > 0, delta, 0.0), periods)
+    loss = _rolling_means(np.where(delta < 0, -delta, 0.0), periods)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
@@ -0,0 +1,118 @@
+"""
+Growable columnar ledgers for trade and equity records.
+"""
+import numpy as np
+import pandas as pd
+
+
+class ArrayLedger:
+    """
+    Append-only table stored as one growable NumPy array per column.
+    
+    Rows are written straight into preallocated arrays whose capacity
+    doubles when full, so appending a row allocates no per-row objects and
+    reading a column back is a view, not a copy.
+    """
+    
+    def __init__(self, dtypes: dict, capacity: int = 256):
+        """
+        Initialize ledger.
+        
+        Args:
+            dtypes: Dictionary of column name -> NumPy dtype, in row order
+            capacity: Initial number of rows to allocate
+        """
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in dtypes.items()}
+        self._arrays = [np.empty(max(capacity, 1), dtype=dtype) for dtype in self.dtypes.values()]
+        self._size = 0
+        
+    def __len__(self) -> int:
+        return self._size
+        
+    @property
+    def capacity(self) -> int:
+        """Number of rows that fit without reallocating."""
+        return len(self._arrays[0])
+        
+    def reserve(self, capacity: int):
+        """Make room for at least ``capacity`` rows."""
+        if capacity <= self.capacity:
+            return
+            
+        for i, array in enumerate(self._arrays):
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[i] = grown
+            
+    def append(self, *values):
+        """Append one row, given in column order."""
+        size = self._size
+        if size == self.capacity:
+            self.reserve(2 * size)
+            
+        for array, value in zip(self._arrays, values):
+            array[size] = value
+        self._size = size + 1
+        
+    def extend(self, *columns):
+        """Append many rows, given as one array per column in column order."""
+        count = len(columns[0])
+        start = self._size
+        if start + count > self.capacity:
+            self.reserve(max(start + count, 2 * self.capacity))
+            
+        for array, values in zip(self._arrays, columns):
+            array[start:start + count] = values
+        self._size = start + count
+        
+    def clear(self):
+        """Remove every row (views returned earlier become invalid)."""
+        self._size = 0
+        
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one column's filled rows."""
+        view = self._arrays[list(self.dtypes).index(name)][:self._size]
+        view.flags.writeable = False
+        return view
+        
+    def columns(self) -> dict:
+        """Read-only views of every column's filled rows."""
+        return {name: self.column(name) for name in self.dtypes}
+
+
+class DateCodec:
+    """
+    Converts timestamps to int64 nanoseconds and back.
+    
+    The timezone and resolution of the first timestamp are remembered so
+    dates read back compare equal to, and have the dtype of, the ones
+    recorded.
+    """
+    
+    def __init__(self):
+        self.tz = None
+        self.unit = None
+        
+    def encode(self, date) -> int:
+        """Convert one timestamp to int64 nanoseconds (UTC for tz-aware dates)."""
+        if not isinstance(date, pd.Timestamp):
+            date = pd.Timestamp(date)
+        if self.unit is None:
+            self.tz = date.tz
+            self.unit = date.unit
+        return date.value
+        
+    def encode_many(self, dates) -> np.ndarray:
+        """Convert a sequence of timestamps to int64 nanoseconds."""
+        dates = pd.DatetimeIndex(dates)
+        if self.unit is None and len(dates):
+            self.tz = dates.tz
+            self.unit = dates.unit
+        return dates.as_unit('ns').asi8
+        
+    def decode(self, values: np.ndarray) -> pd.DatetimeIndex:
+        """Convert int64 nanoseconds back to timestamps."""
+        dates = pd.DatetimeIndex(values.view('M8[ns]'))
+        if self.tz is not None:
+            dates = dates.tz_localize('UTC').tz_convert(self.tz)
+        return dates.as_unit(self.unit) if self.unit else dates
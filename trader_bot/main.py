@@ -2,12 +2,21 @@
 Main CLI interface for the trading bot.
 """
 import argparse
-from datetime import datetime, timedelta
-from backtester import Backtester
+import json
+from backtester import Backtester, ENGINES
+from portfolio_backtester import PortfolioBacktester
+from sweep import STRATEGY_CLASSES, ParameterSweep, parse_param
+from walk_forward import WalkForward
+from comparison import StrategyComparison
+from result_store import RUN_METRICS, ResultStore
+from monte_carlo import METHODS, monte_carlo
+from risk_exits import RiskExits
 from strategies import MovingAverageStrategy, RSIStrategy, MomentumStrategy
 from data_fetcher import DataFetcher
+from data_sources import SOURCES, get_source
 from visualizer import Visualizer
 from performance_tracker import PerformanceTracker
+from profiling import profiler
 from config import Config
 
 
@@ -34,6 +43,65 @@ def get_strategy(strategy_name: str):
     return strategies.get(strategy_name.lower())
 
 
+def get_store(args):
+    """Get the result store, unless --no-store was given."""
+    return None if args.no_store else ResultStore(args.store)
+
+
+def get_risk_exits(args) -> RiskExits:
+    """Get the risk exit rules from --stop-loss, --take-profit and --trailing-stop (None if none given)."""
+    risk_exits = RiskExits(args.stop_loss, args.take_profit, args.trailing_stop)
+    return risk_exits if risk_exits else None
+
+
+def add_risk_exit_arguments(parser: argparse.ArgumentParser):
+    """Add the risk exit options to a command's parser."""
+    parser.add_argument('--stop-loss', type=float, nargs='?', const=Config.STOP_LOSS_PCT, metavar='PCT',
+                        help='Exit intrabar when the Low falls PCT below the entry price '
+                             '(default without a value: %(const)s)')
+    parser.add_argument('--take-profit', type=float, nargs='?', const=Config.TAKE_PROFIT_PCT, metavar='PCT',
+                        help='Exit intrabar when the High rises PCT above the entry price '
+                             '(default without a value: %(const)s)')
+    parser.add_argument('--trailing-stop', type=float, nargs='?', const=Config.TRAILING_STOP_PCT, metavar='PCT',
+                        help='Exit intrabar when the Low falls PCT below the highest High since entry '
+                             '(default without a value: %(const)s)')
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Add the profiling options to a command's parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='Print wall time, CPU time and calls of each stage')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Also trace peak memory per stage with tracemalloc (slows the run down); '
+                             'implies --profile')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='Also write a JSON trace (FILE ending in .json) or cProfile stats for '
+                             'pstats (any other FILE); implies --profile')
+
+
+def print_profile(args):
+    """Stop profiling, print the stage summary and write --profile-output."""
+    profiler.disable()
+    summary = profiler.summary().rename(columns={
+        'stage': 'Stage', 'calls': 'Calls', 'wall_s': 'Wall (s)', 'cpu_s': 'CPU (s)',
+        'wall_pct': 'Wall %', 'peak_mb': 'Peak MB'
+    })
+    summary['Calls'] = summary['Calls'].astype(object).fillna('-')
+    
+    print("\n" + "="*80)
+    print(f"PROFILE - {args.command} (stage times exclude inner stages)")
+    print("="*80)
+    print(summary.to_string(index=False, na_rep='-', float_format=lambda v: f"{v:.3f}"))
+    print("="*80 + "\n")
+    
+    if args.profile_output and args.profile_output.endswith('.json'):
+        profiler.write_trace(args.profile_output)
+        print(f"Stage trace saved to: {args.profile_output}")
+    elif args.profile_output:
+        profiler.dump_stats(args.profile_output)
+        print(f"cProfile stats saved to: {args.profile_output} (python -m pstats {args.profile_output})")
+
+
 def backtest_command(args):
     """Run a single backtest."""
     strategy = get_strategy(args.strategy)
@@ -43,18 +111,35 @@ def backtest_command(args):
         print("Available strategies: ma, rsi, momentum")
         return
     
+    risk_exits = get_risk_exits(args)
+    if risk_exits and (args.engine == 'event' or args.chunked):
+        print("Risk exits run in the loop and vectorized engines, not with --engine event or --chunked")
+        return
+    
     config = Config()
-    backtester = Backtester(strategy, args.capital, config)
-    data_fetcher = DataFetcher(config.DATA_CACHE_DIR)
+    backtester = Backtester(strategy, args.capital, config, engine=args.engine, store=get_store(args),
+                            risk_exits=risk_exits)
+    data_fetcher = DataFetcher(config.DATA_CACHE_DIR, source=get_source(args.source))
+    
+    if args.chunked and not data_fetcher.source.cacheable:
+        print(f"--chunked streams bars from the data cache, but the {args.source} source is not cached")
+        return
     
     # Run backtest
-    results = backtester.run(args.symbol, args.start, args.end, data_fetcher)
+    if args.chunked:
+        results = backtester.run_chunked(args.symbol, args.start, args.end, data_fetcher, args.block_bars)
+    else:
+        results = backtester.run(args.symbol, args.start, args.end, data_fetcher)
     
     # Print results
     backtester.print_results()
+    if args.chunked:
+        print(f"Equity curve written to {results['equity_path']}")
     
     # Create visualizations
-    if args.plot:
+    if args.plot and args.chunked:
+        print("Charts need the whole history in memory; --plot is ignored with --chunked")
+    elif args.plot:
         data = data_fetcher.get_historical_data(args.symbol, args.start, args.end)
         output_file = f"backtest_{args.strategy}_{args.symbol}.html"
         Visualizer.create_dashboard(results, data, output_file)
@@ -63,7 +148,6 @@ def backtest_command(args):
 def compare_command(args):
     """Compare multiple strategies."""
     config = Config()
-    data_fetcher = DataFetcher(config.DATA_CACHE_DIR)
     
     strategies = {
         'ma': MovingAverageStrategy(
@@ -81,27 +165,33 @@ def compare_command(args):
         )
     }
     
-    all_results = []
-    
     # Run backtests for each strategy and symbol
-    for strategy_name, strategy in strategies.items():
-        for symbol in args.symbols:
-            print(f"\n{'='*60}")
-            print(f"Testing {strategy_name.upper()} on {symbol}")
-            print(f"{'='*60}")
-            
-            backtester = Backtester(strategy, args.capital, config)
-            results = backtester.run(symbol, args.start, args.end, data_fetcher)
-            all_results.append(results)
-            backtester.print_results()
+    comparison = StrategyComparison(strategies, args.capital, config, engine=args.engine,
+                                    jobs=args.jobs, source_name=args.source, store=get_store(args))
+    all_results = comparison.run(args.symbols, args.start, args.end)
     
+    for symbol, error in comparison.errors.items():
+        print(f"Skipped {symbol}: {error}")
+        
+    for (strategy_name, symbol), results in zip(
+        [(name, symbol) for name in strategies for symbol in comparison.symbols], all_results
+    ):
+        print(f"\n{'='*60}")
+        print(f"Testing {strategy_name.upper()} on {symbol}")
+        print(f"{'='*60}")
+        Backtester(strategies[strategy_name], args.capital, config).print_results(results)
+        
     # Create comparison table
     print("\n" + "="*80)
     print("STRATEGY COMPARISON")
     print("="*80)
     comparison_df = PerformanceTracker.compare_strategies(all_results)
     print(comparison_df.to_string(index=False))
-    print("="*80 + "\n")
+    print("="*80)
+    
+    stats = comparison.cache_stats
+    print(f"Indicator cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate']:.1f}% hit rate)\n")
     
     # Create comparison chart
     if args.plot:
@@ -117,9 +207,15 @@ def report_command(args):
         print(f"Unknown strategy: {args.strategy}")
         return
     
+    risk_exits = get_risk_exits(args)
+    if risk_exits and args.engine == 'event':
+        print("Risk exits run in the loop and vectorized engines, not with --engine event")
+        return
+    
     config = Config()
-    backtester = Backtester(strategy, args.capital, config)
-    data_fetcher = DataFetcher(config.DATA_CACHE_DIR)
+    backtester = Backtester(strategy, args.capital, config, engine=args.engine, store=get_store(args),
+                            risk_exits=risk_exits)
+    data_fetcher = DataFetcher(config.DATA_CACHE_DIR, source=get_source(args.source))
     
     # Run backtest
     results = backtester.run(args.symbol, args.start, args.end, data_fetcher)
@@ -131,7 +227,7 @@ def report_command(args):
     equity_curve = results['equity_curve']
     trade_history = results['trade_history']
     metrics = PerformanceTracker.calculate_metrics(
-        equity_curve, trade_history, args.capital
+        equity_curve, trade_history, args.capital, results['round_trips']
     )
     
     print("\nDETAILED METRICS:")
@@ -146,14 +242,146 @@ def report_command(args):
     print(f"Losing Trades:      {metrics['losing_trades']}")
     print(f"Average Win:        ${metrics['avg_win']:.2f}")
     print(f"Average Loss:       ${metrics['avg_loss']:.2f}")
+    print(f"Avg Holding Period: {metrics['avg_holding_days']:.1f} days")
+    print(f"Avg MAE / MFE:      {metrics['avg_mae']:.2f}% / {metrics['avg_mfe']:.2f}%")
     print(f"{'='*60}\n")
     
+    if args.monte_carlo:
+        mc = monte_carlo(results, method=args.mc_method, n_simulations=args.monte_carlo, seed=args.seed)
+        print(f"MONTE CARLO ({mc['simulations']} paths, resampling {mc['method']}):")
+        print(f"{'='*60}")
+        print(mc['intervals'].to_string(float_format=lambda x: f"{x:,.2f}"))
+        print(f"Probability of Loss: {mc['probability_of_loss']:.1f}%")
+        print(f"{'='*60}\n")
+    
     # Create dashboard
     data = data_fetcher.get_historical_data(args.symbol, args.start, args.end)
     output_file = f"report_{args.strategy}_{args.symbol}.html"
     Visualizer.create_dashboard(results, data, output_file)
 
 
+def portfolio_command(args):
+    """Run a portfolio backtest sharing one capital pool across symbols."""
+    strategy = get_strategy(args.strategy)
+    
+    config = Config()
+    backtester = PortfolioBacktester(strategy, args.capital, config, allocation_pct=args.allocation,
+                                     risk_exits=get_risk_exits(args))
+    data_fetcher = DataFetcher(config.DATA_CACHE_DIR, source=get_source(args.source))
+    
+    # Run backtest
+    results = backtester.run(args.symbols, args.start, args.end, data_fetcher)
+    
+    # Print results
+    backtester.print_results()
+    
+    # Create visualizations
+    if args.plot:
+        output_file = f"portfolio_{args.strategy}.html"
+        Visualizer.plot_equity_curve(results, output_file)
+        print(f"Equity curve saved to: {output_file}")
+
+
+def get_grid(args, config: Config) -> dict:
+    """Get the parameter grid from --param specs (defaults to the configured parameters)."""
+    if args.param:
+        return dict(parse_param(spec) for spec in args.param)
+        
+    key = {'ma': 'moving_average'}.get(args.strategy, args.strategy)
+    return {name: [value] for name, value in config.STRATEGY_PARAMS[key].items()}
+
+
+def sweep_command(args):
+    """Run a strategy over a grid of parameters."""
+    config = Config()
+    grid = get_grid(args, config)
+    
+    sweep = ParameterSweep(args.strategy, grid, args.capital, config, jobs=args.jobs, source_name=args.source)
+    table = sweep.run(args.symbols, args.start, args.end, metric=args.metric)
+    
+    columns = list(grid) + ['symbol', 'total_return', 'sharpe_ratio', 'max_drawdown',
+                            'win_rate', 'total_trades', 'profit_factor', 'final_value']
+    
+    print("\n" + "="*80)
+    print(f"PARAMETER SWEEP - ranked by {args.metric}")
+    print("="*80)
+    print(table[columns].head(args.top).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("="*80 + "\n")
+    
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Full results saved to: {args.output}")
+
+
+def walkforward_command(args):
+    """Optimize a strategy on rolling train windows and trade it out of sample."""
+    config = Config()
+    grid = get_grid(args, config)
+    
+    walk_forward = WalkForward(args.strategy, grid, args.train, args.test, args.anchored, args.capital,
+                               config, jobs=args.jobs, source_name=args.source)
+    results = walk_forward.run(args.symbols, args.start, args.end, metric=args.metric)
+    
+    folds = results['folds'].copy()
+    for column in ('train_start', 'test_start', 'test_end'):
+        folds[column] = folds[column].map(lambda d: d.date())
+        
+    print("\n" + "="*80)
+    print(f"WALK-FORWARD FOLDS - optimized on {args.metric}")
+    print("="*80)
+    print(folds.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    
+    print("\n" + "="*80)
+    print("OUT-OF-SAMPLE RESULTS")
+    print("="*80)
+    for symbol, metrics in results['metrics'].items():
+        print(f"{symbol:<8} Return: {metrics['total_return']:7.2f}%  Sharpe: {metrics['sharpe_ratio']:5.2f}  "
+              f"Max DD: {metrics['max_drawdown']:7.2f}%  Trades: {metrics['total_trades']}")
+    print("="*80 + "\n")
+    
+    if args.output:
+        results['folds'].to_csv(args.output, index=False)
+        print(f"Fold results saved to: {args.output}")
+        
+    if args.plot:
+        output_file = f"walkforward_{args.strategy}.html"
+        Visualizer.plot_strategy_comparison([
+            {'strategy': f"{symbol} (out-of-sample)", 'equity_curve': curve}
+            for symbol, curve in results['equity_curves'].items()
+        ], output_file)
+        print(f"Out-of-sample equity curves saved to: {output_file}")
+
+
+def query_command(args):
+    """Rank stored backtest runs without recomputing them."""
+    store = ResultStore(args.store)
+    strategy_class = STRATEGY_CLASSES[args.strategy].__name__ if args.strategy else None
+    table = store.query(args.metric, strategy_class, args.symbol, args.top, args.ascending)
+    
+    if table.empty:
+        print(f"No stored runs match in {store.path}")
+        return
+        
+    columns = ['strategy', 'symbol', 'start_date', 'end_date', 'engine', 'risk_exits', 'total_return',
+               'sharpe_ratio', 'max_drawdown', 'win_rate', 'total_trades', 'final_value']
+    if args.metric not in columns:
+        columns.append(args.metric)
+        
+    shown = table[columns].copy()
+    shown['risk_exits'] = [str(RiskExits(**json.loads(exits))) if isinstance(exits, str) else '-'
+                           for exits in shown['risk_exits']]
+    
+    print("\n" + "="*80)
+    print(f"STORED RUNS - ranked by {args.metric} ({len(store)} runs in {store.path})")
+    print("="*80)
+    print(shown.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print("="*80 + "\n")
+    
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Ranked runs saved to: {args.output}")
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -164,11 +392,39 @@ Examples:
   # Run backtest on a single strategy
   python main.py backtest --strategy ma --symbol AAPL --start 2023-01-01 --end 2024-01-01
   
+  # Stream the cached daily history in 50,000-bar blocks instead of loading it at once
+  python main.py backtest --strategy rsi --symbol SPY --start 1995-01-01 --end 2024-01-01 --chunked
+  
+  # Exit intrabar on a 5% stop loss or an 8% trailing stop
+  python main.py backtest --strategy ma --symbol AAPL --start 2015-01-01 --end 2024-01-01 \\
+      --stop-loss 0.05 --trailing-stop 0.08
+  
   # Compare all strategies on multiple symbols
   python main.py compare --symbols AAPL MSFT GOOGL --start 2023-01-01 --end 2024-01-01
   
   # Generate detailed report
   python main.py report --strategy rsi --symbol TSLA --start 2023-01-01 --end 2024-01-01
+  
+  # Report with 95% Monte Carlo intervals from 10,000 bootstrapped paths
+  python main.py report --strategy ma --symbol AAPL --start 2014-01-01 --end 2024-01-01 --monte-carlo
+  
+  # Trade a universe of symbols from one shared portfolio
+  python main.py portfolio --strategy ma --symbols AAPL MSFT GOOGL --start 2023-01-01 --end 2024-01-01
+  
+  # Sweep moving average windows across 4 processes
+  python main.py sweep --strategy ma --symbols AAPL --start 2015-01-01 --end 2024-01-01 \\
+      --param short_window=5:50:5 --param long_window=50,100,150,200 --jobs 4
+  
+  # Rank every stored backtest run by Sharpe ratio without recomputing
+  python main.py query --metric sharpe_ratio --top 10
+  
+  # Walk-forward: optimize on 2 years, trade the next 6 months, repeat
+  python main.py walkforward --strategy ma --symbols AAPL --start 2010-01-01 --end 2024-01-01 \\
+      --param short_window=5:50:5 --param long_window=50,100,200 --train 504 --test 126
+  
+  # Time every stage of a report and save a trace for chrome://tracing
+  python main.py report --strategy ma --symbol AAPL --start 2014-01-01 --end 2024-01-01 \\
+      --profile-output report_trace.json
         """
     )
     
@@ -182,7 +438,20 @@ Examples:
     backtest_parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
     backtest_parser.add_argument('--end', required=True, help='End date (YYYY-MM-DD)')
     backtest_parser.add_argument('--capital', type=float, default=100000, help='Initial capital (default: 100000)')
+    backtest_parser.add_argument('--source', choices=list(SOURCES), default=Config.DATA_SOURCE,
+                                help='Market data source (default: %(default)s)')
+    backtest_parser.add_argument('--engine', choices=ENGINES, default=Config.BACKTEST_ENGINE,
+                                help='Backtest engine (default: %(default)s)')
     backtest_parser.add_argument('--plot', action='store_true', help='Generate visualization')
+    backtest_parser.add_argument('--store', default=Config.RESULT_STORE_PATH,
+                                help='Result store file (default: %(default)s)')
+    backtest_parser.add_argument('--no-store', action='store_true',
+                                help='Recompute instead of loading a stored identical run, and do not store it')
+    backtest_parser.add_argument('--chunked', action='store_true',
+                                help='Stream the bars from the data cache in blocks (flat memory; no result store)')
+    backtest_parser.add_argument('--block-bars', type=int, default=Config.CHUNK_BARS,
+                                help='Bars per block with --chunked (default: %(default)s)')
+    add_risk_exit_arguments(backtest_parser)
     
     # Compare command
     compare_parser = subparsers.add_parser('compare', help='Compare multiple strategies')
@@ -190,7 +459,16 @@ Examples:
     compare_parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
     compare_parser.add_argument('--end', required=True, help='End date (YYYY-MM-DD)')
     compare_parser.add_argument('--capital', type=float, default=100000, help='Initial capital (default: 100000)')
+    compare_parser.add_argument('--source', choices=list(SOURCES), default=Config.DATA_SOURCE,
+                               help='Market data source (default: %(default)s)')
+    compare_parser.add_argument('--engine', choices=ENGINES, default=Config.BACKTEST_ENGINE,
+                               help='Backtest engine (default: %(default)s)')
+    compare_parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
     compare_parser.add_argument('--plot', action='store_true', help='Generate comparison chart')
+    compare_parser.add_argument('--store', default=Config.RESULT_STORE_PATH,
+                               help='Result store file (default: %(default)s)')
+    compare_parser.add_argument('--no-store', action='store_true',
+                               help='Recompute instead of loading a stored identical run, and do not store it')
     
     # Report command
     report_parser = subparsers.add_parser('report', help='Generate detailed report')
@@ -200,17 +478,117 @@ Examples:
     report_parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
     report_parser.add_argument('--end', required=True, help='End date (YYYY-MM-DD)')
     report_parser.add_argument('--capital', type=float, default=100000, help='Initial capital (default: 100000)')
+    report_parser.add_argument('--source', choices=list(SOURCES), default=Config.DATA_SOURCE,
+                              help='Market data source (default: %(default)s)')
+    report_parser.add_argument('--engine', choices=ENGINES, default=Config.BACKTEST_ENGINE,
+                              help='Backtest engine (default: %(default)s)')
+    report_parser.add_argument('--monte-carlo', type=int, nargs='?', const=Config.MONTE_CARLO_SIMULATIONS,
+                              metavar='N', help='Add Monte Carlo confidence intervals from N resampled paths '
+                                                '(default N: %(const)s)')
+    report_parser.add_argument('--mc-method', choices=METHODS, default='returns',
+                              help='Resample block-bootstrapped daily returns or round-trip PnL (default: %(default)s)')
+    report_parser.add_argument('--seed', type=int, help='Random seed for Monte Carlo paths')
+    report_parser.add_argument('--store', default=Config.RESULT_STORE_PATH,
+                              help='Result store file (default: %(default)s)')
+    report_parser.add_argument('--no-store', action='store_true',
+                              help='Recompute instead of loading a stored identical run, and do not store it')
+    add_risk_exit_arguments(report_parser)
+    
+    # Portfolio command
+    portfolio_parser = subparsers.add_parser('portfolio', help='Backtest a universe of symbols with one portfolio')
+    portfolio_parser.add_argument('--strategy', required=True, choices=['ma', 'rsi', 'momentum'],
+                                 help='Trading strategy')
+    portfolio_parser.add_argument('--symbols', nargs='+', required=True, help='Stock symbols to trade')
+    portfolio_parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
+    portfolio_parser.add_argument('--end', required=True, help='End date (YYYY-MM-DD)')
+    portfolio_parser.add_argument('--capital', type=float, default=100000, help='Initial capital (default: 100000)')
+    portfolio_parser.add_argument('--allocation', type=float, default=0.1,
+                                 help='Fraction of portfolio value per buy (default: 0.1)')
+    portfolio_parser.add_argument('--source', choices=list(SOURCES), default=Config.DATA_SOURCE,
+                                 help='Market data source (default: %(default)s)')
+    portfolio_parser.add_argument('--plot', action='store_true', help='Generate equity curve chart')
+    add_risk_exit_arguments(portfolio_parser)
+    
+    # Sweep command
+    sweep_parser = subparsers.add_parser('sweep', help='Sweep a strategy over a parameter grid')
+    sweep_parser.add_argument('--strategy', required=True, choices=['ma', 'rsi', 'momentum'],
+                             help='Trading strategy')
+    sweep_parser.add_argument('--symbols', nargs='+', required=True, help='Stock symbols to test')
+    sweep_parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
+    sweep_parser.add_argument('--end', required=True, help='End date (YYYY-MM-DD)')
+    sweep_parser.add_argument('--param', action='append',
+                             help='Parameter values as name=v1,v2 or name=start:stop:step (repeatable)')
+    sweep_parser.add_argument('--capital', type=float, default=100000, help='Initial capital (default: 100000)')
+    sweep_parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    sweep_parser.add_argument('--metric', default='sharpe_ratio', help='Metric to rank by (default: sharpe_ratio)')
+    sweep_parser.add_argument('--top', type=int, default=20, help='Rows to print (default: 20)')
+    sweep_parser.add_argument('--output', help='Save the full ranked table as CSV')
+    sweep_parser.add_argument('--source', choices=list(SOURCES), default=Config.DATA_SOURCE,
+                             help='Market data source (default: %(default)s)')
+    
+    # Walk-forward command
+    walkforward_parser = subparsers.add_parser('walkforward',
+                                               help='Optimize on train windows and test out of sample')
+    walkforward_parser.add_argument('--strategy', required=True, choices=['ma', 'rsi', 'momentum'],
+                                   help='Trading strategy')
+    walkforward_parser.add_argument('--symbols', nargs='+', required=True, help='Stock symbols to test')
+    walkforward_parser.add_argument('--start', required=True, help='Start date (YYYY-MM-DD)')
+    walkforward_parser.add_argument('--end', required=True, help='End date (YYYY-MM-DD)')
+    walkforward_parser.add_argument('--param', action='append',
+                                   help='Parameter values as name=v1,v2 or name=start:stop:step (repeatable)')
+    walkforward_parser.add_argument('--train', type=int, default=252, help='Bars per train window (default: 252)')
+    walkforward_parser.add_argument('--test', type=int, default=63, help='Bars per test window (default: 63)')
+    walkforward_parser.add_argument('--anchored', action='store_true',
+                                   help='Grow train windows from the first bar instead of rolling them')
+    walkforward_parser.add_argument('--capital', type=float, default=100000, help='Initial capital (default: 100000)')
+    walkforward_parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    walkforward_parser.add_argument('--metric', default='sharpe_ratio', help='Metric to optimize (default: sharpe_ratio)')
+    walkforward_parser.add_argument('--output', help='Save the fold table as CSV')
+    walkforward_parser.add_argument('--source', choices=list(SOURCES), default=Config.DATA_SOURCE,
+                                   help='Market data source (default: %(default)s)')
+    walkforward_parser.add_argument('--plot', action='store_true', help='Generate out-of-sample equity chart')
+    
+    # Query command
+    query_parser = subparsers.add_parser('query', help='Rank stored backtest runs')
+    query_parser.add_argument('--metric', choices=RUN_METRICS, default='sharpe_ratio',
+                             help='Metric to rank by (default: %(default)s)')
+    query_parser.add_argument('--ascending', action='store_true', help='Rank lowest first')
+    query_parser.add_argument('--strategy', choices=['ma', 'rsi', 'momentum'], help='Only runs of this strategy')
+    query_parser.add_argument('--symbol', help='Only runs on this symbol')
+    query_parser.add_argument('--top', type=int, default=20, help='Rows to print (default: 20)')
+    query_parser.add_argument('--output', help='Save the ranked runs as CSV')
+    query_parser.add_argument('--store', default=Config.RESULT_STORE_PATH,
+                             help='Result store file (default: %(default)s)')
+    
+    for command_parser in subparsers.choices.values():
+        add_profile_arguments(command_parser)
     
     args = parser.parse_args()
     
+    profile = args.command is not None and (args.profile or args.profile_memory or args.profile_output)
+    if profile:
+        profiler.enable(memory=args.profile_memory,
+                        cprofile=bool(args.profile_output) and not args.profile_output.endswith('.json'))
+    
     if args.command == 'backtest':
         backtest_command(args)
     elif args.command == 'compare':
         compare_command(args)
     elif args.command == 'report':
         report_command(args)
+    elif args.command == 'portfolio':
+        portfolio_command(args)
+    elif args.command == 'sweep':
+        sweep_command(args)
+    elif args.command == 'walkforward':
+        walkforward_command(args)
+    elif args.command == 'query':
+        query_command(args)
     else:
         parser.print_help()
+        
+    if profile:
+        print_profile(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,206 @@
+"""
+Monte Carlo robustness analysis of backtest results.
+
+A backtest is one path through history. Resampling its daily returns in
+blocks (which keeps short-range autocorrelation and volatility clusters)
+or its round-trip PnL in random order gives thousands of alternative
+paths with the same return distribution, and the spread of their final
+value, drawdown and Sharpe ratio shows how much of the result is luck.
+
+Paths are simulated as (simulations x bars) NumPy arrays, a chunk of
+paths at a time so memory stays below Config.MONTE_CARLO_MAX_BYTES.
+"""
+from typing import Dict
+import numpy as np
+import pandas as pd
+from config import Config
+from profiling import profiled
+
+
+METHODS = ('returns', 'trades')
+PATH_METRICS = ('final_value', 'total_return', 'max_drawdown', 'sharpe_ratio')
+
+# Arrays of (chunk x bars) values alive at once while simulating a chunk
+# (bootstrap index, paths, returns, running peak)
+_ARRAYS_PER_PATH = 4
+
+
+def bootstrap_return_paths(returns: np.ndarray, n_paths: int, block_size: int,
+                           rng: np.random.Generator) -> np.ndarray:
+    """
+    Block-bootstrap a return series into new paths of the same length.
+    
+    Blocks of ``block_size`` consecutive returns start at random bars and
+    wrap around the end of the series.
+    
+    Args:
+        returns: 1D array of per-bar returns
+        n_paths: Number of paths
+        block_size: Returns per block (1 = plain bootstrap)
+        rng: NumPy random generator
+        
+    Returns:
+        (n_paths x len(returns)) array of returns
+    """
+    n_bars = len(returns)
+    block_size = max(1, min(block_size, n_bars))
+    n_blocks = -(-n_bars // block_size)
+    
+    starts = rng.integers(0, n_bars, size=(n_paths, n_blocks, 1))
+    index = starts + np.arange(block_size)
+    index %= n_bars
+    return returns[index.reshape(n_paths, -1)[:, :n_bars]]
+
+
+def resample_trade_paths(pnl: np.ndarray, n_paths: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Resample round-trip PnL with replacement into new trade sequences.
+    
+    Args:
+        pnl: 1D array of round-trip PnL
+        n_paths: Number of paths
+        rng: NumPy random generator
+        
+    Returns:
+        (n_paths x len(pnl)) array of PnL
+    """
+    return pnl[rng.integers(0, len(pnl), size=(n_paths, len(pnl)))]
+
+
+def path_statistics(values: np.ndarray, start_value: float, initial_capital: float, periods_per_year: float,
+                    returns: np.ndarray = None) -> Dict[str, np.ndarray]:
+    """
+    Calculate final value, total return, max drawdown and Sharpe of many paths.
+    
+    Args:
+        values: (paths x steps) array of portfolio values after each step
+        start_value: Value before the first step
+        initial_capital: Capital the total return is measured against
+        periods_per_year: Steps per year used to annualize the Sharpe ratio
+        returns: Step returns of the paths, if already known
+        
+    Returns:
+        Dictionary of metric -> array with one value per path (percentages
+        like PerformanceTracker)
+    """
+    n_paths, n_steps = values.shape
+    
+    if returns is None:
+        returns = np.empty_like(values)
+        np.divide(values[:, 1:], values[:, :-1], out=returns[:, 1:])
+        returns[:, 0] = values[:, 0] / start_value
+        returns -= 1
+        
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1) if n_steps > 1 else np.zeros(n_paths)
+    sharpe = np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * np.sqrt(periods_per_year)
+    
+    # Drawdown from the running peak, which starts at the start value
+    peak = np.maximum.accumulate(values, axis=1)
+    np.maximum(peak, start_value, out=peak)
+    np.divide(values, peak, out=peak)
+    max_drawdown = (np.min(peak, axis=1) - 1) * 100
+    
+    final_value = values[:, -1].copy()
+    return {
+        'final_value': final_value,
+        'total_return': (final_value / initial_capital - 1) * 100,
+        'max_drawdown': np.minimum(max_drawdown, 0.0),
+        'sharpe_ratio': sharpe
+    }
+
+
+@profiled('metrics')
+def monte_carlo(results: Dict, method: str = 'returns', n_simulations: int = None, block_size: int = 20,
+                confidence: float = 0.95, seed: int = None, max_bytes: int = None) -> Dict:
+    """
+    Run a Monte Carlo analysis of a backtest.
+    
+    Args:
+        results: Backtest results (needs 'equity_curve' and 'initial_capital';
+                 'round_trips' for the trades method)
+        method: 'returns' to block-bootstrap daily returns or 'trades' to
+                resample round-trip PnL
+        n_simulations: Number of paths (defaults to Config.MONTE_CARLO_SIMULATIONS)
+        block_size: Bars per bootstrap block (returns method)
+        confidence: Width of the confidence intervals (e.g. 0.95)
+        seed: Random seed for reproducible paths
+        max_bytes: Memory bound per chunk of paths (defaults to
+                   Config.MONTE_CARLO_MAX_BYTES)
+                   
+    Returns:
+        Dictionary with 'intervals' (DataFrame of observed, lower, median
+        and upper per metric), 'statistics' (metric -> array over paths),
+        'probability_of_loss' (% of paths ending below initial capital),
+        'method' and 'simulations'
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown Monte Carlo method: {method} (expected one of {', '.join(METHODS)})")
+        
+    n_simulations = n_simulations or Config.MONTE_CARLO_SIMULATIONS
+    max_bytes = max_bytes or Config.MONTE_CARLO_MAX_BYTES
+    initial_capital = results['initial_capital']
+    values = results['equity_curve']['value'].to_numpy(dtype=np.float64)
+    n_bars = len(values)
+    
+    if method == 'returns':
+        steps = values[1:] / values[:-1] - 1
+        start_value = values[0] if n_bars else initial_capital
+        periods_per_year = 252
+    else:
+        steps = np.asarray(results['round_trips']['pnl'], dtype=np.float64)
+        start_value = initial_capital
+        # Annualize trade-to-trade returns by the backtest's trade frequency
+        periods_per_year = len(steps) / (n_bars / 252) if n_bars else 0
+        
+    if len(steps) < 2:
+        raise ValueError(f"Need at least 2 {'bars' if method == 'returns' else 'round trips'} to resample")
+        
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, max_bytes // (len(steps) * 8 * _ARRAYS_PER_PATH))
+    statistics = {name: np.empty(n_simulations) for name in PATH_METRICS}
+    
+    def simulate(paths: np.ndarray) -> dict:
+        """Turn resampled steps into value paths in place and measure them."""
+        if method == 'returns':
+            returns = paths.copy()
+            paths += 1
+            np.cumprod(paths, axis=1, out=paths)
+            paths *= start_value
+            return path_statistics(paths, start_value, initial_capital, periods_per_year, returns)
+            
+        np.cumsum(paths, axis=1, out=paths)
+        paths += start_value
+        return path_statistics(paths, start_value, initial_capital, periods_per_year)
+        
+    for start in range(0, n_simulations, chunk_size):
+        n_paths = min(chunk_size, n_simulations - start)
+        if method == 'returns':
+            paths = bootstrap_return_paths(steps, n_paths, block_size, rng)
+        else:
+            paths = resample_trade_paths(steps, n_paths, rng)
+            
+        for name, column in simulate(paths).items():
+            statistics[name][start:start + n_paths] = column
+            
+    observed = simulate(steps[np.newaxis, :].copy())
+    tail = (1 - confidence) / 2 * 100
+    
+    intervals = pd.DataFrame(
+        {
+            'observed': [observed[name][0] for name in PATH_METRICS],
+            **{
+                label: [np.percentile(statistics[name], q) for name in PATH_METRICS]
+                for label, q in (('lower', tail), ('median', 50), ('upper', 100 - tail))
+            }
+        },
+        index=pd.Index(PATH_METRICS, name='metric')
+    )
+    
+    return {
+        'method': method,
+        'simulations': n_simulations,
+        'intervals': intervals,
+        'statistics': statistics,
+        'probability_of_loss': np.mean(statistics['final_value'] < initial_capital) * 100
+    }
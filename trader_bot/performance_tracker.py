@@ -4,21 +4,33 @@ Performance tracking and metrics calculation.
 import pandas as pd
 import numpy as np
 from typing import Dict, List
+from profiling import profiled
+from round_trips import match_round_trips, round_trip_stats
+
+
+# Default rolling windows (about a quarter and a year of daily bars)
+ROLLING_WINDOWS = (63, 252)
+ROLLING_METRICS = ('return', 'volatility', 'sharpe_ratio', 'sortino_ratio', 'drawdown')
 
 
 class PerformanceTracker:
     """Tracks and calculates trading performance metrics."""
     
     @staticmethod
+    @profiled('metrics')
     def calculate_metrics(equity_curve: pd.DataFrame, trade_history: List[Dict], 
-                         initial_capital: float) -> Dict:
+                         initial_capital: float, round_trips: pd.DataFrame = None) -> Dict:
         """
         Calculate comprehensive performance metrics.
         
+        Trade statistics come from FIFO round trips (see round_trips.py).
+        
         Args:
             equity_curve: DataFrame with portfolio values over time
             trade_history: List of trade dictionaries
             initial_capital: Starting capital
+            round_trips: Round trips already matched from trade_history
+                         (e.g. a backtest's 'round_trips'; matched here if None)
             
         Returns:
             Dictionary of performance metrics
@@ -60,40 +72,10 @@ class PerformanceTracker:
         # Calmar ratio (return / max drawdown)
         calmar_ratio = abs(annualized_return / max_drawdown) if max_drawdown != 0 else 0
         
-        # Trade statistics
-        buy_trades = [t for t in trade_history if t['action'] == 'BUY']
-        sell_trades = [t for t in trade_history if t['action'] == 'SELL']
-        
-        total_trades = min(len(buy_trades), len(sell_trades))
-        
-        if total_trades > 0:
-            # Calculate profit/loss for each trade
-            trade_pnl = []
-            winning_trades = 0
-            losing_trades = 0
-            
-            for i in range(total_trades):
-                buy_cost = buy_trades[i]['price'] * buy_trades[i]['shares'] + buy_trades[i]['commission']
-                sell_proceeds = sell_trades[i]['price'] * sell_trades[i]['shares'] - sell_trades[i]['commission']
-                pnl = sell_proceeds - buy_cost
-                trade_pnl.append(pnl)
-                
-                if pnl > 0:
-                    winning_trades += 1
-                else:
-                    losing_trades += 1
-            
-            win_rate = (winning_trades / total_trades) * 100
-            avg_win = np.mean([p for p in trade_pnl if p > 0]) if winning_trades > 0 else 0
-            avg_loss = np.mean([p for p in trade_pnl if p < 0]) if losing_trades > 0 else 0
-            profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else 0
-        else:
-            win_rate = 0
-            avg_win = 0
-            avg_loss = 0
-            profit_factor = 0
-            winning_trades = 0
-            losing_trades = 0
+        # Trade statistics from FIFO round trips
+        if round_trips is None:
+            round_trips = match_round_trips(trade_history)
+        trade_stats = round_trip_stats(round_trips)
         
         return {
             'total_return': total_return,
@@ -103,16 +85,89 @@ class PerformanceTracker:
             'sortino_ratio': sortino_ratio,
             'max_drawdown': max_drawdown,
             'calmar_ratio': calmar_ratio,
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
-            'win_rate': win_rate,
-            'avg_win': avg_win,
-            'avg_loss': avg_loss,
-            'profit_factor': profit_factor,
+            'total_trades': trade_stats['total_trades'],
+            'winning_trades': trade_stats['winning_trades'],
+            'losing_trades': trade_stats['losing_trades'],
+            'win_rate': trade_stats['win_rate'],
+            'avg_win': trade_stats['avg_win'],
+            'avg_loss': trade_stats['avg_loss'],
+            'profit_factor': trade_stats['profit_factor'],
+            'avg_holding_days': trade_stats['avg_holding_days'],
+            'avg_mae': trade_stats['avg_mae'],
+            'avg_mfe': trade_stats['avg_mfe'],
             'final_value': final_value
         }
     
+    @staticmethod
+    def rolling_metrics(equity_curve: pd.DataFrame, windows: List[int] = ROLLING_WINDOWS,
+                        periods_per_year: int = 252) -> pd.DataFrame:
+        """
+        Calculate rolling performance metrics for one or several windows.
+        
+        Every window is read from the same prefix sums of returns, squared
+        returns and downside returns, so the cost is O(n) per window
+        instead of O(n * window) for recomputing each window. Sharpe,
+        Sortino and volatility follow calculate_metrics over the trailing
+        ``window`` returns; drawdown is measured from the highest value of
+        the trailing window.
+        
+        Args:
+            equity_curve: DataFrame with portfolio values over time
+            windows: Window lengths in bars
+            periods_per_year: Bars per year used to annualize
+            
+        Returns:
+            DataFrame indexed by date with (metric, window) MultiIndex
+            columns for 'return', 'volatility', 'sharpe_ratio',
+            'sortino_ratio' and 'drawdown' (NaN until a window is full)
+        """
+        values = equity_curve['value'].to_numpy(dtype=np.float64)
+        n_bars = len(values)
+        windows = sorted(set(windows))
+        
+        returns = np.zeros(n_bars)
+        returns[1:] = values[1:] / values[:-1] - 1
+        downside = np.minimum(returns, 0.0)
+        
+        def prefix(x):
+            return np.concatenate(([0], np.cumsum(x)))
+            
+        sums, squares = prefix(returns), prefix(returns * returns)
+        down_sums, down_squares, down_counts = prefix(downside), prefix(downside * downside), prefix(returns < 0)
+        annualize = np.sqrt(periods_per_year)
+        
+        columns = {}
+        for window in windows:
+            metrics = {name: np.full(n_bars, np.nan) for name in ROLLING_METRICS}
+            if 1 < window < n_bars:
+                # Returns of bars t - window + 1 .. t, for t = window .. n_bars - 1
+                end, start = slice(window + 1, None), slice(1, n_bars - window + 1)
+                
+                total = sums[end] - sums[start]
+                mean = total / window
+                std = np.sqrt(np.maximum(squares[end] - squares[start] - total * mean, 0.0) / (window - 1))
+                
+                count = down_counts[end] - down_counts[start]
+                down_total = down_sums[end] - down_sums[start]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    down_var = (down_squares[end] - down_squares[start] - down_total * down_total / count) / (count - 1)
+                down_std = np.sqrt(np.where(count > 1, np.maximum(down_var, 0.0), 0.0))
+                
+                peak = pd.Series(values).rolling(window + 1).max().to_numpy()[window:]
+                
+                metrics['return'][window:] = (values[window:] / values[:-window] - 1) * 100
+                metrics['volatility'][window:] = std * annualize * 100
+                metrics['sharpe_ratio'][window:] = np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * annualize
+                metrics['sortino_ratio'][window:] = np.divide(mean, down_std, out=np.zeros_like(mean),
+                                                              where=down_std > 0) * annualize
+                metrics['drawdown'][window:] = (values[window:] / peak - 1) * 100
+                
+            for name, series in metrics.items():
+                columns[(name, window)] = series
+                
+        rolling = pd.DataFrame(columns, index=pd.Index(equity_curve['date'], name='date'))
+        return rolling.sort_index(axis=1, level=0, sort_remaining=False)[list(ROLLING_METRICS)]
+        
     @staticmethod
     def compare_strategies(results_list: List[Dict]) -> pd.DataFrame:
         """
@@ -1,8 +1,35 @@
 """
 Portfolio manager for tracking positions and performance.
 """
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+import numpy as np
+import pandas as pd
+from ledger import ArrayLedger, DateCodec
+
+
+BUY = 1
+SELL = -1
+ACTIONS = {BUY: 'BUY', SELL: 'SELL'}
+
+TRADE_COLUMNS = {
+    'date': np.int64,
+    'symbol': np.int32,
+    'action': np.int8,
+    'shares': np.int64,
+    'price': np.float64,
+    'commission': np.float64,
+    'total': np.float64
+}
+EQUITY_COLUMNS = {
+    'date': np.int64,
+    'value': np.float64,
+    'cash': np.float64,
+    'positions_value': np.float64
+}
+
+# Initial number of symbols the position arrays hold
+POSITION_CAPACITY = 16
 
 
 class Portfolio:
@@ -17,29 +44,217 @@ class Portfolio:
         """
         self.initial_capital = initial_capital
         self.cash = initial_capital
-        self.positions: Dict[str, dict] = {}  # symbol -> {shares, avg_price, value}
-        self.trade_history = []
-        self.equity_curve = []
         
+        # Trades and equity are kept in columnar ledgers; dates are int64
+        # nanoseconds and symbols are interned ids
+        self.trade_ledger = ArrayLedger(TRADE_COLUMNS)
+        self.equity_ledger = ArrayLedger(EQUITY_COLUMNS)
+        self._dates = DateCodec()
+        self._symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        
+        # Positions are arrays indexed by symbol id. The market value of
+        # every holding is summed into a running total that is adjusted
+        # when a price or position changes, so valuing the book does not
+        # walk all positions.
+        self._shares = np.zeros(POSITION_CAPACITY, dtype=np.int64)
+        self._avg_prices = np.zeros(POSITION_CAPACITY)
+        self._market_values = np.zeros(POSITION_CAPACITY)
+        self._open_positions = 0
+        self._positions_value = 0.0
+        
+    def _symbol_id(self, symbol: str) -> int:
+        """Intern a symbol name."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            if symbol_id == len(self._shares):
+                self._grow_positions()
+        return symbol_id
+        
+    def _grow_positions(self):
+        """Double the capacity of the position arrays."""
+        capacity = 2 * len(self._shares)
+        for name in ('_shares', '_avg_prices', '_market_values'):
+            grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            grown[:capacity // 2] = getattr(self, name)
+            setattr(self, name, grown)
+            
+    def _mark(self, symbol_id: int, shares: int, price: float):
+        """Value a holding at ``price`` and adjust the running total."""
+        market_value = shares * price
+        # Subtract before adding so a single holding is valued exactly
+        self._positions_value = (self._positions_value - self._market_values[symbol_id].item()) + market_value
+        self._market_values[symbol_id] = market_value
+        
+    @property
+    def positions(self) -> Dict[str, dict]:
+        """Open positions as symbol -> {shares, avg_price, value} (built from the arrays)."""
+        held = np.flatnonzero(self._shares[:len(self._symbols)])
+        return {
+            self._symbols[symbol_id]: {
+                'shares': shares,
+                'avg_price': avg_price,
+                'value': value
+            }
+            for symbol_id, shares, avg_price, value in zip(
+                held.tolist(), self._shares[held].tolist(), self._avg_prices[held].tolist(),
+                self._market_values[held].tolist()
+            )
+        }
+        
+    @property
+    def positions_value(self) -> float:
+        """Market value of all positions at their latest prices."""
+        return self._positions_value
+        
+    @property
+    def trade_history(self) -> List[dict]:
+        """Executed trades as a list of dictionaries (built from the ledger)."""
+        columns = self.trade_ledger.columns()
+        dates = self._dates.decode(columns['date']).tolist()
+        
+        return [
+            {
+                'date': date,
+                'symbol': self._symbols[symbol],
+                'action': ACTIONS[action],
+                'shares': shares,
+                'price': price,
+                'commission': commission,
+                'total': total
+            }
+            for date, symbol, action, shares, price, commission, total in zip(
+                dates, columns['symbol'].tolist(), columns['action'].tolist(), columns['shares'].tolist(),
+                columns['price'].tolist(), columns['commission'].tolist(), columns['total'].tolist()
+            )
+        ]
+        
+    @trade_history.setter
+    def trade_history(self, trades: List[dict]):
+        """Replace the trade history with a list of trade dictionaries."""
+        self.trade_ledger.clear()
+        for t in trades:
+            self._record_trade(t['date'], t['symbol'], t['action'], t['shares'], t['price'],
+                               t['commission'], t['total'])
+            
+    @property
+    def equity_curve(self) -> List[dict]:
+        """Recorded equity as a list of dictionaries (built from the ledger)."""
+        return self.equity_frame().to_dict('records')
+        
+    def trade_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Get the trade history as a dictionary of columns.
+        
+        Numeric columns are views of the ledger, action holds 1 (BUY) or
+        -1 (SELL) and symbol is a categorical over the interned codes.
+        """
+        columns = self.trade_ledger.columns()
+        return {
+            **columns,
+            'date': self._dates.decode(columns['date']),
+            'symbol': pd.Categorical.from_codes(columns['symbol'], categories=self._symbols)
+        }
+        
+    def trades_frame(self) -> pd.DataFrame:
+        """
+        Get the trade history as a DataFrame.
+        
+        Numeric columns are views of the ledger; symbol and action are
+        categoricals over the interned codes.
+        """
+        columns = self.trade_columns()
+        columns['action'] = pd.Categorical.from_codes((columns['action'] == BUY).view(np.int8),
+                                                      categories=[ACTIONS[SELL], ACTIONS[BUY]])
+        return pd.DataFrame(columns, copy=False)
+        
+    def equity_frame(self) -> pd.DataFrame:
+        """
+        Get the equity curve as a DataFrame.
+        
+        The value, cash and positions_value columns are views of the ledger.
+        """
+        columns = self.equity_ledger.columns()
+        return pd.DataFrame({
+            'date': self._dates.decode(columns['date']),
+            'value': columns['value'],
+            'cash': columns['cash'],
+            'positions_value': columns['positions_value']
+        }, copy=False)
+        
+    def reserve(self, bars: int):
+        """Preallocate equity records for a run of ``bars`` bars."""
+        self.equity_ledger.reserve(bars)
+        
+    def _record_trade(self, date, symbol: str, action, shares: int, price: float,
+                      commission: float, total: float):
+        """Append one trade to the ledger."""
+        if isinstance(action, str):
+            action = BUY if action == 'BUY' else SELL
+        self.trade_ledger.append(self._dates.encode(date), self._symbol_id(symbol), action,
+                                 shares, price, commission, total)
+        
+    def record_trades(self, dates, symbols: list, actions: np.ndarray, shares: np.ndarray,
+                      prices: np.ndarray, commissions: np.ndarray, totals: np.ndarray):
+        """
+        Append many executed trades at once.
+        
+        Used by the array engines, which fill orders outside the portfolio.
+        
+        Args:
+            dates: Trade dates
+            symbols: Symbol of each trade
+            actions: 1 (BUY) or -1 (SELL) per trade
+            shares: Shares per trade
+            prices: Execution price per trade
+            commissions: Commission per trade
+            totals: Cash paid (buys) or received (sells) per trade
+        """
+        self.trade_ledger.extend(
+            self._dates.encode_many(dates),
+            np.fromiter((self._symbol_id(symbol) for symbol in symbols), dtype=np.int32, count=len(symbols)),
+            actions, shares, prices, commissions, totals
+        )
+        
+    def update_price(self, symbol: str, price: float):
+        """
+        Mark a holding at a new price in constant time.
+        
+        Args:
+            symbol: Stock symbol (ignored if not held)
+            price: Current price
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is not None:
+            shares = self._shares[symbol_id].item()
+            if shares:
+                self._mark(symbol_id, shares, price)
+                
     def get_portfolio_value(self, current_prices: Dict[str, float]) -> float:
         """
         Calculate total portfolio value.
         
+        Holdings in ``current_prices`` are marked at their new price; the
+        others keep their latest price (the fill price until priced). The
+        cost is proportional to ``current_prices``, not to the number of
+        positions.
+        
         Args:
             current_prices: Dictionary of symbol -> current price
             
         Returns:
             Total portfolio value (cash + positions)
         """
-        positions_value = sum(
-            pos['shares'] * current_prices.get(symbol, pos['avg_price'])
-            for symbol, pos in self.positions.items()
-        )
-        return self.cash + positions_value
+        for symbol, price in current_prices.items():
+            self.update_price(symbol, price)
+        return self.cash + self._positions_value
     
     def get_position_size(self, symbol: str) -> int:
         """Get number of shares held for a symbol."""
-        return self.positions.get(symbol, {}).get('shares', 0)
+        symbol_id = self._symbol_ids.get(symbol)
+        return 0 if symbol_id is None else self._shares[symbol_id].item()
     
     def can_buy(self, symbol: str, price: float, shares: int, max_position_pct: float) -> bool:
         """
@@ -62,7 +277,7 @@ class Portfolio:
         
         # Check position size limit
         current_value = self.get_portfolio_value({symbol: price})
-        position_value = self.positions.get(symbol, {}).get('shares', 0) * price + cost
+        position_value = self.get_position_size(symbol) * price + cost
         
         if position_value > current_value * max_position_pct:
             return False
@@ -88,34 +303,22 @@ class Portfolio:
         self.cash -= cost
         
         # Update position
-        if symbol in self.positions:
-            current_shares = self.positions[symbol]['shares']
-            current_value = current_shares * self.positions[symbol]['avg_price']
+        symbol_id = self._symbol_id(symbol)
+        current_shares = self._shares[symbol_id].item()
+        if current_shares:
+            current_value = current_shares * self._avg_prices[symbol_id].item()
             new_shares = current_shares + shares
-            new_avg_price = (current_value + price * shares) / new_shares
-            
-            self.positions[symbol] = {
-                'shares': new_shares,
-                'avg_price': new_avg_price,
-                'value': new_shares * price
-            }
+            self._avg_prices[symbol_id] = (current_value + price * shares) / new_shares
         else:
-            self.positions[symbol] = {
-                'shares': shares,
-                'avg_price': price,
-                'value': shares * price
-            }
+            new_shares = shares
+            self._avg_prices[symbol_id] = price
+            self._open_positions += 1
+            
+        self._shares[symbol_id] = new_shares
+        self._mark(symbol_id, new_shares, price)
         
         # Record trade
-        self.trade_history.append({
-            'date': date,
-            'symbol': symbol,
-            'action': 'BUY',
-            'shares': shares,
-            'price': price,
-            'commission': commission,
-            'total': cost
-        })
+        self._record_trade(date, symbol, BUY, shares, price, commission, cost)
     
     def sell(self, symbol: str, price: float, shares: int, date: datetime, commission: float = 0):
         """
@@ -128,10 +331,10 @@ class Portfolio:
             date: Transaction date
             commission: Commission fee
         """
-        if symbol not in self.positions:
+        current_shares = self.get_position_size(symbol)
+        if not current_shares:
             raise ValueError(f"No position in {symbol}")
         
-        current_shares = self.positions[symbol]['shares']
         if shares > current_shares:
             raise ValueError(f"Cannot sell {shares} shares, only have {current_shares}")
         
@@ -139,41 +342,32 @@ class Portfolio:
         self.cash += proceeds
         
         # Update position
+        symbol_id = self._symbol_ids[symbol]
         remaining_shares = current_shares - shares
+        self._shares[symbol_id] = remaining_shares
+        self._mark(symbol_id, remaining_shares, price)
         if remaining_shares == 0:
-            del self.positions[symbol]
-        else:
-            self.positions[symbol]['shares'] = remaining_shares
-            self.positions[symbol]['value'] = remaining_shares * price
+            self._avg_prices[symbol_id] = 0.0
+            self._open_positions -= 1
+            if not self._open_positions:
+                # Drop rounding left over from adding and removing holdings
+                self._positions_value = 0.0
         
         # Record trade
-        self.trade_history.append({
-            'date': date,
-            'symbol': symbol,
-            'action': 'SELL',
-            'shares': shares,
-            'price': price,
-            'commission': commission,
-            'total': proceeds
-        })
+        self._record_trade(date, symbol, SELL, shares, price, commission, proceeds)
     
     def record_equity(self, date: datetime, current_prices: Dict[str, float]):
         """Record portfolio value at a point in time."""
         value = self.get_portfolio_value(current_prices)
-        self.equity_curve.append({
-            'date': date,
-            'value': value,
-            'cash': self.cash,
-            'positions_value': value - self.cash
-        })
+        self.equity_ledger.append(self._dates.encode(date), value, self.cash, value - self.cash)
     
     def get_returns(self) -> float:
         """Calculate total return percentage."""
-        if not self.equity_curve:
+        if not len(self.equity_ledger):
             return 0.0
-        final_value = self.equity_curve[-1]['value']
+        final_value = self.equity_ledger.column('value')[-1]
         return ((final_value - self.initial_capital) / self.initial_capital) * 100
     
     def get_trade_count(self) -> int:
         """Get total number of trades executed."""
-        return len(self.trade_history)
+        return len(self.trade_ledger)
@@ -0,0 +1,393 @@
+"""
+Portfolio backtesting engine trading many symbols from one capital pool.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+from portfolio import Portfolio
+from strategies.base_strategy import BaseStrategy
+from data_fetcher import DataFetcher
+from config import Config
+from profiling import profiled, profiler
+from round_trips import match_round_trips, round_trip_stats
+from risk_exits import REASONS, RiskExits, price_arrays
+
+
+def build_panel(data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Align per-symbol OHLCV frames into one panel.
+    
+    Dates are the union of all symbols' dates (compared as instants, so
+    frames in different timezones line up). Gaps after a symbol's first
+    bar are forward-filled; dates before it stay NaN.
+    
+    Args:
+        data: Dictionary of symbol -> DataFrame with OHLCV data
+        
+    Returns:
+        DataFrame indexed by date with (field, symbol) MultiIndex columns
+    """
+    frames = {}
+    for symbol, frame in data.items():
+        frame = frame[['Open', 'High', 'Low', 'Close', 'Volume']]
+        if frame.index.tz is not None:
+            frame = frame.tz_convert('UTC')
+        frames[symbol] = frame
+        
+    panel = pd.concat(frames, axis=1, join='outer').sort_index().ffill()
+    return panel.swaplevel(axis=1)[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def simulate_panel_signals(signals: np.ndarray, close: np.ndarray, initial_capital: float,
+                           config: Config = None, allocation_pct: float = 0.1,
+                           risk_exits: RiskExits = None, bars: tuple = None) -> dict:
+    """
+    Simulate trading a universe of symbols from one cash balance.
+    
+    On each bar sells are filled before buys so freed cash can be reused.
+    Buys are sized at allocation_pct of the total portfolio value and
+    rejected if they would exceed cash or push the holding above
+    MAX_POSITION_SIZE of the portfolio. Only bars with signals are visited;
+    cash and holdings are expanded to every bar with array operations.
+    With risk exits, every open position is scanned for its first stop or
+    target hit up to each signal bar before the bar is filled. Open
+    positions are closed at the last bar.
+    
+    Args:
+        signals: (dates x symbols) array of signals: 1 (buy), -1 (sell), 0 (hold)
+        close: (dates x symbols) array of close prices (NaN before listing)
+        initial_capital: Starting cash balance
+        config: Configuration object (slippage, commission, position limit)
+        allocation_pct: Fraction of portfolio value allocated per buy
+        risk_exits: Stop-loss, take-profit and trailing-stop rules
+        bars: Tuple of (dates x symbols) open, high and low arrays to check
+              risk exits against (see risk_exits.price_arrays)
+        
+    Returns:
+        Dictionary with per-bar 'cash', 'value' and 'positions_value'
+        arrays, trade arrays ('trade_bar', 'trade_symbol', 'trade_action',
+        'trade_shares', 'trade_price', 'trade_commission', 'trade_total'),
+        'final_cash' and 'exit_reasons' mapping the index of every risk
+        exit trade to its reason
+    """
+    config = config or Config()
+    n_bars, n_symbols = close.shape
+    
+    buy_slippage = 1 + config.SLIPPAGE_RATE
+    sell_slippage = 1 - config.SLIPPAGE_RATE
+    commission_rate = config.COMMISSION_RATE
+    max_position = config.MAX_POSITION_SIZE
+    
+    cash = initial_capital
+    held = {}  # column -> shares
+    cash_bars = [0]
+    cash_values = [cash]
+    trades = []
+    
+    def sell(bar, column, price):
+        nonlocal cash
+        shares = held.pop(column)
+        basis.pop(column, None)
+        peaks.pop(column, None)
+        execution_price = price * sell_slippage
+        commission = execution_price * shares * commission_rate
+        total = execution_price * shares - commission
+        cash += total
+        trades.append((bar, column, -1, shares, execution_price, commission, total))
+        
+    def record_cash(bar):
+        if cash_bars[-1] == bar:
+            cash_values[-1] = cash
+        else:
+            cash_bars.append(bar)
+            cash_values.append(cash)
+            
+    # Risk exit state per held column: average fill price and highest
+    # price since entry; every holding is checked up to scan_from
+    basis = {}
+    peaks = {}
+    exit_reasons = {}
+    scan_from = 0
+    if risk_exits:
+        open_, high, low = bars
+        
+    def check_exits(stop):
+        hits = []
+        for column in sorted(held):
+            exit_bar, fill_price, reason, peaks[column] = risk_exits.scan(
+                open_[:, column], high[:, column], low[:, column], scan_from, stop, basis[column], peaks[column]
+            )
+            if exit_bar >= 0:
+                hits.append((exit_bar, column, fill_price, reason))
+                
+        for exit_bar, column, fill_price, reason in sorted(hits):
+            sell(exit_bar, column, fill_price)
+            exit_reasons[len(trades) - 1] = reason
+            record_cash(exit_bar)
+            
+    for bar in np.flatnonzero(np.any(signals != 0, axis=1)).tolist():
+        row = signals[bar]
+        prices = close[bar]
+        
+        if risk_exits and held:
+            check_exits(bar + 1)
+        scan_from = bar + 1
+        
+        for column in np.flatnonzero(row == -1).tolist():
+            if column in held:
+                sell(bar, column, prices[column].item())
+                
+        buys = np.flatnonzero(row == 1).tolist()
+        if buys:
+            held_value = sum(shares * prices[column].item() for column, shares in held.items())
+            
+        for column in buys:
+            price = prices[column].item()
+            shares = held.get(column, 0)
+            
+            # Size against the whole portfolio, marked at current closes
+            portfolio_value = cash + held_value
+            execution_price = price * buy_slippage
+            order_shares = max(1, int(portfolio_value * allocation_pct /
+                                      (execution_price * (1 + commission_rate))))
+            
+            cost = execution_price * order_shares
+            commission = cost * commission_rate
+            total = cost + commission
+            if total > cash:
+                continue
+                
+            # Enforce the position limit across all holdings
+            position_value = (shares + order_shares) * execution_price
+            if position_value > (portfolio_value + shares * (execution_price - price)) * max_position:
+                continue
+                
+            cash -= total
+            if shares:
+                basis[column] = (shares * basis[column] + execution_price * order_shares) / (shares + order_shares)
+            else:
+                basis[column], peaks[column] = execution_price, price
+            held[column] = shares + order_shares
+            held_value += order_shares * price
+            trades.append((bar, column, 1, order_shares, execution_price, commission, total))
+            
+        record_cash(bar)
+        
+    if risk_exits and held:
+        check_exits(n_bars)
+        
+    # Expand cash and holdings to every bar
+    steps = np.searchsorted(np.asarray(cash_bars), np.arange(n_bars), side='right') - 1
+    cash_curve = np.asarray(cash_values)[steps]
+    
+    trade_arrays = _trade_arrays(trades)
+    holdings = np.zeros((n_bars, n_symbols), dtype=np.int64)
+    np.add.at(holdings, (trade_arrays['trade_bar'], trade_arrays['trade_symbol']),
+              trade_arrays['trade_shares'] * trade_arrays['trade_action'])
+    holdings = np.cumsum(holdings, axis=0)
+    positions_value = np.where(holdings != 0, holdings * np.nan_to_num(close), 0.0).sum(axis=1)
+    
+    # Close any open positions at the end
+    last_prices = close[-1]
+    for column in sorted(held):
+        sell(n_bars - 1, column, last_prices[column].item())
+        
+    return {
+        'cash': cash_curve,
+        'value': cash_curve + positions_value,
+        'positions_value': positions_value,
+        **_trade_arrays(trades),
+        'final_cash': cash,
+        'exit_reasons': exit_reasons
+    }
+
+
+def _trade_arrays(trades: list) -> dict:
+    """Convert (bar, symbol, action, shares, price, commission, total) tuples to arrays."""
+    columns = list(zip(*trades)) if trades else [()] * 7
+    return {
+        'trade_bar': np.asarray(columns[0], dtype=np.int64),
+        'trade_symbol': np.asarray(columns[1], dtype=np.int64),
+        'trade_action': np.asarray(columns[2], dtype=np.int8),
+        'trade_shares': np.asarray(columns[3], dtype=np.int64),
+        'trade_price': np.asarray(columns[4], dtype=np.float64),
+        'trade_commission': np.asarray(columns[5], dtype=np.float64),
+        'trade_total': np.asarray(columns[6], dtype=np.float64)
+    }
+
+
+class PortfolioBacktester:
+    """Backtests a strategy on a universe of symbols sharing one portfolio."""
+    
+    def __init__(self, strategy: BaseStrategy, initial_capital: float = 100000, config: Config = None,
+                 allocation_pct: float = 0.1, risk_exits: RiskExits = None):
+        """
+        Initialize portfolio backtester.
+        
+        Args:
+            strategy: Trading strategy to test
+            initial_capital: Starting capital
+            config: Configuration object
+            allocation_pct: Fraction of portfolio value allocated per buy
+            risk_exits: Intrabar stop-loss, take-profit and trailing-stop rules
+        """
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.config = config or Config()
+        self.allocation_pct = allocation_pct
+        self.risk_exits = risk_exits if risk_exits else None
+        self.results = None
+        
+    def run(self, symbols: List[str], start_date: str, end_date: str,
+            data_fetcher: DataFetcher = None) -> Dict:
+        """
+        Run backtest on a universe of symbols.
+        
+        Args:
+            symbols: Stock symbols to trade
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            data_fetcher: DataFetcher instance (creates new one if None)
+            
+        Returns:
+            Dictionary with backtest results
+        """
+        if data_fetcher is None:
+            data_fetcher = DataFetcher(self.config.DATA_CACHE_DIR)
+            
+        print(f"\n{'='*60}")
+        print(f"Running portfolio backtest: {self.strategy}")
+        print(f"Symbols: {len(symbols)}")
+        print(f"Period: {start_date} to {end_date}")
+        print(f"Initial Capital: ${self.initial_capital:,.2f}")
+        if self.risk_exits:
+            print(f"Risk Exits: {self.risk_exits}")
+        print(f"{'='*60}\n")
+        
+        data = data_fetcher.get_multiple_symbols(symbols, start_date, end_date)
+        if not data:
+            raise ValueError("No data found for any symbol")
+            
+        panel = build_panel(data)
+        return self.run_panel(panel)
+        
+    def run_panel(self, panel: pd.DataFrame) -> Dict:
+        """
+        Run backtest on an aligned panel (see build_panel).
+        
+        Args:
+            panel: Aligned OHLCV panel with (field, symbol) MultiIndex columns
+            
+        Returns:
+            Dictionary with backtest results
+        """
+        close_frame = panel['Close']
+        symbols = list(close_frame.columns)
+        close = close_frame.to_numpy(dtype=np.float64)
+        
+        with profiler.stage('signals'):
+            signals = self.strategy.generate_panel_signals(panel)
+            
+        with profiler.stage('execution'):
+            sim = simulate_panel_signals(
+                signals, close, self.initial_capital, self.config, self.allocation_pct,
+                risk_exits=self.risk_exits, bars=price_arrays(panel) if self.risk_exits else None
+            )
+            
+            dates = panel.index
+            
+            portfolio = Portfolio(self.initial_capital)
+            portfolio.cash = sim['final_cash']
+            portfolio.record_trades(
+                dates[sim['trade_bar']], [symbols[column] for column in sim['trade_symbol'].tolist()],
+                sim['trade_action'], sim['trade_shares'], sim['trade_price'],
+                sim['trade_commission'], sim['trade_total']
+            )
+            
+            equity_curve = pd.DataFrame({
+                'date': dates,
+                'value': sim['value'],
+                'cash': sim['cash'],
+                'positions_value': sim['positions_value']
+            })
+        
+        self.results = self._calculate_results(portfolio, equity_curve, close, symbols, panel)
+        if self.risk_exits:
+            reasons = list(sim['exit_reasons'].values())
+            self.results['risk_exits'] = {reason: reasons.count(reason) for reason in REASONS
+                                          if reason in self.risk_exits.get_parameters()}
+        return self.results
+        
+    @profiled('metrics')
+    def _calculate_results(self, portfolio: Portfolio, equity_curve: pd.DataFrame,
+                           close: np.ndarray, symbols: List[str], panel: pd.DataFrame) -> Dict:
+        """Calculate portfolio backtest performance metrics."""
+        final_value = equity_curve['value'].iloc[-1]
+        total_return = ((final_value - self.initial_capital) / self.initial_capital) * 100
+        
+        equity_curve['returns'] = equity_curve['value'].pct_change()
+        
+        # Sharpe ratio (annualized, assuming 252 trading days)
+        mean_return = equity_curve['returns'].mean()
+        std_return = equity_curve['returns'].std()
+        sharpe_ratio = (mean_return / std_return) * (252 ** 0.5) if std_return > 0 else 0
+        
+        # Maximum drawdown
+        cumulative = (1 + equity_curve['returns']).cumprod()
+        running_max = cumulative.cummax()
+        drawdown = (cumulative - running_max) / running_max
+        max_drawdown = drawdown.min() * 100
+        
+        # Win rate from FIFO round trips per symbol
+        trades = portfolio.trade_columns()
+        prices = {symbol: panel.xs(symbol, axis=1, level=1) for symbol in trades['symbol'].unique()}
+        round_trips = match_round_trips(trades, prices)
+        trade_stats = round_trip_stats(round_trips)
+        
+        # Equal-weight buy and hold from each symbol's first bar
+        first = close[np.argmax(~np.isnan(close), axis=0), np.arange(close.shape[1])]
+        buy_hold_return = np.mean(close[-1] / first - 1) * 100
+        
+        return {
+            'strategy': str(self.strategy),
+            'symbol': f"{len(symbols)} symbols",
+            'symbols': symbols,
+            'initial_capital': self.initial_capital,
+            'final_value': final_value,
+            'total_return': total_return,
+            'buy_hold_return': buy_hold_return,
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': max_drawdown,
+            'total_trades': trade_stats['total_trades'],
+            'win_rate': trade_stats['win_rate'],
+            'equity_curve': equity_curve,
+            'trade_history': portfolio.trade_history,
+            'round_trips': round_trips,
+            'portfolio': portfolio
+        }
+        
+    def print_results(self):
+        """Print portfolio backtest results summary."""
+        if self.results is None:
+            print("No results available. Run backtest first.")
+            return
+            
+        r = self.results
+        
+        print(f"\n{'='*60}")
+        print(f"PORTFOLIO BACKTEST RESULTS")
+        print(f"{'='*60}")
+        print(f"Strategy:          {r['strategy']}")
+        print(f"Symbols:           {len(r['symbols'])}")
+        print(f"Initial Capital:   ${r['initial_capital']:,.2f}")
+        print(f"Final Value:       ${r['final_value']:,.2f}")
+        print(f"Total Return:      {r['total_return']:.2f}%")
+        print(f"Buy & Hold Return: {r['buy_hold_return']:.2f}% (equal weight)")
+        print(f"Sharpe Ratio:      {r['sharpe_ratio']:.2f}")
+        print(f"Max Drawdown:      {r['max_drawdown']:.2f}%")
+        print(f"Total Trades:      {r['total_trades']}")
+        print(f"Win Rate:          {r['win_rate']:.2f}%")
+        if r.get('risk_exits'):
+            exits = ', '.join(f"{n} {reason.replace('_', ' ')}" for reason, n in r['risk_exits'].items())
+            print(f"Risk Exits:        {exits}")
+        print(f"{'='*60}\n")
@@ -0,0 +1,243 @@
+"""
+Per-stage profiling of CLI runs.
+
+``profiler`` splits a run into stages (fetch, signals, execution, metrics
+and visualization) and records the wall-clock time, CPU time, calls and
+peak traced memory of each. Code marks a stage with ``profiler.stage`` or
+the ``profiled`` decorator. Stages nest: time spent in an inner stage
+counts towards it and not towards the stage around it, so the stages of
+a run add up to its total, and time outside every stage is reported as
+'(other)'. Peak memory is the highest memory traced by tracemalloc (which
+sees allocations made since profiling started) while the stage and its
+inner stages ran.
+
+Profiling is off unless ``profiler.enable`` is called (main.py --profile).
+While it is off, ``stage`` returns a shared no-op context manager, so a
+marked stage costs one attribute check. Only the thread and process that
+enabled the profiler are recorded: fetch threads and worker processes
+count towards the stage that waits for them.
+
+Memory tracing and cProfile are opt-in, as both slow down the code they
+watch (tracemalloc several times over for allocation-heavy stages such
+as parsing); compare timings of runs profiled the same way.
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+import pandas as pd
+
+
+STAGES = ('fetch', 'signals', 'execution', 'metrics', 'visualization')
+
+_OFF = contextlib.nullcontext()
+
+
+class _Frame:
+    """An active stage."""
+    
+    __slots__ = ('name', 'wall', 'cpu', 'child_wall', 'child_cpu', 'peak')
+    
+    def __init__(self, name: str, wall: float, cpu: float, peak: int):
+        self.name = name
+        self.wall = wall
+        self.cpu = cpu
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+        self.peak = peak
+
+
+class Profiler:
+    """Records wall time, CPU time, calls and peak memory per stage."""
+    
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.stats = {}
+        self.events = []
+        self.wall = self.cpu = math.nan
+        self.peak = 0
+        self._stack = []
+        self._owner = None
+        self._cprofile = None
+        self._started = (0.0, 0.0)
+        
+    def enable(self, memory: bool = False, cprofile: bool = False):
+        """
+        Start profiling (clearing stages recorded before).
+        
+        Args:
+            memory: Trace peak memory per stage with tracemalloc
+            cprofile: Also profile every function call with cProfile (see dump_stats)
+        """
+        self.stats = {}
+        self.events = []
+        self.peak = 0
+        self._stack = []
+        self._owner = (os.getpid(), threading.get_ident())
+        self.memory = memory and not tracemalloc.is_tracing()
+        if self.memory:
+            tracemalloc.start()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self.enabled = True
+        self._started = (time.perf_counter(), time.process_time())
+        if self._cprofile is not None:
+            self._cprofile.enable()
+            
+    def disable(self):
+        """Stop profiling; the recorded stages are kept."""
+        if not self.enabled:
+            return
+            
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.wall = time.perf_counter() - self._started[0]
+        self.cpu = time.process_time() - self._started[1]
+        if self.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.enabled = False
+        
+    def stage(self, name: str):
+        """
+        Context manager timing a stage (a no-op while profiling is off).
+        
+        Args:
+            name: Stage name (one of STAGES)
+        """
+        if not self.enabled or (os.getpid(), threading.get_ident()) != self._owner:
+            return _OFF
+        return self._record(name)
+        
+    @contextlib.contextmanager
+    def _record(self, name: str):
+        """Record one call of a stage."""
+        memory = 0
+        if self.memory:
+            # The peak since the last reset belongs to the enclosing stage (or to no stage)
+            memory, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            else:
+                self.peak = max(self.peak, peak)
+            tracemalloc.reset_peak()
+            
+        frame = _Frame(name, time.perf_counter(), time.process_time(), memory)
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - frame.wall
+            cpu = time.process_time() - frame.cpu
+            self._stack.pop()
+            if self.memory:
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            if self._stack:
+                parent = self._stack[-1]
+                parent.child_wall += wall
+                parent.child_cpu += cpu
+                parent.peak = max(parent.peak, frame.peak)
+                
+            stats = self.stats.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak': 0})
+            stats['calls'] += 1
+            stats['wall'] += wall - frame.child_wall
+            stats['cpu'] += cpu - frame.child_cpu
+            stats['peak'] = max(stats['peak'], frame.peak)
+            self.events.append((name, frame.wall - self._started[0], wall, cpu, frame.peak, len(self._stack)))
+            
+    def summary(self) -> pd.DataFrame:
+        """
+        Summarize the recorded stages.
+        
+        Returns:
+            DataFrame with calls, wall and CPU seconds (excluding inner
+            stages), share of the total wall time and peak traced memory
+            (MB, NaN without memory tracing) per stage, followed by
+            '(other)' for time outside every stage and 'total'
+        """
+        wall = self.wall if not self.enabled else time.perf_counter() - self._started[0]
+        cpu = self.cpu if not self.enabled else time.process_time() - self._started[1]
+        names = [name for name in STAGES if name in self.stats] + sorted(set(self.stats) - set(STAGES))
+        
+        def row(stage, calls, stage_wall, stage_cpu, peak):
+            return {
+                'stage': stage,
+                'calls': calls,
+                'wall_s': stage_wall,
+                'cpu_s': stage_cpu,
+                'wall_pct': stage_wall / wall * 100 if wall > 0 else math.nan,
+                'peak_mb': peak / 2**20 if self.memory else math.nan
+            }
+            
+        rows = [row(name, self.stats[name]['calls'], self.stats[name]['wall'], self.stats[name]['cpu'],
+                    self.stats[name]['peak']) for name in names]
+        peak = max([self.peak] + [stats['peak'] for stats in self.stats.values()])
+        if self.memory and self.enabled:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        rows.append(row('(other)', math.nan, wall - sum(r['wall_s'] for r in rows),
+                        cpu - sum(r['cpu_s'] for r in rows), math.nan))
+        rows.append(row('total', math.nan, wall, cpu, peak))
+        summary = pd.DataFrame(rows)
+        summary['calls'] = summary['calls'].astype('Int64')
+        return summary
+        
+    def write_trace(self, path: str):
+        """
+        Write every recorded stage call as a JSON trace.
+        
+        The file uses the Trace Event format, so it opens in chrome://tracing
+        or Perfetto; the 'summary' key holds the summary table.
+        
+        Args:
+            path: Output file
+        """
+        pid, tid = self._owner or (os.getpid(), threading.get_ident())
+        events = [
+            {
+                'name': name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round(start * 1e6, 3), 'dur': round(wall * 1e6, 3),
+                'args': {'cpu_ms': round(cpu * 1e3, 3), 'depth': depth,
+                         **({'peak_mb': round(peak / 2**20, 3)} if self.memory else {})}
+            }
+            for name, start, wall, cpu, peak, depth in self.events
+        ]
+        summary = self.summary().astype(object).where(lambda frame: frame.notna(), None)
+        Path(path).write_text(json.dumps({
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'summary': summary.to_dict(orient='records')
+        }, indent=1))
+        
+    def dump_stats(self, path: str):
+        """
+        Write the cProfile statistics (read them with pstats).
+        
+        Args:
+            path: Output file
+        """
+        if self._cprofile is None:
+            raise ValueError("cProfile was not enabled")
+        self._cprofile.dump_stats(path)
+
+
+profiler = Profiler()
+
+
+def profiled(stage: str):
+    """Record every call of a function as a stage of ``profiler``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,252 @@
+"""
+Persistent store of backtest results.
+
+A run is keyed by a fingerprint of everything that decides its outcome:
+the strategy class and parameters, the engine, the initial capital, the
+trading costs in Config, any risk exit rules and the content of the
+price data. Running the same backtest again returns the stored results
+instead of recomputing them, and new data (or a changed setting) gives a
+new key.
+
+Runs live in one SQLite file. Metrics are plain columns of the ``runs``
+table, so stored runs can be ranked with SQL without loading anything
+else; the equity curve, trade ledger and round trips of a run are kept
+in a pickled payload column next to them.
+"""
+import hashlib
+import json
+import pickle
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from config import Config
+from performance_tracker import PerformanceTracker
+
+
+# Config settings that change the outcome of a backtest
+COST_SETTINGS = ('COMMISSION_RATE', 'SLIPPAGE_RATE', 'MAX_POSITION_SIZE')
+
+# Metrics stored as columns of the runs table (and allowed as ranking keys)
+RUN_METRICS = (
+    'total_return', 'annualized_return', 'volatility', 'sharpe_ratio', 'sortino_ratio', 'calmar_ratio',
+    'max_drawdown', 'total_trades', 'win_rate', 'profit_factor', 'avg_holding_days', 'avg_mae', 'avg_mfe',
+    'final_value', 'buy_hold_return'
+)
+
+RUN_COLUMNS = ('fingerprint', 'created_at', 'strategy', 'strategy_class', 'params', 'risk_exits', 'symbol',
+               'start_date', 'end_date', 'bars', 'engine', 'initial_capital')
+
+# Results keys kept in the payload rather than as columns
+PAYLOAD_KEYS = ('equity_curve', 'trade_history', 'round_trips', 'risk_exits')
+
+
+def data_digest(data: pd.DataFrame) -> str:
+    """
+    Hash price data by content.
+    
+    Args:
+        data: DataFrame with OHLCV data indexed by date
+        
+    Returns:
+        Hex digest covering the dates, timezone, column names and values
+    """
+    index = pd.DatetimeIndex(data.index)
+    digest = hashlib.sha256()
+    digest.update(f"{index.tz}|{'|'.join(map(str, data.columns))}".encode())
+    digest.update(index.as_unit('ns').asi8.tobytes())
+    for column in data.columns:
+        digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+def run_fingerprint(strategy, engine: str, initial_capital: float, config: Config, symbol: str,
+                    data: pd.DataFrame, risk_exits=None) -> str:
+    """
+    Fingerprint a backtest by its inputs.
+    
+    Args:
+        strategy: Strategy instance (anything with get_parameters)
+        engine: Backtest engine
+        initial_capital: Starting capital
+        config: Configuration object (only COST_SETTINGS are used)
+        symbol: Stock symbol
+        data: Price data the backtest runs on
+        risk_exits: RiskExits rules of the run (if any)
+        
+    Returns:
+        Hex digest identifying the run
+    """
+    key = {
+        'strategy': type(strategy).__name__,
+        'params': strategy.get_parameters(),
+        'engine': engine,
+        'initial_capital': float(initial_capital),
+        'costs': {name: getattr(config, name) for name in COST_SETTINGS},
+        'symbol': symbol,
+        'data': data_digest(data)
+    }
+    if risk_exits:
+        # Only present when set, so runs without exits keep their fingerprints
+        key['risk_exits'] = risk_exits.get_parameters()
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultStore:
+    """SQLite store of backtest results keyed by run fingerprint."""
+    
+    def __init__(self, path: str = None):
+        """
+        Initialize store.
+        
+        Args:
+            path: SQLite file (defaults to Config.RESULT_STORE_PATH; created if missing)
+        """
+        self.path = Path(path or Config.RESULT_STORE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        columns = ', '.join(
+            ['fingerprint TEXT PRIMARY KEY']
+            + [f"{name} TEXT" for name in ('created_at', 'strategy', 'strategy_class', 'params', 'risk_exits',
+                                           'symbol', 'start_date', 'end_date', 'engine')]
+            + ['bars INTEGER', 'initial_capital REAL']
+            + [f"{name} {'INTEGER' if name == 'total_trades' else 'REAL'}" for name in RUN_METRICS]
+            + ['payload BLOB']
+        )
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+            # Stores written before risk exits had a column
+            if 'risk_exits' not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+                conn.execute("ALTER TABLE runs ADD COLUMN risk_exits TEXT")
+            
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+            
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            
+    def __contains__(self, fingerprint: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM runs WHERE fingerprint = ?", (fingerprint,)).fetchone() is not None
+            
+    def load(self, fingerprint: str) -> Dict:
+        """
+        Load a stored run.
+        
+        Args:
+            fingerprint: Run fingerprint (see run_fingerprint)
+            
+        Returns:
+            Backtest results dictionary like Backtester's (with None for
+            'portfolio'), or None if the run is not stored
+        """
+        names = ('strategy', 'symbol', 'initial_capital', 'final_value', 'total_return', 'buy_hold_return',
+                 'sharpe_ratio', 'max_drawdown', 'total_trades', 'win_rate', 'payload')
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(names)} FROM runs WHERE fingerprint = ?",
+                               (fingerprint,)).fetchone()
+        if row is None:
+            return None
+            
+        results = dict(zip(names[:-1], row[:-1]))
+        results['total_trades'] = int(results['total_trades'])
+        results.update(pickle.loads(row[-1]))
+        results['portfolio'] = None
+        return results
+        
+    def save(self, fingerprint: str, results: Dict, strategy=None, engine: str = None, risk_exits=None):
+        """
+        Store a run (replacing a stored run with the same fingerprint).
+        
+        Args:
+            fingerprint: Run fingerprint (see run_fingerprint)
+            results: Backtest results dictionary
+            strategy: Strategy that produced the results (for its class and parameters)
+            engine: Backtest engine
+            risk_exits: RiskExits rules of the run (stored as JSON; NULL without exits)
+        """
+        equity_curve = results['equity_curve']
+        metrics = PerformanceTracker.calculate_metrics(
+            equity_curve, results['trade_history'], results['initial_capital'], results['round_trips']
+        )
+        metrics.update({key: results[key] for key in ('total_return', 'sharpe_ratio', 'max_drawdown',
+                                                      'total_trades', 'win_rate', 'final_value',
+                                                      'buy_hold_return')})
+        dates = pd.DatetimeIndex(equity_curve['date'])
+        
+        row = {
+            'fingerprint': fingerprint,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'strategy': results['strategy'],
+            'strategy_class': type(strategy).__name__ if strategy is not None else None,
+            'params': json.dumps(strategy.get_parameters() if strategy is not None else {},
+                                 sort_keys=True, default=str),
+            'risk_exits': json.dumps(risk_exits.get_parameters(), sort_keys=True) if risk_exits else None,
+            'symbol': results['symbol'],
+            'start_date': str(dates[0].date()) if len(dates) else None,
+            'end_date': str(dates[-1].date()) if len(dates) else None,
+            'bars': len(dates),
+            'engine': engine,
+            'initial_capital': float(results['initial_capital']),
+            **{name: float(metrics.get(name, np.nan)) for name in RUN_METRICS},
+            'payload': pickle.dumps({key: results[key] for key in PAYLOAD_KEYS if key in results},
+                                    protocol=pickle.HIGHEST_PROTOCOL)
+        }
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                list(row.values())
+            )
+            
+    def query(self, metric: str = 'sharpe_ratio', strategy_class: str = None, symbol: str = None,
+              limit: int = None, ascending: bool = False) -> pd.DataFrame:
+        """
+        Rank stored runs by a metric without loading their payloads.
+        
+        Args:
+            metric: One of RUN_METRICS
+            strategy_class: Only runs of this strategy class (e.g. 'RSIStrategy')
+            symbol: Only runs on this symbol
+            limit: Maximum number of rows
+            ascending: Rank lowest first
+            
+        Returns:
+            DataFrame with one row per run (run columns and metrics), best first
+        """
+        if metric not in RUN_METRICS:
+            raise ValueError(f"Unknown metric: {metric} (expected one of {', '.join(RUN_METRICS)})")
+            
+        where = []
+        args: List = []
+        if strategy_class:
+            where.append("strategy_class = ?")
+            args.append(strategy_class)
+        if symbol:
+            where.append("symbol = ?")
+            args.append(symbol)
+            
+        sql = (f"SELECT {', '.join(RUN_COLUMNS + RUN_METRICS)} FROM runs"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + f" ORDER BY {metric} IS NULL, {metric} {'ASC' if ascending else 'DESC'}, created_at")
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+            
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=args)
+            
+    def clear(self):
+        """Delete every stored run."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runs")
@@ -0,0 +1,138 @@
+"""
+Intrabar stop-loss, take-profit and trailing-stop exits.
+
+Exits are checked against each bar's Low and High rather than its close,
+so a stop is filled on the bar that trades through it. Between two
+signal bars nothing but an exit can change a position, so the engines
+ask ``RiskExits.scan`` for the first exit in the whole stretch at once:
+the levels of every bar are laid out as arrays and the first bar that
+hits one is found with a single vectorized search, instead of checking
+each bar in the trading loop.
+
+Fill rules (long positions):
+
+- A stop triggers when the Low reaches the stop level and fills at the
+  level, or at the Open if the bar gaps below it.
+- A take-profit triggers when the High reaches the target and fills at
+  the target, or at the Open if the bar gaps above it.
+- When a bar reaches both, the stop is assumed to come first unless the
+  bar opens beyond the target.
+- The trailing stop trails the highest High since entry, using the
+  highs of earlier bars only, as a bar's High may come after its Low.
+
+Fill prices are market prices; the engines apply slippage and commission
+to them like OrderExecutor.execute_sell.
+"""
+import math
+import numpy as np
+import pandas as pd
+
+
+REASONS = ('stop_loss', 'take_profit', 'trailing_stop')
+
+
+def price_arrays(data: pd.DataFrame) -> tuple:
+    """
+    Get the Open, High and Low arrays used to check exits.
+    
+    Args:
+        data: DataFrame with OHLC columns, or a panel with (field, symbol)
+              columns (see build_panel) for 2D arrays
+              
+    Returns:
+        Tuple of (open, high, low) float arrays; High and Low fall back to
+        Close and a missing Open to NaN (no gap fills)
+    """
+    fields = set(data.columns.get_level_values(0))
+    close = data['Close'].to_numpy(dtype=np.float64)
+    open_ = data['Open'].to_numpy(dtype=np.float64) if 'Open' in fields else np.full_like(close, np.nan)
+    high = data['High'].to_numpy(dtype=np.float64) if 'High' in fields else close
+    low = data['Low'].to_numpy(dtype=np.float64) if 'Low' in fields else close
+    return open_, high, low
+
+
+class RiskExits:
+    """Stop-loss, take-profit and trailing-stop rules for long positions."""
+    
+    def __init__(self, stop_loss: float = None, take_profit: float = None, trailing_stop: float = None):
+        """
+        Initialize rules (None disables a rule).
+        
+        Args:
+            stop_loss: Exit when price falls this fraction below the average
+                       fill price of the position (e.g. 0.05)
+            take_profit: Exit when price rises this fraction above the
+                         average fill price (e.g. 0.10)
+            trailing_stop: Exit when price falls this fraction below the
+                           highest High since the position was opened
+        """
+        for name, value in (('stop_loss', stop_loss), ('take_profit', take_profit),
+                            ('trailing_stop', trailing_stop)):
+            if value is not None and not (0 < value and (value < 1 or name == 'take_profit')):
+                raise ValueError(f"Invalid {name}: {value}")
+                
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.trailing_stop = trailing_stop
+        
+    def __bool__(self) -> bool:
+        """Whether any rule is enabled."""
+        return any(value is not None for value in (self.stop_loss, self.take_profit, self.trailing_stop))
+        
+    def get_parameters(self) -> dict:
+        """Get the enabled rules."""
+        return {name: getattr(self, name) for name in REASONS if getattr(self, name) is not None}
+        
+    def __str__(self) -> str:
+        """String representation of the rules."""
+        return ", ".join(f"{name.replace('_', ' ')} {value:.1%}" for name, value in self.get_parameters().items())
+        
+    def scan(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, start: int, stop: int,
+             entry_price: float, peak: float) -> tuple:
+        """
+        Find the first exit of a long position in bars [start, stop).
+        
+        Args:
+            open_: Open prices of every bar
+            high: High prices of every bar
+            low: Low prices of every bar
+            start: First bar to check
+            stop: Bar to stop before
+            entry_price: Average fill price of the position
+            peak: Highest price seen since the position was opened, before start
+            
+        Returns:
+            Tuple of (exit bar or -1, fill price, reason, peak), where peak
+            is the highest High through the scanned bars when no exit hit
+        """
+        high = high[start:stop]
+        low = low[start:stop]
+        if not len(low):
+            return -1, math.nan, None, peak
+            
+        fixed = entry_price * (1 - self.stop_loss) if self.stop_loss is not None else -math.inf
+        target = entry_price * (1 + self.take_profit) if self.take_profit is not None else math.inf
+        
+        if self.trailing_stop is not None:
+            peaks = np.fmax.accumulate(np.append(peak, high[:-1]))
+            levels = np.maximum(peaks * (1 - self.trailing_stop), fixed)
+        else:
+            levels = np.full(len(low), fixed)
+            
+        stopped = low <= levels
+        hit = stopped | (high >= target)
+        i = int(np.argmax(hit))
+        if not hit[i]:
+            return -1, math.nan, None, max(peak, np.nanmax(high, initial=-math.inf))
+            
+        level = levels[i].item()
+        bar_open = open_[start + i].item()
+        reason = 'trailing_stop' if level > fixed else 'stop_loss'
+        
+        if stopped[i] and bar_open <= level:
+            return start + i, bar_open, reason, peak
+        if high[i] >= target and bar_open >= target:
+            return start + i, bar_open, 'take_profit', peak
+        if stopped[i]:
+            return start + i, level, reason, peak
+        return start + i, target, 'take_profit', peak
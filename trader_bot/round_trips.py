@@ -0,0 +1,305 @@
+"""
+Round-trip trade matching.
+
+Buys open lots and sells close them first-in first-out per symbol. A sell
+that closes several lots, or a lot closed by several sells, produces one
+round trip per matched piece, so scaling in and partial exits are paired
+correctly. Matching works on cumulative share counts over the whole
+ledger with NumPy, without a Python loop over trades.
+"""
+from typing import Dict, List, Union
+import numpy as np
+import pandas as pd
+
+
+TRADE_FIELDS = ['date', 'symbol', 'action', 'shares', 'price', 'commission', 'total']
+
+ROUND_TRIP_COLUMNS = [
+    'symbol', 'entry_date', 'exit_date', 'shares', 'entry_price', 'exit_price',
+    'entry_commission', 'exit_commission', 'pnl', 'return_pct', 'holding_period',
+    'bars_held', 'mae', 'mfe'
+]
+
+
+def _trade_columns(trades) -> dict:
+    """
+    Get trade columns from a DataFrame, a list of trade dictionaries or a
+    dictionary of columns (e.g. Portfolio.trade_columns()).
+    """
+    if isinstance(trades, list):
+        trades = pd.DataFrame(trades, columns=TRADE_FIELDS)
+    return {name: trades[name] for name in ('date', 'symbol', 'action', 'shares', 'price', 'commission')}
+
+
+def _date_values(dates) -> np.ndarray:
+    """Dates as int64 nanoseconds (UTC for tz-aware dates)."""
+    return pd.DatetimeIndex(dates).as_unit('ns').asi8
+
+
+def _empty_round_trips(dates: pd.DatetimeIndex) -> dict:
+    """Round trip arrays of an unmatched ledger."""
+    none = np.zeros(0, dtype=np.int64)
+    return {
+        'symbol': np.zeros(0, dtype=object),
+        'entry_date': dates[none],
+        'exit_date': dates[none],
+        'shares': none,
+        **{name: np.zeros(0) for name in ('entry_price', 'exit_price', 'entry_commission',
+                                          'exit_commission', 'pnl', 'return_pct')},
+        'holding_period': np.zeros(0, dtype='m8[ns]'),
+        'bars_held': none,
+        'mae': np.zeros(0),
+        'mfe': np.zeros(0)
+    }
+
+
+def match_round_trips(trades: Union[pd.DataFrame, List[Dict], Dict[str, np.ndarray]],
+                      prices: Union[pd.DataFrame, Dict[str, pd.DataFrame]] = None) -> Dict[str, np.ndarray]:
+    """
+    Match buys and sells into round trips, FIFO per symbol.
+    
+    Commissions are split across round trips in proportion to shares.
+    A sell only closes shares bought before it: shares sold beyond the
+    position held at that time are ignored, and lots still open at the
+    end of the ledger are not reported.
+    
+    Args:
+        trades: Trades in execution order, as a DataFrame, a list of
+                dictionaries or a dictionary of columns with date, symbol,
+                action ('BUY'/'SELL' or 1/-1), shares, price and commission
+        prices: OHLC data used for bars held and MAE/MFE, either one
+                DataFrame for a single-symbol ledger or a dictionary of
+                symbol -> DataFrame (optional)
+                
+    Returns:
+        Dictionary of equal-length arrays keyed by ROUND_TRIP_COLUMNS, with
+        one entry per round trip in exit order (pass it to pd.DataFrame for
+        a table). pnl is net of commissions, holding_period is a
+        timedelta64, and mae/mfe are the worst Low and best High while the
+        lot was open, in percent of the entry price (bars_held is -1 and
+        mae/mfe NaN without prices).
+    """
+    columns = _trade_columns(trades)
+    dates = pd.DatetimeIndex(columns['date'])
+    if not len(dates):
+        return _empty_round_trips(dates)
+        
+    codes, symbols = pd.factorize(columns['symbol'])
+    action = np.asarray(columns['action'])
+    is_buy = action == 1 if action.dtype.kind in 'iu' else action == 'BUY'
+    shares = np.asarray(columns['shares'], dtype=np.int64)
+    
+    # Group by symbol, keeping execution order inside each symbol
+    order = np.lexsort((np.arange(len(codes)), codes))
+    buys = order[is_buy[order]]
+    sells = order[~is_buy[order]]
+    if not len(buys) or not len(sells):
+        return _empty_round_trips(dates)
+        
+    # Lay every symbol's lots end to end on one share axis: lot i covers
+    # [buy_ends[i] - shares, buy_ends[i]) and symbol s starts at offsets[s]
+    buy_ends = np.cumsum(shares[buys])
+    buy_totals = np.zeros(len(symbols), dtype=np.int64)
+    np.add.at(buy_totals, codes[buys], shares[buys])
+    offsets = np.cumsum(buy_totals) - buy_totals
+    
+    # Sells consume the same axis from each symbol's offset, but only up to
+    # the shares bought before them. With Q the symbol's cumulative sells and
+    # B its cumulative buys before each sell, the shares actually sold so
+    # far follow S[k] = min(S[k-1] + q[k], B[k]), which unrolls to
+    # S[k] = Q[k] + min(0, min over j <= k of B[j] - Q[j])
+    sell_totals = np.zeros(len(symbols), dtype=np.int64)
+    np.add.at(sell_totals, codes[sells], shares[sells])
+    sell_codes = codes[sells]
+    sold = np.cumsum(shares[sells]) - (np.cumsum(sell_totals) - sell_totals)[sell_codes]
+    bought = np.cumsum(np.where(is_buy[order], shares[order], 0))[~is_buy[order]] - offsets[sell_codes]
+    
+    # Running minimum per symbol: shifting each symbol below the previous
+    # ones keeps one accumulate from carrying across symbols
+    shift = sell_codes * (2 * int(shares.sum()) + 1)
+    headroom = np.minimum(np.minimum.accumulate(bought - sold - shift) + shift, 0)
+    sell_ends = sold + headroom
+    first = np.r_[True, sell_codes[1:] != sell_codes[:-1]]
+    sell_starts = np.where(first, 0, np.r_[0, sell_ends[:-1]])
+    sell_starts += offsets[sell_codes]
+    sell_ends += offsets[sell_codes]
+    
+    # Cut the axis at every lot and sell boundary; each piece covered by a
+    # sell is one round trip
+    cuts = np.unique(np.concatenate(([0], buy_ends, sell_starts, sell_ends)))
+    starts, lengths = cuts[:-1], np.diff(cuts)
+    sell_index = np.searchsorted(sell_ends, starts, side='right')
+    covered = sell_index < len(sells)
+    covered[covered] = sell_starts[sell_index[covered]] <= starts[covered]
+    
+    starts, lengths, sell_index = starts[covered], lengths[covered], sell_index[covered]
+    entries = buys[np.searchsorted(buy_ends, starts, side='right')]
+    exits = sells[sell_index]
+    
+    exit_order = np.lexsort((entries, exits))
+    entries, exits, lengths = entries[exit_order], exits[exit_order], lengths[exit_order]
+    
+    price = np.asarray(columns['price'], dtype=np.float64)
+    commission = np.asarray(columns['commission'], dtype=np.float64)
+    entry_price, exit_price = price[entries], price[exits]
+    entry_commission = commission[entries] * (lengths / shares[entries])
+    exit_commission = commission[exits] * (lengths / shares[exits])
+    
+    pnl = (exit_price - entry_price) * lengths - entry_commission - exit_commission
+    cost = entry_price * lengths + entry_commission
+    
+    date_values = _date_values(dates)
+    entry_codes = codes[entries]
+    
+    bars_held = np.full(len(entries), -1, dtype=np.int64)
+    mae = np.full(len(entries), np.nan)
+    mfe = np.full(len(entries), np.nan)
+    
+    if prices is not None:
+        for code in np.unique(entry_codes).tolist():
+            data = prices if isinstance(prices, pd.DataFrame) else prices.get(symbols[code])
+            if data is None or data.empty:
+                continue
+                
+            rows = np.flatnonzero(entry_codes == code)
+            _excursions(data, date_values[entries[rows]], date_values[exits[rows]], entry_price[rows],
+                        rows, bars_held, mae, mfe)
+                        
+    return {
+        'symbol': np.asarray(symbols, dtype=object)[entry_codes],
+        'entry_date': dates[entries],
+        'exit_date': dates[exits],
+        'shares': lengths,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'entry_commission': entry_commission,
+        'exit_commission': exit_commission,
+        'pnl': pnl,
+        'return_pct': np.divide(pnl, cost, out=np.zeros_like(pnl), where=cost != 0) * 100,
+        'holding_period': (date_values[exits] - date_values[entries]).view('m8[ns]'),
+        'bars_held': bars_held,
+        'mae': mae,
+        'mfe': mfe
+    }
+
+
+def _excursions(data: pd.DataFrame, entry_dates: np.ndarray, exit_dates: np.ndarray, entry_price: np.ndarray,
+                rows: np.ndarray, bars_held: np.ndarray, mae: np.ndarray, mfe: np.ndarray):
+    """Fill bars held and MAE/MFE of one symbol's round trips from its OHLC data (dates in int64 ns)."""
+    index = _date_values(data.index)
+    entry_bar = np.minimum(np.searchsorted(index, entry_dates), len(index) - 1)
+    exit_bar = np.minimum(np.searchsorted(index, exit_dates), len(index) - 1)
+    bars_held[rows] = exit_bar - entry_bar
+    
+    low = data['Low' if 'Low' in data.columns else 'Close'].to_numpy(dtype=np.float64)
+    high = data['High' if 'High' in data.columns else 'Close'].to_numpy(dtype=np.float64)
+    
+    # Range min/max over [entry_bar, exit_bar] for every trip at once:
+    # reduceat over (start, stop) pairs, with a sentinel so stop may be the end
+    bounds = np.column_stack((entry_bar, exit_bar + 1)).ravel()
+    worst = np.fmin.reduceat(np.append(low, np.nan), bounds)[::2]
+    best = np.fmax.reduceat(np.append(high, np.nan), bounds)[::2]
+    
+    mae[rows] = (worst / entry_price - 1) * 100
+    mfe[rows] = (best / entry_price - 1) * 100
+
+
+def block_excursions(round_trips: Dict[str, np.ndarray], blocks) -> Dict[str, np.ndarray]:
+    """
+    Fill bars held and MAE/MFE of one symbol's round trips from streamed bars.
+    
+    Out-of-core counterpart of the prices argument of match_round_trips:
+    the bars arrive as consecutive blocks (e.g. from column_store.iter_blocks)
+    and every trip's Low/High range is reduced block by block, so the
+    price history never has to be in memory at once. Results equal the
+    in-memory ones.
+    
+    Args:
+        round_trips: Arrays from match_round_trips (trades of one symbol)
+        blocks: Iterable of (datetime64[ns] index array, dict with Low,
+                High or Close arrays) in date order
+                
+    Returns:
+        Copy of round_trips with bars_held, mae and mfe filled in
+    """
+    entry_dates = _date_values(round_trips['entry_date'])
+    exit_dates = _date_values(round_trips['exit_date'])
+    n_trips = len(entry_dates)
+    
+    entry_bar = np.zeros(n_trips, dtype=np.int64)
+    exit_bar = np.zeros(n_trips, dtype=np.int64)
+    worst = np.full(n_trips, np.nan)
+    best = np.full(n_trips, np.nan)
+    n_bars = 0
+    
+    for index, columns in blocks:
+        index = np.asarray(index).view(np.int64)
+        low = columns['Low' if 'Low' in columns else 'Close']
+        high = columns['High' if 'High' in columns else 'Close']
+        
+        # Bars before each entry/exit in this block; summed over blocks
+        # they are the positions searchsorted gives on the whole index
+        lo = np.searchsorted(index, entry_dates)
+        hi = np.searchsorted(index, exit_dates)
+        
+        # The part of each trip's [entry_bar, exit_bar] inside the block:
+        # trips whose exit bar came in an earlier block have none
+        stop = np.where(exit_bar == n_bars, np.minimum(hi + 1, len(index)), 0)
+        active = np.flatnonzero(lo < stop)
+        
+        entry_bar += lo
+        exit_bar += hi
+        n_bars += len(index)
+        if len(active):
+            bounds = np.column_stack((lo[active], stop[active])).ravel()
+            worst[active] = np.fmin(worst[active], np.fmin.reduceat(np.append(low, np.nan), bounds)[::2])
+            best[active] = np.fmax(best[active], np.fmax.reduceat(np.append(high, np.nan), bounds)[::2])
+            
+    round_trips = dict(round_trips)
+    if n_bars:
+        round_trips['bars_held'] = np.minimum(exit_bar, n_bars - 1) - np.minimum(entry_bar, n_bars - 1)
+        round_trips['mae'] = (worst / round_trips['entry_price'] - 1) * 100
+        round_trips['mfe'] = (best / round_trips['entry_price'] - 1) * 100
+    return round_trips
+
+
+def round_trip_stats(round_trips) -> Dict:
+    """
+    Summarize round trips.
+    
+    Args:
+        round_trips: Arrays from match_round_trips (or a DataFrame of them)
+        
+    Returns:
+        Dictionary with total_trades, winning_trades, losing_trades,
+        win_rate, avg_win, avg_loss, profit_factor, avg_holding_days,
+        avg_mae and avg_mfe
+    """
+    pnl = np.asarray(round_trips['pnl'], dtype=np.float64)
+    total_trades = len(pnl)
+    if not total_trades:
+        return {key: 0 for key in ('total_trades', 'winning_trades', 'losing_trades', 'win_rate', 'avg_win',
+                                   'avg_loss', 'profit_factor', 'avg_holding_days', 'avg_mae', 'avg_mfe')}
+                                   
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    avg_win = wins.mean() if len(wins) else 0
+    avg_loss = losses.mean() if len(losses) else 0
+    
+    holding_days = np.asarray(round_trips['holding_period']).astype('m8[ns]').view(np.int64) / 86400e9
+    mae = np.asarray(round_trips['mae'], dtype=np.float64)
+    mfe = np.asarray(round_trips['mfe'], dtype=np.float64)
+    priced = ~np.isnan(mae)
+    
+    return {
+        'total_trades': total_trades,
+        'winning_trades': len(wins),
+        'losing_trades': total_trades - len(wins),
+        'win_rate': len(wins) / total_trades * 100,
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': abs(avg_win / avg_loss) if avg_loss != 0 else 0,
+        'avg_holding_days': holding_days.mean(),
+        'avg_mae': mae[priced].mean() if priced.any() else 0,
+        'avg_mfe': mfe[priced].mean() if priced.any() else 0
+    }
@@ -0,0 +1,228 @@
+"""
+Shared-memory OHLCV data for worker processes.
+
+The parent process publishes the arrays loaded by DataFetcher into a single
+``multiprocessing.shared_memory`` block once. Worker processes attach to
+the block by name and get read-only NumPy views, so a pool of N workers
+holds one copy of the price data instead of N.
+
+Each symbol occupies a (columns x rows) region of raw 64-bit words laid
+out like a ``column_store`` block: row 0 is the datetime64[ns] index and
+each following row is one typed column.
+
+Process pools (sweep, walkforward, compare) run ``init_worker`` in every
+worker, which attaches once and fills ``worker_data``; in-process runs
+fill it with ``set_worker_data`` instead, so tasks read their bars from
+``worker_data`` either way.
+"""
+import time
+from multiprocessing import shared_memory
+from typing import Dict
+import numpy as np
+import pandas as pd
+from column_store import _typed_values, to_datetime_index
+from profiling import profiler
+
+
+# Price data of the current process, by symbol (see init_worker)
+worker_data = {}
+_worker_shared = None
+
+
+class SharedPriceData:
+    """OHLCV arrays of many symbols held in one shared memory block."""
+    
+    def __init__(self, shm: shared_memory.SharedMemory, spec: dict, owner: bool = False):
+        """
+        Initialize from an open shared memory block.
+        
+        Use ``publish`` or ``attach`` instead of calling this directly.
+        
+        Args:
+            shm: Shared memory block
+            spec: Layout of the block (see ``spec``)
+            owner: Whether this process created the block and must unlink it
+        """
+        self._shm = shm
+        self._spec = spec
+        self._owner = owner
+        self._arrays = {}
+        
+    @classmethod
+    def publish(cls, data: Dict[str, pd.DataFrame]) -> 'SharedPriceData':
+        """
+        Copy DataFrames into a new shared memory block.
+        
+        Args:
+            data: Dictionary of symbol -> DataFrame indexed by date
+            
+        Returns:
+            Owning SharedPriceData (call ``unlink`` when done)
+        """
+        layout = {}
+        offset = 0
+        
+        for symbol, frame in data.items():
+            index = pd.DatetimeIndex(frame.index)
+            layout[symbol] = {
+                'offset': offset,
+                'rows': len(frame),
+                'columns': list(frame.columns),
+                'dtypes': [_typed_values(frame[column]).dtype.name for column in frame.columns],
+                'tz': str(index.tz) if index.tz is not None else None,
+                'unit': index.unit
+            }
+            offset += (len(frame.columns) + 1) * len(frame) * 8
+            
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        spec = {'name': shm.name, 'symbols': layout}
+        
+        try:
+            for symbol, frame in data.items():
+                entry = layout[symbol]
+                block = np.ndarray((len(entry['columns']) + 1, entry['rows']), dtype=np.int64,
+                                   buffer=shm.buf, offset=entry['offset'])
+                block[0] = pd.DatetimeIndex(frame.index).as_unit('ns').asi8
+                for i, column in enumerate(frame.columns, start=1):
+                    block[i] = _typed_values(frame[column]).view(np.int64)
+                del block
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+            
+        return cls(shm, spec, owner=True)
+        
+    @classmethod
+    def attach(cls, spec: dict) -> 'SharedPriceData':
+        """
+        Attach to a block published by another process.
+        
+        Args:
+            spec: The publisher's ``spec``
+            
+        Returns:
+            SharedPriceData giving read-only views of the block
+        """
+        return cls(shared_memory.SharedMemory(name=spec['name']), spec)
+        
+    @property
+    def spec(self) -> dict:
+        """Picklable description of the block, passed to ``attach``."""
+        return self._spec
+        
+    @property
+    def symbols(self) -> list:
+        """Symbols held in the block."""
+        return list(self._spec['symbols'])
+        
+    def arrays(self, symbol: str) -> tuple:
+        """
+        Get read-only views of one symbol's arrays.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            Tuple of (datetime64[ns] index array, dict of column -> array, tz)
+        """
+        if symbol not in self._arrays:
+            if symbol not in self._spec['symbols']:
+                raise KeyError(f"{symbol} is not in shared data")
+                
+            entry = self._spec['symbols'][symbol]
+            block = np.ndarray((len(entry['columns']) + 1, entry['rows']), dtype=np.int64,
+                               buffer=self._shm.buf, offset=entry['offset'])
+            block.flags.writeable = False
+            
+            columns = {
+                column: block[i].view(dtype)
+                for i, (column, dtype) in enumerate(zip(entry['columns'], entry['dtypes']), start=1)
+            }
+            self._arrays[symbol] = (block[0].view('M8[ns]'), columns, entry['tz'])
+            
+        return self._arrays[symbol]
+        
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """
+        Get one symbol's data as a DataFrame whose columns view shared memory.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            DataFrame with OHLCV data
+        """
+        index, columns, tz = self.arrays(symbol)
+        # Dates are stored as ns; give them back the resolution they were published with
+        dates = to_datetime_index(index, tz).as_unit(self._spec['symbols'][symbol]['unit'])
+        return pd.DataFrame(columns, index=dates, copy=False)
+        
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Get every symbol's data as DataFrames, in publish order."""
+        return {symbol: self.frame(symbol) for symbol in self.symbols}
+        
+    def close(self):
+        """
+        Detach from the block.
+        
+        Views and frames obtained from this object must not be used after
+        closing.
+        """
+        self._arrays.clear()
+        self._shm.close()
+        
+    def unlink(self):
+        """Free the block (publisher only) and detach."""
+        if self._owner:
+            self._shm.unlink()
+        self.close()
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.unlink()
+
+
+def init_worker(spec: dict):
+    """Attach to the shared price data once per worker process (a pool initializer)."""
+    global _worker_shared
+    # Forked workers inherit an enabled profiler; their time counts as the parent's execution stage
+    profiler.disable()
+    _worker_shared = SharedPriceData.attach(spec)
+    worker_data.update(_worker_shared.frames())
+
+
+def set_worker_data(data: Dict[str, pd.DataFrame]):
+    """Serve price data to tasks run in this process instead of a pool."""
+    worker_data.clear()
+    worker_data.update(data)
+
+
+def merge_cache_stats(worker_stats: Dict[int, dict]) -> dict:
+    """
+    Add up the indicator cache counters of the processes that ran a batch.
+    
+    Args:
+        worker_stats: Hits and misses by process id (counters are cumulative
+                      per worker, so the latest stats of each add up)
+                      
+    Returns:
+        Dictionary with hits, misses and hit_rate (percent)
+    """
+    hits = sum(stats['hits'] for stats in worker_stats.values())
+    misses = sum(stats['misses'] for stats in worker_stats.values())
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) * 100 if hits + misses else 0.0
+    }
+
+
+def report_progress(done: int, total: int, started: float):
+    """Print progress of a task batch with elapsed time and ETA."""
+    elapsed = time.perf_counter() - started
+    eta = elapsed / done * (total - done)
+    end = '\n' if done == total else '\r'
+    print(f"  [{done}/{total}] {done / total:6.1%}  elapsed {elapsed:6.1f}s  ETA {eta:6.1f}s", end=end, flush=True)
@@ -0,0 +1,10 @@
+"""
+Trading strategies.
+
+The strategy classes are re-exported here, so callers can write
+``from strategies import MovingAverageStrategy``.
+"""
+from strategies.base_strategy import BaseStrategy, EntryExitStrategy, long_flat_signals
+from strategies.moving_average import MovingAverageStrategy
+from strategies.rsi_strategy import RSIStrategy
+from strategies.momentum import MomentumStrategy
@@ -2,10 +2,52 @@
 Base strategy class that all trading strategies must inherit from.
 """
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
 from typing import Optional
 
 
+def long_flat_signals(entries: np.ndarray, exits: np.ndarray, initial_position: int = 0) -> np.ndarray:
+    """
+    Resolve entry/exit conditions of a long/flat state machine into signals.
+    
+    Equivalent to walking the bars with a position flag: an entry while flat
+    buys, an exit while long sells, everything else holds. Works on 1D
+    arrays or column-wise on 2D (bars x symbols) arrays without a Python loop.
+    
+    A bar with only an entry (or only an exit) sets the position outright,
+    while a bar with both flips it, so the position after each bar is the
+    last entry/exit-only value XOR the parity of "both" bars seen since.
+    
+    Args:
+        entries: Boolean array, True where the entry condition holds
+        exits: Boolean array, True where the exit condition holds
+        initial_position: Position before the first bar (0 = flat, 1 = long)
+        
+    Returns:
+        Integer array of signals: 1 (buy), -1 (sell), 0 (hold)
+    """
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    
+    only_entry = entries & ~exits
+    decisive = only_entry | (exits & ~entries)
+    flips = np.cumsum(entries & exits, axis=0)
+    
+    # Index of the last decisive bar up to each bar (-1 if none yet)
+    bars = np.arange(len(entries)).reshape((-1,) + (1,) * (entries.ndim - 1))
+    last = np.maximum.accumulate(np.where(decisive, bars, -1), axis=0)
+    seen = last >= 0
+    last = np.maximum(last, 0)
+    
+    base = np.where(seen, np.take_along_axis(only_entry, last, axis=0), bool(initial_position))
+    flips_since = flips - np.where(seen, np.take_along_axis(flips, last, axis=0), 0)
+    position = (base ^ (flips_since & 1).astype(bool)).astype(np.int64)
+    
+    signals = np.diff(position, axis=0, prepend=np.full((1,) + position.shape[1:], int(bool(initial_position))))
+    return signals
+
+
 class BaseStrategy(ABC):
     """Abstract base class for trading strategies."""
     
@@ -31,6 +73,26 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def generate_panel_signals(self, panel: pd.DataFrame) -> np.ndarray:
+        """
+        Generate trading signals for many symbols at once.
+        
+        The default runs generate_signals per symbol; strategies whose
+        indicators work column-wise on DataFrames override this to process
+        the whole panel in one pass.
+        
+        Args:
+            panel: Aligned OHLCV panel with (field, symbol) MultiIndex columns
+            
+        Returns:
+            (dates x symbols) array of signals: 1 (buy), -1 (sell), 0 (hold)
+        """
+        symbols = panel.columns.get_level_values(1).unique()
+        return np.column_stack([
+            np.asarray(self.generate_signals(panel.xs(symbol, axis=1, level=1)))
+            for symbol in symbols
+        ])
+    
     @abstractmethod
     def get_parameters(self) -> dict:
         """
@@ -46,3 +108,51 @@ class BaseStrategy(ABC):
         params = self.get_parameters()
         param_str = ", ".join(f"{k}={v}" for k, v in params.items())
         return f"{self.name}({param_str})"
+
+
+class EntryExitStrategy(BaseStrategy):
+    """
+    Base class for long/flat strategies defined by entry and exit conditions.
+    
+    Subclasses only describe when to enter and exit; signal generation is
+    resolved with array operations by ``long_flat_signals``.
+    """
+    
+    @abstractmethod
+    def entry_exit_conditions(self, data: pd.DataFrame) -> tuple:
+        """
+        Compute entry and exit conditions for every bar.
+        
+        Args:
+            data: DataFrame with OHLCV data
+            
+        Returns:
+            Tuple of boolean Series/arrays (entries, exits)
+        """
+        pass
+    
+    def generate_signals(self, data: pd.DataFrame) -> pd.Series:
+        """
+        Generate trading signals from entry and exit conditions.
+        
+        Args:
+            data: DataFrame with OHLCV data
+            
+        Returns:
+            Series with signals: 1 (buy), -1 (sell), 0 (hold)
+        """
+        entries, exits = self.entry_exit_conditions(data)
+        return pd.Series(long_flat_signals(entries, exits), index=data.index)
+    
+    def generate_panel_signals(self, panel: pd.DataFrame) -> np.ndarray:
+        """
+        Generate trading signals for every symbol of a panel in one pass.
+        
+        Args:
+            panel: Aligned OHLCV panel with (field, symbol) MultiIndex columns
+            
+        Returns:
+            (dates x symbols) array of signals: 1 (buy), -1 (sell), 0 (hold)
+        """
+        entries, exits = self.entry_exit_conditions(panel)
+        return long_flat_signals(entries, exits)
@@ -2,11 +2,11 @@
 Momentum-based trading strategy.
 """
 import pandas as pd
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import EntryExitStrategy
 from indicators import calculate_momentum
 
 
-class MomentumStrategy(BaseStrategy):
+class MomentumStrategy(EntryExitStrategy):
     """
     Momentum Strategy.
     
@@ -26,40 +26,26 @@ class MomentumStrategy(BaseStrategy):
         self.lookback_period = lookback_period
         self.threshold = threshold * 100  # Convert to percentage
         
-    def generate_signals(self, data: pd.DataFrame) -> pd.Series:
+    def entry_exit_conditions(self, data: pd.DataFrame) -> tuple:
         """
-        Generate trading signals based on momentum.
+        Compute momentum entry and exit conditions.
         
         Args:
             data: DataFrame with OHLCV data
             
         Returns:
-            Series with signals: 1 (buy), -1 (sell), 0 (hold)
+            Tuple of (entries, exits) boolean Series
         """
         # Calculate momentum
         momentum = calculate_momentum(data['Close'], self.lookback_period)
         
-        # Initialize signals
-        signals = pd.Series(0, index=data.index)
+        # Buy signal: strong positive momentum
+        entries = momentum > self.threshold
         
-        # Track position state
-        position = 0  # 0 = no position, 1 = long position
+        # Sell signal: momentum turns negative or weakens significantly
+        exits = (momentum < -self.threshold) | (momentum < self.threshold / 2)
         
-        for i in range(len(data)):
-            if pd.isna(momentum.iloc[i]):
-                continue
-            
-            # Buy signal: strong positive momentum
-            if momentum.iloc[i] > self.threshold and position == 0:
-                signals.iloc[i] = 1
-                position = 1
-            
-            # Sell signal: momentum turns negative or weakens significantly
-            elif (momentum.iloc[i] < -self.threshold or momentum.iloc[i] < self.threshold / 2) and position == 1:
-                signals.iloc[i] = -1
-                position = 0
-        
-        return signals
+        return entries, exits
     
     def get_parameters(self) -> dict:
         """Get strategy parameters."""
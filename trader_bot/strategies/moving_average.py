@@ -1,11 +1,58 @@
 """
 Moving Average Crossover strategy.
 """
+import numpy as np
 import pandas as pd
 from strategies.base_strategy import BaseStrategy
 from indicators import calculate_sma
 
 
+# Moving averages closer than this, relative to the long MA, count as equal.
+# SMA kernels round differently (the cumulative-sum one of sweeps is ~1e-13
+# off the rolling one), and exact ties, common on cent prices, must not be
+# broken by that noise.
+TIE_TOLERANCE = 1e-10
+
+
+def crossover_side(short_ma, long_ma):
+    """
+    Side of the short MA against the long MA.
+    
+    Works on scalars, arrays and Series alike.
+    
+    Args:
+        short_ma: Short moving average value(s)
+        long_ma: Long moving average value(s)
+        
+    Returns:
+        1 above, -1 below, 0 when tied within TIE_TOLERANCE or missing
+    """
+    gap = short_ma - long_ma
+    tolerance = TIE_TOLERANCE * abs(long_ma)
+    return (gap > tolerance) * 1 - (gap < -tolerance)
+
+
+def crossover_signals(short_ma: np.ndarray, long_ma: np.ndarray) -> np.ndarray:
+    """
+    Signal the bars where the short MA crosses the long MA.
+    
+    Array version of MovingAverageStrategy.generate_signals; works on 1D
+    arrays or column-wise on 2D (bars x symbols) arrays.
+    
+    Args:
+        short_ma: Short moving average values
+        long_ma: Long moving average values
+        
+    Returns:
+        Integer array of signals: 1 (buy), -1 (sell), 0 (hold)
+    """
+    short_ma = np.asarray(short_ma, dtype=np.float64)
+    long_ma = np.asarray(long_ma, dtype=np.float64)
+    
+    side = crossover_side(short_ma, long_ma)
+    return np.sign(np.diff(side, axis=0, prepend=side[:1]))
+
+
 class MovingAverageStrategy(BaseStrategy):
     """
     Moving Average Crossover Strategy.
@@ -43,12 +90,14 @@ class MovingAverageStrategy(BaseStrategy):
         # Initialize signals
         signals = pd.Series(0, index=data.index)
         
-        # Generate signals
+        # Generate signals (MAs tied within rounding count as equal)
+        side = crossover_side(short_ma, long_ma)
+        
         # Buy when short MA crosses above long MA
-        signals[short_ma > long_ma] = 1
+        signals[side > 0] = 1
         
         # Sell when short MA crosses below long MA
-        signals[short_ma < long_ma] = -1
+        signals[side < 0] = -1
         
         # Only signal on crossover (change in position)
         signals = signals.diff()
@@ -66,3 +115,17 @@ class MovingAverageStrategy(BaseStrategy):
             'short_window': self.short_window,
             'long_window': self.long_window
         }
+    
+    def generate_panel_signals(self, panel: pd.DataFrame) -> np.ndarray:
+        """
+        Generate crossover signals for every symbol of a panel in one pass.
+        
+        Args:
+            panel: Aligned OHLCV panel with (field, symbol) MultiIndex columns
+            
+        Returns:
+            (dates x symbols) array of signals: 1 (buy), -1 (sell), 0 (hold)
+        """
+        short_ma = calculate_sma(panel['Close'], self.short_window)
+        long_ma = calculate_sma(panel['Close'], self.long_window)
+        return crossover_signals(short_ma, long_ma)
@@ -2,11 +2,11 @@
 RSI (Relative Strength Index) strategy.
 """
 import pandas as pd
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import EntryExitStrategy
 from indicators import calculate_rsi
 
 
-class RSIStrategy(BaseStrategy):
+class RSIStrategy(EntryExitStrategy):
     """
     RSI Strategy.
     
@@ -28,40 +28,26 @@ class RSIStrategy(BaseStrategy):
         self.oversold = oversold
         self.overbought = overbought
         
-    def generate_signals(self, data: pd.DataFrame) -> pd.Series:
+    def entry_exit_conditions(self, data: pd.DataFrame) -> tuple:
         """
-        Generate trading signals based on RSI.
+        Compute RSI entry and exit conditions.
         
         Args:
             data: DataFrame with OHLCV data
             
         Returns:
-            Series with signals: 1 (buy), -1 (sell), 0 (hold)
+            Tuple of (entries, exits) boolean Series
         """
         # Calculate RSI
         rsi = calculate_rsi(data['Close'], self.period)
         
-        # Initialize signals
-        signals = pd.Series(0, index=data.index)
+        # Buy signal: RSI crosses below oversold threshold
+        entries = rsi < self.oversold
         
-        # Track position state
-        position = 0  # 0 = no position, 1 = long position
+        # Sell signal: RSI crosses above overbought threshold
+        exits = rsi > self.overbought
         
-        for i in range(len(data)):
-            if pd.isna(rsi.iloc[i]):
-                continue
-                
-            # Buy signal: RSI crosses below oversold threshold
-            if rsi.iloc[i] < self.oversold and position == 0:
-                signals.iloc[i] = 1
-                position = 1
-            
-            # Sell signal: RSI crosses above overbought threshold
-            elif rsi.iloc[i] > self.overbought and position == 1:
-                signals.iloc[i] = -1
-                position = 0
-        
-        return signals
+        return entries, exits
     
     def get_parameters(self) -> dict:
         """Get strategy parameters."""
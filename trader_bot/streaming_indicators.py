@@ -0,0 +1,461 @@
+"""
+Incremental (streaming) versions of the indicators in indicators.py.
+
+Each indicator keeps a small state and is advanced one bar at a time with
+``update(bar)`` in O(1) (amortized for the min/max windows), which suits
+live loops that append a bar at a time. A bar is either a price or an
+object with ``Close``/``High``/``Low`` fields (attributes or keys).
+
+The rolling windows reproduce the arithmetic of the pandas rolling and
+ewm kernels that the batch functions use (compensated sums, Welford
+variance, NaN handling), so streaming a series yields the same values as
+the batch function on the whole series. Standard deviations agree to
+rounding only: pandas releases accumulate the rolling variance
+differently (pandas 3 leaves a residual spread on windows of identical
+values, which RollingStd reports as zero).
+"""
+from collections import deque
+import math
+
+
+def _field(bar, name: str) -> float:
+    """Read a price field from a bar, or use the bar itself if it is a number."""
+    if isinstance(bar, (int, float)):
+        return float(bar)
+    try:
+        return float(getattr(bar, name))
+    except AttributeError:
+        return float(bar[name])
+
+
+def _divide(a: float, b: float) -> float:
+    """Divide with IEEE semantics (inf/NaN on zero division), like pandas."""
+    if b == 0:
+        if a != a or a == 0:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RollingMean:
+    """Rolling mean over a fixed window, matching ``Series.rolling(window).mean()``."""
+    
+    def __init__(self, window: int):
+        """
+        Initialize state.
+        
+        Args:
+            window: Window size (also the minimum number of observations)
+        """
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._nobs = 0
+        self._neg_ct = 0
+        self._sum = 0.0
+        self._add_compensation = 0.0
+        self._remove_compensation = 0.0
+        self._same_count = 0
+        self._prev_value = math.nan
+        self.value = math.nan
+        
+    def update(self, x: float) -> float:
+        """Add one value and return the mean of the last ``window`` values."""
+        if len(self._values) == self.window:
+            self._remove(self._values[0])
+        elif not self._values:
+            self._prev_value = x
+        self._values.append(x)
+        self._add(x)
+        
+        if self._nobs >= self.window:
+            result = self._sum / self._nobs
+            if self._same_count >= self._nobs:
+                result = self._prev_value
+            elif self._neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self._neg_ct == self._nobs and result > 0:
+                result = 0.0
+            self.value = result
+        else:
+            self.value = math.nan
+            
+        return self.value
+        
+    def _add(self, x: float):
+        """Add a value to the compensated sum."""
+        if x != x:
+            return
+        self._nobs += 1
+        y = x - self._add_compensation
+        t = self._sum + y
+        self._add_compensation = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, x) < 0:
+            self._neg_ct += 1
+        if x == self._prev_value:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev_value = x
+        
+    def _remove(self, x: float):
+        """Remove a value from the compensated sum."""
+        if x != x:
+            return
+        self._nobs -= 1
+        y = -x - self._remove_compensation
+        t = self._sum + y
+        self._remove_compensation = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, x) < 0:
+            self._neg_ct -= 1
+
+
+class RollingStd:
+    """
+    Rolling standard deviation with Welford updates.
+    
+    Matches ``Series.rolling(window).std()`` (ddof=1).
+    """
+    
+    def __init__(self, window: int, ddof: int = 1):
+        """
+        Initialize state.
+        
+        Args:
+            window: Window size (also the minimum number of observations)
+            ddof: Delta degrees of freedom
+        """
+        self.window = window
+        self.ddof = ddof
+        self._values = deque(maxlen=window)
+        self._nobs = 0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._add_compensation = 0.0
+        self._remove_compensation = 0.0
+        self._same_count = 0
+        self._prev_value = math.nan
+        self.value = math.nan
+        
+    def update(self, x: float) -> float:
+        """Add one value and return the std of the last ``window`` values."""
+        if len(self._values) == self.window:
+            self._remove(self._values[0])
+        elif not self._values:
+            self._prev_value = x
+        self._values.append(x)
+        self._add(x)
+        
+        if self._nobs >= self.window and self._nobs > self.ddof:
+            if self._nobs == 1 or self._same_count >= self._nobs:
+                variance = 0.0
+            else:
+                variance = max(self._ssqdm / (self._nobs - self.ddof), 0.0)
+            self.value = math.sqrt(variance)
+        else:
+            self.value = math.nan
+            
+        return self.value
+        
+    def _add(self, x: float):
+        """Add a value to the running mean and sum of squared deviations."""
+        if x != x:
+            return
+        if x == self._prev_value:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev_value = x
+        
+        self._nobs += 1
+        prev_mean = self._mean - self._add_compensation
+        y = x - self._add_compensation
+        t = y - self._mean
+        self._add_compensation = t + self._mean - y
+        self._mean += t / self._nobs
+        self._ssqdm += (x - prev_mean) * (x - self._mean)
+        
+        # A window of identical values has exactly that mean and no spread
+        if self._same_count >= self._nobs:
+            self._mean = x
+            self._ssqdm = 0.0
+            
+    def _remove(self, x: float):
+        """Remove a value from the running mean and sum of squared deviations."""
+        if x != x:
+            return
+        self._nobs -= 1
+        if self._nobs:
+            prev_mean = self._mean - self._remove_compensation
+            y = x - self._remove_compensation
+            t = y - self._mean
+            self._remove_compensation = t + self._mean - y
+            self._mean -= t / self._nobs
+            self._ssqdm -= (x - prev_mean) * (x - self._mean)
+        else:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+
+
+class RollingExtreme:
+    """Rolling min or max over a fixed window using a monotonic deque."""
+    
+    def __init__(self, window: int, mode: str = 'min'):
+        """
+        Initialize state.
+        
+        Args:
+            window: Window size (also the minimum number of observations)
+            mode: 'min' or 'max'
+        """
+        if mode not in ('min', 'max'):
+            raise ValueError(f"Unknown mode: {mode}")
+            
+        self.window = window
+        self.mode = mode
+        self._candidates = deque()  # (position, value), monotonic in value
+        self._nans = deque()  # positions of NaN values inside the window
+        self._count = 0
+        self.value = math.nan
+        
+    def update(self, x: float) -> float:
+        """Add one value and return the min/max of the last ``window`` values."""
+        position = self._count
+        self._count += 1
+        oldest = position - self.window + 1
+        
+        if x != x:
+            self._nans.append(position)
+        elif self.mode == 'min':
+            while self._candidates and self._candidates[-1][1] >= x:
+                self._candidates.pop()
+            self._candidates.append((position, x))
+        else:
+            while self._candidates and self._candidates[-1][1] <= x:
+                self._candidates.pop()
+            self._candidates.append((position, x))
+            
+        while self._candidates and self._candidates[0][0] < oldest:
+            self._candidates.popleft()
+        while self._nans and self._nans[0] < oldest:
+            self._nans.popleft()
+            
+        if oldest >= 0 and not self._nans:
+            self.value = self._candidates[0][1]
+        else:
+            self.value = math.nan
+            
+        return self.value
+
+
+class StreamingSMA:
+    """Incremental ``calculate_sma``."""
+    
+    def __init__(self, window: int):
+        """
+        Initialize indicator.
+        
+        Args:
+            window: Window size
+        """
+        self._mean = RollingMean(window)
+        self.value = math.nan
+        
+    def update(self, bar) -> float:
+        """Add a bar and return the SMA."""
+        self.value = self._mean.update(_field(bar, 'Close'))
+        return self.value
+
+
+class StreamingEMA:
+    """Incremental ``calculate_ema`` (span-based, ``adjust=False``)."""
+    
+    def __init__(self, window: int):
+        """
+        Initialize indicator.
+        
+        Args:
+            window: Span of the EMA
+        """
+        com = (window - 1) / 2.0
+        self.alpha = 1.0 / (1.0 + com)
+        self._old_weight = 1.0
+        self.value = math.nan
+        
+    def update(self, bar) -> float:
+        """Add a bar and return the EMA."""
+        x = _field(bar, 'Close')
+        
+        if self.value != self.value:
+            self.value = x
+        else:
+            # Missing values decay the weight of the previous EMA
+            self._old_weight *= 1.0 - self.alpha
+            if x == x:
+                if self.value != x:
+                    self.value = (self._old_weight * self.value + self.alpha * x) / (self._old_weight + self.alpha)
+                self._old_weight = 1.0
+                
+        return self.value
+
+
+class StreamingRSI:
+    """Incremental ``calculate_rsi`` (simple moving averages of gains and losses)."""
+    
+    def __init__(self, period: int = 14):
+        """
+        Initialize indicator.
+        
+        Args:
+            period: RSI period
+        """
+        self._gain = RollingMean(period)
+        self._loss = RollingMean(period)
+        self._prev_close = math.nan
+        self.value = math.nan
+        
+    def update(self, bar) -> float:
+        """Add a bar and return the RSI (0-100)."""
+        close = _field(bar, 'Close')
+        delta = close - self._prev_close
+        self._prev_close = close
+        
+        # The batch version turns the first (NaN) change into a zero gain and loss
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-delta if delta < 0 else 0.0)
+        
+        rs = _divide(gain, loss)
+        self.value = 100 - 100 / (1 + rs)
+        return self.value
+
+
+class StreamingMACD:
+    """Incremental ``calculate_macd``."""
+    
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        """
+        Initialize indicator.
+        
+        Args:
+            fast: Fast EMA period
+            slow: Slow EMA period
+            signal: Signal line period
+        """
+        self._fast = StreamingEMA(fast)
+        self._slow = StreamingEMA(slow)
+        self._signal = StreamingEMA(signal)
+        self.value = (math.nan, math.nan, math.nan)
+        
+    def update(self, bar) -> tuple:
+        """Add a bar and return (MACD line, signal line, histogram)."""
+        close = _field(bar, 'Close')
+        macd_line = self._fast.update(close) - self._slow.update(close)
+        signal_line = self._signal.update(macd_line)
+        self.value = (macd_line, signal_line, macd_line - signal_line)
+        return self.value
+
+
+class StreamingBollingerBands:
+    """Incremental ``calculate_bollinger_bands``."""
+    
+    def __init__(self, window: int = 20, num_std: float = 2):
+        """
+        Initialize indicator.
+        
+        Args:
+            window: Window size
+            num_std: Number of standard deviations
+        """
+        self.num_std = num_std
+        self._mean = RollingMean(window)
+        self._std = RollingStd(window)
+        self.value = (math.nan, math.nan, math.nan)
+        
+    def update(self, bar) -> tuple:
+        """Add a bar and return (upper band, middle band, lower band)."""
+        close = _field(bar, 'Close')
+        middle = self._mean.update(close)
+        std = self._std.update(close)
+        self.value = (middle + std * self.num_std, middle, middle - std * self.num_std)
+        return self.value
+
+
+class StreamingMomentum:
+    """Incremental ``calculate_momentum``."""
+    
+    def __init__(self, period: int = 20):
+        """
+        Initialize indicator.
+        
+        Args:
+            period: Lookback period
+        """
+        self._closes = deque(maxlen=period + 1)
+        self.value = math.nan
+        
+    def update(self, bar) -> float:
+        """Add a bar and return the momentum (percentage change)."""
+        self._closes.append(_field(bar, 'Close'))
+        
+        if len(self._closes) == self._closes.maxlen:
+            past = self._closes[0]
+            self.value = _divide(self._closes[-1] - past, past) * 100
+        else:
+            self.value = math.nan
+            
+        return self.value
+
+
+class StreamingATR:
+    """Incremental ``calculate_atr``."""
+    
+    def __init__(self, period: int = 14):
+        """
+        Initialize indicator.
+        
+        Args:
+            period: ATR period
+        """
+        self._mean = RollingMean(period)
+        self._prev_close = math.nan
+        self.value = math.nan
+        
+    def update(self, bar) -> float:
+        """Add a bar (with High, Low and Close) and return the ATR."""
+        high = _field(bar, 'High')
+        low = _field(bar, 'Low')
+        
+        # Like DataFrame.max(axis=1), skip true-range terms that are NaN
+        ranges = [r for r in (high - low, abs(high - self._prev_close), abs(low - self._prev_close)) if r == r]
+        true_range = max(ranges) if ranges else math.nan
+        self._prev_close = _field(bar, 'Close')
+        
+        self.value = self._mean.update(true_range)
+        return self.value
+
+
+class StreamingStochastic:
+    """Incremental ``calculate_stochastic``."""
+    
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        """
+        Initialize indicator.
+        
+        Args:
+            k_period: %K period
+            d_period: %D period
+        """
+        self._lowest = RollingExtreme(k_period, 'min')
+        self._highest = RollingExtreme(k_period, 'max')
+        self._d = RollingMean(d_period)
+        self.value = (math.nan, math.nan)
+        
+    def update(self, bar) -> tuple:
+        """Add a bar (with High, Low and Close) and return (%K, %D)."""
+        lowest_low = self._lowest.update(_field(bar, 'Low'))
+        highest_high = self._highest.update(_field(bar, 'High'))
+        
+        k = 100 * _divide(_field(bar, 'Close') - lowest_low, highest_high - lowest_low)
+        self.value = (k, self._d.update(k))
+        return self.value
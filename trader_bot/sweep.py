@@ -0,0 +1,208 @@
+"""
+Parallel parameter sweeps over strategy parameter grids.
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+import pandas as pd
+from backtester import Backtester
+from config import Config
+from data_fetcher import DataFetcher
+from data_sources import get_source
+from indicators import indicator_cache, calculate_sma_windows
+from performance_tracker import PerformanceTracker
+from profiling import profiled, profiler
+from shared_data import SharedPriceData, init_worker, merge_cache_stats, report_progress, set_worker_data, worker_data
+from strategies import MovingAverageStrategy, RSIStrategy, MomentumStrategy
+from strategies.moving_average import crossover_signals
+
+
+STRATEGY_CLASSES = {
+    'ma': MovingAverageStrategy,
+    'rsi': RSIStrategy,
+    'momentum': MomentumStrategy
+}
+
+
+def parameter_grid(grid: Dict[str, list]) -> List[dict]:
+    """
+    Expand a parameter grid into every combination.
+    
+    Args:
+        grid: Dictionary of parameter name -> list of values
+        
+    Returns:
+        List of parameter dictionaries
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def parse_param(spec: str) -> tuple:
+    """
+    Parse a command line parameter spec.
+    
+    Accepts ``name=v1,v2,...`` or an inclusive range ``name=start:stop:step``.
+    
+    Args:
+        spec: Parameter spec string
+        
+    Returns:
+        Tuple of (name, list of values)
+    """
+    name, _, values = spec.partition('=')
+    if not name or not values:
+        raise ValueError(f"Invalid parameter spec: {spec} (expected name=v1,v2 or name=start:stop:step)")
+        
+    def number(text):
+        return int(text) if text.lstrip('-').isdigit() else float(text)
+        
+    if ':' in values:
+        start, stop, step = (number(v) for v in values.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return name, [start + i * step for i in range(count)]
+        
+    return name, [number(v) for v in values.split(',')]
+
+
+def grid_sma_windows(strategy_name: str, combos: List[dict]) -> tuple:
+    """Every moving average window used by a crossover grid (None for other strategies)."""
+    if strategy_name != 'ma':
+        return None
+        
+    windows = set()
+    for params in combos:
+        strategy = STRATEGY_CLASSES['ma'](**params)
+        windows.update((strategy.short_window, strategy.long_window))
+    return tuple(sorted(windows))
+
+
+@profiled('signals')
+def strategy_signals(strategy, data: pd.DataFrame, sma_windows: tuple = None):
+    """
+    Generate a strategy's signals on one symbol's data.
+    
+    With ``sma_windows``, moving average crossovers are read from one SMA
+    matrix holding every window of the grid, instead of computing both
+    averages for each parameter set.
+    """
+    if not sma_windows:
+        return strategy.generate_signals(data)
+        
+    sma = calculate_sma_windows(data['Close'], sma_windows)
+    return crossover_signals(sma[:, sma_windows.index(strategy.short_window)],
+                             sma[:, sma_windows.index(strategy.long_window)])
+
+
+def _run_params(strategy_name: str, params: dict, initial_capital: float, config: Config,
+                sma_windows: tuple = None) -> tuple:
+    """
+    Backtest one parameter set on every loaded symbol.
+    
+    Returns:
+        Tuple of (result rows, process id, indicator cache stats of the process)
+    """
+    strategy = STRATEGY_CLASSES[strategy_name](**params)
+    rows = []
+    
+    for symbol, data in worker_data.items():
+        signals = strategy_signals(strategy, data, sma_windows) if sma_windows else None
+        backtester = Backtester(strategy, initial_capital, config, engine='vectorized', verbose=False)
+        results = backtester.run_data(symbol, data, signals)
+        metrics = PerformanceTracker.calculate_metrics(
+            results['equity_curve'], results['trade_history'], initial_capital, results['round_trips']
+        )
+        rows.append({**params, 'symbol': symbol, **metrics})
+        
+    return rows, os.getpid(), indicator_cache.stats()
+
+
+class ParameterSweep:
+    """Runs a strategy over a parameter grid across a process pool."""
+    
+    def __init__(self, strategy_name: str, grid: Dict[str, list], initial_capital: float = 100000,
+                 config: Config = None, jobs: int = None, source_name: str = None):
+        """
+        Initialize sweep.
+        
+        Args:
+            strategy_name: Strategy key ('ma', 'rsi', 'momentum')
+            grid: Dictionary of parameter name -> list of values
+            initial_capital: Starting capital per run
+            config: Configuration object
+            jobs: Number of worker processes (None = CPU count, 1 = in-process)
+            source_name: Data source name (defaults to Config.DATA_SOURCE)
+        """
+        if strategy_name not in STRATEGY_CLASSES:
+            raise ValueError(f"Unknown strategy: {strategy_name}")
+            
+        self.strategy_name = strategy_name
+        self.grid = grid
+        self.initial_capital = initial_capital
+        self.config = config or Config()
+        self.jobs = jobs
+        self.source_name = source_name or self.config.DATA_SOURCE
+        self.cache_stats = {}
+        
+    def run(self, symbols: List[str], start_date: str, end_date: str,
+            metric: str = 'sharpe_ratio') -> pd.DataFrame:
+        """
+        Run every parameter combination on every symbol.
+        
+        Args:
+            symbols: Stock symbols to test
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            metric: PerformanceTracker metric to rank by (descending)
+            
+        Returns:
+            DataFrame with one row per (parameters, symbol), best first
+        """
+        combos = parameter_grid(self.grid)
+        sma_windows = grid_sma_windows(self.strategy_name, combos)
+        
+        # Load once in the parent; workers attach to a shared copy
+        data_fetcher = DataFetcher(self.config.DATA_CACHE_DIR, source=get_source(self.source_name))
+        data = data_fetcher.get_multiple_symbols(symbols, start_date, end_date)
+        
+        print(f"\nSweeping {len(combos)} parameter sets x {len(symbols)} symbols...")
+        results = [None] * len(combos)
+        worker_stats = {}
+        started = time.perf_counter()
+        
+        with profiler.stage('execution'):
+            if self.jobs == 1:
+                set_worker_data(data)
+                baseline = indicator_cache.stats()
+                for i, params in enumerate(combos):
+                    results[i], _, stats = _run_params(
+                        self.strategy_name, params, self.initial_capital, self.config, sma_windows
+                    )
+                    report_progress(i + 1, len(combos), started)
+                worker_stats[os.getpid()] = {key: stats[key] - baseline[key] for key in ('hits', 'misses')}
+            else:
+                with SharedPriceData.publish(data) as shared, ProcessPoolExecutor(
+                    max_workers=self.jobs, initializer=init_worker, initargs=(shared.spec,)
+                ) as pool:
+                    futures = {
+                        pool.submit(
+                            _run_params, self.strategy_name, params, self.initial_capital, self.config, sma_windows
+                        ): i
+                        for i, params in enumerate(combos)
+                    }
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        results[futures[future]], pid, worker_stats[pid] = future.result()
+                        report_progress(done, len(combos), started)
+                    
+        self.cache_stats = stats = merge_cache_stats(worker_stats)
+        print(f"Indicator cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1f}% hit rate)")
+        
+        # Keep grid order for ties so the ranking is deterministic
+        rows = [row for result in results for row in result]
+        table = pd.DataFrame(rows)
+        if table.empty:
+            return table
+            
+        return table.sort_values(metric, ascending=False, kind='stable').reset_index(drop=True)
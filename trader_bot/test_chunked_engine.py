@@ -0,0 +1,79 @@
+"""
+Tests for chunked out-of-core backtests.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from chunked_engine import run_chunked
+from column_store import iter_blocks, read_frame, write_frame
+from data_sources import SyntheticSource
+from indicators import indicator_cache
+from round_trips import block_excursions, match_round_trips
+from strategies import MovingAverageStrategy, RSIStrategy, MomentumStrategy
+
+
+class ChunkedEngineTest(unittest.TestCase):
+    """Streaming a stored frame in blocks must reproduce the in-memory loop engine."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name) / 'AAPL'
+        write_frame(self.directory, SyntheticSource(seed=0).fetch('AAPL', '2000-01-01', '2024-01-01'))
+        # In-memory runs get the stored bars, as Backtester.run does from the cache
+        self.data = read_frame(self.directory, mmap=False)
+        
+    def tearDown(self):
+        self.tmp.cleanup()
+        indicator_cache.clear()
+        
+    def run_chunked(self, strategy, block_bars: int, start: int = 0, stop: int = None) -> dict:
+        return run_chunked(strategy, 'AAPL', self.directory, start=start, stop=stop, block_bars=block_bars,
+                           equity_dir=Path(self.tmp.name) / 'equity', verbose=False)
+        
+    def test_block_sizes(self):
+        # Blocks smaller than the series, not dividing it, and holding all of it
+        n = len(self.data)
+        for strategy in (MovingAverageStrategy(), RSIStrategy(), MomentumStrategy()):
+            for start, stop in ((0, n), (250, n - 100)):
+                loop = Backtester(strategy, engine='loop', verbose=False).run_data('AAPL', self.data[start:stop])
+                for block_bars in (1000, 997, stop - start):
+                    with self.subTest(strategy=str(strategy), start=start, block_bars=block_bars):
+                        chunked = self.run_chunked(strategy, block_bars, start, stop)
+                        
+                        equity = read_frame(chunked['equity_path'])
+                        np.testing.assert_array_equal(equity.index, loop['equity_curve']['date'])
+                        for column in ('value', 'cash', 'positions_value'):
+                            np.testing.assert_array_equal(equity[column].to_numpy(),
+                                                          loop['equity_curve'][column].to_numpy(), err_msg=column)
+                            
+                        pd.testing.assert_frame_equal(pd.DataFrame(chunked['trade_history']),
+                                                      pd.DataFrame(loop['trade_history']))
+                        pd.testing.assert_frame_equal(pd.DataFrame(chunked['round_trips']),
+                                                      pd.DataFrame(loop['round_trips']))
+                        for metric in ('final_value', 'total_return', 'buy_hold_return', 'max_drawdown',
+                                       'total_trades', 'win_rate'):
+                            self.assertEqual(chunked[metric], loop[metric], metric)
+                        # Per-block variances are merged, so the Sharpe ratio differs by rounding
+                        self.assertAlmostEqual(chunked['sharpe_ratio'], loop['sharpe_ratio'], places=12)
+                        
+    def test_block_excursions(self):
+        # Many overlapping trips from random signals with scaling in and partial exits
+        rng = np.random.default_rng(0)
+        signals = rng.choice([0] * 8 + [1, 1, -1], len(self.data))
+        backtester = Backtester(MovingAverageStrategy(), verbose=False)
+        trades = backtester.run_data('AAPL', self.data, signals)['trade_history']
+        expected = pd.DataFrame(match_round_trips(trades, prices=self.data))
+        self.assertGreater(len(expected), 100)
+        
+        for block_bars in (1, 7, 1000, 997, len(self.data), 2 * len(self.data)):
+            with self.subTest(block_bars=block_bars):
+                blocks = iter_blocks(self.directory, block_bars, columns=['Low', 'High', 'Close'])
+                round_trips = block_excursions(match_round_trips(trades), blocks)
+                pd.testing.assert_frame_equal(pd.DataFrame(round_trips), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
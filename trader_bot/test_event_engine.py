@@ -0,0 +1,71 @@
+"""
+Tests for the event-driven backtest engine.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from data_sources import SyntheticSource
+from event_engine import EventStrategy, as_event_strategy
+from indicators import indicator_cache
+from strategies import MovingAverageStrategy, RSIStrategy, MomentumStrategy
+
+
+METRICS = ('final_value', 'total_return', 'sharpe_ratio', 'max_drawdown', 'total_trades', 'win_rate')
+
+
+class ReplaySignals(EventStrategy):
+    """Event strategy returning given signals bar by bar."""
+    
+    def __init__(self, signals: np.ndarray):
+        super().__init__()
+        self.signals = signals.tolist()
+        
+    def on_bar(self, bar, portfolio) -> int:
+        return self.signals[bar.index]
+
+
+class EventEngineEquivalenceTest(unittest.TestCase):
+    """The event engine must reproduce the loop engine exactly."""
+    
+    def assertSameResults(self, loop: dict, event: dict):
+        for column in ('date', 'value', 'cash', 'positions_value'):
+            np.testing.assert_array_equal(event['equity_curve'][column].to_numpy(),
+                                          loop['equity_curve'][column].to_numpy(), err_msg=column)
+        pd.testing.assert_frame_equal(pd.DataFrame(event['trade_history']), pd.DataFrame(loop['trade_history']))
+        for metric in METRICS:
+            self.assertEqual(event[metric], loop[metric], metric)
+            
+    def test_strategies(self):
+        # Streaming adapters for the built-in strategies, and precomputed signals
+        for seed in range(3):
+            data = SyntheticSource(seed=seed).fetch('AAPL', '2000-01-01', '2024-01-01')
+            # Prices in cents make indicator ties, where rounding decides crossovers
+            for name, frame in (('synthetic', data), ('cents', data.round(2))):
+                for strategy in (MovingAverageStrategy(), MovingAverageStrategy(5, 20), RSIStrategy(),
+                                 MomentumStrategy()):
+                    loop = Backtester(strategy, engine='loop', verbose=False).run_data('AAPL', frame)
+                    self.assertGreater(loop['total_trades'], 0)
+                    for event_strategy in (as_event_strategy(strategy), as_event_strategy(strategy, streaming=False)):
+                        with self.subTest(seed=seed, data=name, strategy=str(strategy),
+                                          adapter=type(event_strategy).__name__):
+                            event = Backtester(event_strategy, engine='event', verbose=False).run_data('AAPL', frame)
+                            self.assertSameResults(loop, event)
+                            
+    def test_random_signals(self):
+        # Repeated buys scale in until the position limit; sells while flat are ignored
+        data = SyntheticSource(seed=1).fetch('AAPL', '2010-01-01', '2024-01-01')
+        rng = np.random.default_rng(0)
+        for k in range(10):
+            signals = rng.choice([0] * 8 + [1, 1, -1], len(data))
+            with self.subTest(k=k):
+                loop = Backtester(MovingAverageStrategy(), engine='loop', verbose=False).run_data('AAPL', data, signals)
+                event = Backtester(ReplaySignals(signals), engine='event', verbose=False).run_data('AAPL', data)
+                self.assertSameResults(loop, event)
+                
+    def tearDown(self):
+        indicator_cache.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests for the indicator cache.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+import indicators
+from indicators import indicator_cache
+from data_sources import SyntheticSource
+
+
+def parts(result) -> tuple:
+    """The arrays of an indicator result, which is one array or a tuple of them."""
+    return result if isinstance(result, tuple) else (result,)
+
+
+class IndicatorCacheTest(unittest.TestCase):
+    """Cached results must behave like freshly computed ones."""
+    
+    def setUp(self):
+        indicator_cache.clear()
+        self.data = SyntheticSource(seed=0).fetch('AAPL', '2015-01-01', '2024-01-01')
+        
+    def tearDown(self):
+        indicator_cache.clear()
+        
+    def test_results_are_owned_by_caller(self):
+        calls = {
+            'sma': lambda: indicators.calculate_sma(self.data['Close'], 20),
+            'macd': lambda: indicators.calculate_macd(self.data['Close']),
+            'sma_windows': lambda: indicators.calculate_sma_windows(self.data['Close'], [5, 20, 50])
+        }
+        for name, call in calls.items():
+            with self.subTest(indicator=name):
+                first = call()
+                expected = [np.array(part, copy=True) for part in parts(first)]
+                # Miss and hit results can both be written without touching the stored one
+                for result in (first, call()):
+                    for part in parts(result):
+                        part[:] = 0
+                for part, values in zip(parts(call()), expected):
+                    np.testing.assert_array_equal(np.asarray(part), values)
+                    
+    def test_column_access_hits(self):
+        # Each column access gives a new Series (and, under pandas 3, a new index view)
+        indicators.calculate_sma(self.data['Close'], 20)
+        indicators.calculate_sma(self.data['Close'], 20)
+        self.assertEqual(indicator_cache.stats()['hits'], 1)
+        
+    def test_changed_data_misses(self):
+        close = self.data['Close']
+        expected = indicators.calculate_sma(close, 5)
+        shifted = close.copy()
+        shifted.index = shifted.index + pd.Timedelta(days=1)
+        changed = close.copy()
+        changed.iloc[-1] += 1.0
+        for name, data in (('index', shifted), ('values', changed)):
+            with self.subTest(changed=name):
+                result = indicators.calculate_sma(data, 5)
+                pd.testing.assert_series_equal(result, data.rolling(5).mean())
+        self.assertEqual(indicator_cache.stats()['hits'], 0)
+        pd.testing.assert_series_equal(indicators.calculate_sma(close, 5), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
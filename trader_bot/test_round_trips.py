@@ -0,0 +1,108 @@
+"""
+Tests for round-trip matching.
+"""
+import unittest
+from collections import deque
+import numpy as np
+import pandas as pd
+from round_trips import ROUND_TRIP_COLUMNS, match_round_trips
+
+
+def ledger(rows: list) -> pd.DataFrame:
+    """Trades from (date, symbol, action, shares, price) rows, without commissions."""
+    trades = pd.DataFrame(rows, columns=['date', 'symbol', 'action', 'shares', 'price'])
+    trades['date'] = pd.to_datetime(trades['date'])
+    trades['commission'] = 0.0
+    return trades
+
+
+def reference_round_trips(trades: pd.DataFrame) -> list:
+    """FIFO matching one trade at a time, as (symbol, entry, exit, shares) in exit order."""
+    lots = {}
+    matched = []
+    for i, trade in enumerate(trades.itertuples()):
+        queue = lots.setdefault(trade.symbol, deque())
+        if trade.action == 'BUY':
+            queue.append([i, trade.shares])
+            continue
+            
+        remaining = trade.shares
+        while remaining and queue:
+            size = min(remaining, queue[0][1])
+            matched.append((trade.symbol, queue[0][0], i, size))
+            remaining -= size
+            queue[0][1] -= size
+            if not queue[0][1]:
+                queue.popleft()
+    return matched
+
+
+class MatchRoundTripsTest(unittest.TestCase):
+    
+    def test_oversell_is_ignored(self):
+        trades = ledger([
+            ('2020-01-06', 'AAA', 'BUY', 10, 10.0),
+            ('2020-01-07', 'AAA', 'SELL', 10, 11.0),
+            ('2020-01-07', 'AAA', 'SELL', 5, 12.0),
+            ('2020-01-08', 'AAA', 'BUY', 5, 13.0),
+        ])
+        trips = match_round_trips(trades)
+        
+        self.assertEqual(trips['shares'].tolist(), [10])
+        self.assertEqual(trips['pnl'].tolist(), [10.0])
+        self.assertTrue((trips['holding_period'] >= np.timedelta64(0)).all())
+        
+    def test_scale_in_and_partial_exits(self):
+        trades = ledger([
+            ('2020-01-06', 'AAA', 'BUY', 10, 10.0),
+            ('2020-01-07', 'AAA', 'BUY', 10, 11.0),
+            ('2020-01-08', 'AAA', 'SELL', 15, 13.0),
+            ('2020-01-09', 'AAA', 'SELL', 5, 15.0),
+        ])
+        trips = match_round_trips(trades)
+        
+        self.assertEqual(trips['shares'].tolist(), [10, 5, 5])
+        self.assertEqual(trips['entry_price'].tolist(), [10.0, 11.0, 11.0])
+        self.assertEqual(trips['exit_price'].tolist(), [13.0, 13.0, 15.0])
+        self.assertEqual(trips['pnl'].tolist(), [30.0, 10.0, 20.0])
+        
+    def test_matches_sequential_fifo(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            n = int(rng.integers(1, 30))
+            trades = ledger([
+                (pd.Timestamp('2020-01-01') + pd.Timedelta(days=i), str(rng.choice(['AAA', 'BBB', 'CCC'])),
+                 str(rng.choice(['BUY', 'SELL'])), int(rng.integers(1, 20)), float(rng.integers(5, 50)))
+                for i in range(n)
+            ])
+            trips = match_round_trips(trades)
+            index = {date: i for i, date in enumerate(trades['date'])}
+            
+            matched = sorted(zip(trips['symbol'], [index[d] for d in trips['entry_date']],
+                                 [index[d] for d in trips['exit_date']], trips['shares'].tolist()),
+                             key=lambda trip: (trip[2], trip[1]))
+            self.assertEqual(matched, reference_round_trips(trades))
+            
+    def test_ledger_forms(self):
+        # A trade list, a DataFrame and a dictionary of columns give the same arrays
+        trades = ledger([
+            ('2020-01-06', 'AAA', 'BUY', 10, 10.0),
+            ('2020-01-06', 'BBB', 'BUY', 4, 50.0),
+            ('2020-01-07', 'AAA', 'SELL', 6, 12.0),
+            ('2020-01-08', 'BBB', 'SELL', 4, 45.0),
+            ('2020-01-09', 'AAA', 'SELL', 4, 9.0),
+        ])
+        trades['total'] = trades['shares'] * trades['price']
+        columns = {name: trades[name].to_numpy() for name in trades.columns}
+        columns['action'] = np.where(columns['action'] == 'BUY', 1, -1)
+        
+        expected = match_round_trips(trades)
+        self.assertEqual(list(expected), ROUND_TRIP_COLUMNS)
+        self.assertEqual(expected['pnl'].tolist(), [12.0, -20.0, -4.0])
+        for name, form in (('list', trades.to_dict('records')), ('columns', columns)):
+            with self.subTest(form=name):
+                pd.testing.assert_frame_equal(pd.DataFrame(match_round_trips(form)), pd.DataFrame(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
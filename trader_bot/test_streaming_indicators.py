@@ -0,0 +1,87 @@
+"""
+Tests for the streaming indicators.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+import indicators
+import streaming_indicators as streaming
+from data_sources import SyntheticSource
+
+
+def stream(indicator, data: pd.DataFrame) -> np.ndarray:
+    """Feed every bar of a frame to a streaming indicator and stack its values."""
+    return np.array([indicator.update(bar) for bar in data.itertuples()], dtype=np.float64)
+
+
+class StreamingIndicatorsTest(unittest.TestCase):
+    """Streaming a series must give the values of the batch function."""
+    
+    def setUp(self):
+        indicators.indicator_cache.clear()
+        data = SyntheticSource(seed=3).fetch('AAPL', '2010-01-01', '2024-01-01')
+        # Gaps and flat stretches exercise the NaN and identical-value paths
+        data.iloc[100:103] = np.nan
+        data.iloc[500:530, :4] = data.iloc[499, :4].to_numpy()
+        data.iloc[700] = np.nan
+        self.frames = {
+            'synthetic': data,
+            'cents': data.round(2)
+        }
+        
+    def tearDown(self):
+        indicators.indicator_cache.clear()
+        
+    def assertStreams(self, indicator_factory, batch, rtol: float = 0):
+        for name, data in self.frames.items():
+            with self.subTest(data=name):
+                expected = batch(data)
+                values = stream(indicator_factory(), data)
+                if not isinstance(expected, tuple):
+                    values, expected = values[:, None], (expected,)
+                for i, series in enumerate(expected):
+                    if rtol:
+                        np.testing.assert_allclose(values[:, i], series.to_numpy(), rtol=rtol)
+                    else:
+                        np.testing.assert_array_equal(values[:, i], series.to_numpy())
+                        
+    def test_sma(self):
+        for window in (1, 5, 20, 200):
+            with self.subTest(window=window):
+                self.assertStreams(lambda: streaming.StreamingSMA(window),
+                                   lambda data: indicators.calculate_sma(data['Close'], window))
+                
+    def test_ema(self):
+        for window in (2, 12, 50):
+            with self.subTest(window=window):
+                self.assertStreams(lambda: streaming.StreamingEMA(window),
+                                   lambda data: indicators.calculate_ema(data['Close'], window))
+                
+    def test_rsi(self):
+        for period in (2, 14):
+            with self.subTest(period=period):
+                self.assertStreams(lambda: streaming.StreamingRSI(period),
+                                   lambda data: indicators.calculate_rsi(data['Close'], period))
+                
+    def test_macd(self):
+        self.assertStreams(streaming.StreamingMACD, lambda data: indicators.calculate_macd(data['Close']))
+        
+    def test_bollinger_bands(self):
+        # The bands carry the rolling std, which pandas versions round differently
+        self.assertStreams(streaming.StreamingBollingerBands,
+                           lambda data: indicators.calculate_bollinger_bands(data['Close']), rtol=1e-7)
+        
+    def test_momentum(self):
+        self.assertStreams(streaming.StreamingMomentum, lambda data: indicators.calculate_momentum(data['Close']))
+        
+    def test_atr(self):
+        self.assertStreams(streaming.StreamingATR,
+                           lambda data: indicators.calculate_atr(data['High'], data['Low'], data['Close']))
+        
+    def test_stochastic(self):
+        self.assertStreams(streaming.StreamingStochastic,
+                           lambda data: indicators.calculate_stochastic(data['High'], data['Low'], data['Close']))
+
+
+if __name__ == '__main__':
+    unittest.main()
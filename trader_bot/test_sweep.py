@@ -0,0 +1,35 @@
+"""
+Tests for parameter sweeps.
+"""
+import unittest
+import numpy as np
+from data_sources import SyntheticSource
+from indicators import indicator_cache
+from sweep import STRATEGY_CLASSES, grid_sma_windows, parameter_grid, strategy_signals
+
+
+class BatchedSignalsTest(unittest.TestCase):
+    """Signals from the batched SMA matrix must equal the strategy's own."""
+    
+    def test_crossover_signals_match_strategy(self):
+        combos = parameter_grid({'short_window': list(range(5, 55, 5)), 'long_window': [50, 100, 150, 200]})
+        windows = grid_sma_windows('ma', combos)
+        
+        for seed in range(6):
+            data = SyntheticSource(seed=seed).fetch('AAPL', '2000-01-01', '2024-01-01')
+            # Cent-rounded prices make exact short/long ties common
+            data['Close'] = data['Close'].round(2)
+            for params in combos:
+                strategy = STRATEGY_CLASSES['ma'](**params)
+                with self.subTest(seed=seed, **params):
+                    np.testing.assert_array_equal(
+                        strategy_signals(strategy, data, windows),
+                        strategy.generate_signals(data).to_numpy()
+                    )
+                    
+    def tearDown(self):
+        indicator_cache.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
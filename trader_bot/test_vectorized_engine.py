@@ -0,0 +1,78 @@
+"""
+Tests for the vectorized backtest engine.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from data_sources import SyntheticSource
+from indicators import indicator_cache
+from risk_exits import RiskExits
+from strategies import MovingAverageStrategy, RSIStrategy, MomentumStrategy
+
+
+METRICS = ('final_value', 'total_return', 'sharpe_ratio', 'max_drawdown', 'total_trades', 'win_rate')
+
+
+def run_engines(strategy, data: pd.DataFrame, signals=None, **kwargs) -> dict:
+    """Results of the loop and vectorized engines on the same data, keyed by engine."""
+    return {
+        engine: Backtester(strategy, engine=engine, verbose=False, **kwargs).run_data('AAPL', data, signals)
+        for engine in ('loop', 'vectorized')
+    }
+
+
+class EngineEquivalenceTest(unittest.TestCase):
+    """The vectorized engine must reproduce the loop engine exactly."""
+    
+    def assertSameResults(self, loop: dict, vectorized: dict):
+        for column in ('date', 'value', 'cash', 'positions_value'):
+            np.testing.assert_array_equal(vectorized['equity_curve'][column].to_numpy(),
+                                          loop['equity_curve'][column].to_numpy(), err_msg=column)
+        pd.testing.assert_frame_equal(pd.DataFrame(vectorized['trade_history']),
+                                      pd.DataFrame(loop['trade_history']))
+        for metric in METRICS:
+            self.assertEqual(vectorized[metric], loop[metric], metric)
+            
+    def test_strategies(self):
+        for seed in range(3):
+            data = SyntheticSource(seed=seed).fetch('AAPL', '2000-01-01', '2024-01-01')
+            for strategy in (MovingAverageStrategy(), MovingAverageStrategy(5, 20), RSIStrategy(),
+                             MomentumStrategy()):
+                with self.subTest(seed=seed, strategy=str(strategy)):
+                    results = run_engines(strategy, data)
+                    self.assertGreater(results['loop']['total_trades'], 0)
+                    self.assertSameResults(results['loop'], results['vectorized'])
+                    
+    def test_random_signals(self):
+        # Repeated buys scale in until the position limit; sells while flat are ignored
+        data = SyntheticSource(seed=1).fetch('AAPL', '2010-01-01', '2024-01-01')
+        rng = np.random.default_rng(0)
+        for k in range(10):
+            signals = rng.choice([0] * 8 + [1, 1, -1], len(data))
+            with self.subTest(k=k):
+                results = run_engines(MovingAverageStrategy(), data, signals)
+                self.assertSameResults(results['loop'], results['vectorized'])
+                
+    def test_risk_exits(self):
+        # Random signals often buy on the bar of a risk exit, reopening the position
+        data = SyntheticSource(seed=0).fetch('AAPL', '2000-01-01', '2024-01-01')
+        rng = np.random.default_rng(1)
+        for risk_exits in (RiskExits(stop_loss=0.05), RiskExits(take_profit=0.1), RiskExits(trailing_stop=0.08),
+                           RiskExits(0.05, 0.1, 0.08)):
+            runs = [(str(strategy), strategy, None) for strategy in (MovingAverageStrategy(), RSIStrategy(),
+                                                                     MomentumStrategy())]
+            runs += [(f"random {k}", MovingAverageStrategy(), rng.choice([0] * 8 + [1, 1, -1], len(data)))
+                     for k in range(5)]
+            for name, strategy, signals in runs:
+                with self.subTest(risk_exits=str(risk_exits), run=name):
+                    results = run_engines(strategy, data, signals, risk_exits=risk_exits)
+                    self.assertSameResults(results['loop'], results['vectorized'])
+                    self.assertEqual(results['vectorized']['risk_exits'], results['loop']['risk_exits'])
+                    
+    def tearDown(self):
+        indicator_cache.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Vectorized backtest engine working directly on NumPy arrays.
+
+Only bars with a non-zero signal can change the portfolio, so the engine
+visits those bars alone to size and fill orders, then expands cash and
+share holdings to every bar with array operations. Fills use the same
+slippage, commission and position-size rules as OrderExecutor/Portfolio,
+evaluated in the same order, so results match the per-bar loop in
+Backtester exactly.
+
+With risk exits, the stretch of bars between two signal bars is scanned
+for the first stop or target hit with RiskExits.scan before the later
+signal is filled.
+"""
+import numpy as np
+from config import Config
+from risk_exits import RiskExits
+
+
+BUY = 1
+SELL = -1
+
+
+def simulate_signals(signals: np.ndarray, close: np.ndarray, initial_capital: float,
+                     config: Config = None, allocation_pct: float = 0.1,
+                     close_at_end: bool = True, risk_exits: RiskExits = None, bars: tuple = None) -> dict:
+    """
+    Simulate trading a single symbol from a signal array.
+    
+    Args:
+        signals: Array of signals: 1 (buy), -1 (sell), 0 (hold)
+        close: Array of close prices aligned with signals
+        initial_capital: Starting cash balance
+        config: Configuration object (slippage, commission, position limit)
+        allocation_pct: Fraction of portfolio value allocated per buy
+        close_at_end: Sell any open position at the last close
+        risk_exits: Stop-loss, take-profit and trailing-stop rules
+        bars: Tuple of (open, high, low) arrays to check risk exits against
+              (see risk_exits.price_arrays)
+        
+    Returns:
+        Dictionary with per-bar 'cash', 'shares', 'value', 'positions_value'
+        arrays, trade arrays ('trade_bar', 'trade_action', 'trade_shares',
+        'trade_price', 'trade_commission', 'trade_total'), the 'final_cash'
+        and 'final_shares' after closing, 'closed_at_end' telling
+        whether the last trade is the closing sell, and 'exit_reasons'
+        mapping the index of every risk exit trade to its reason
+    """
+    config = config or Config()
+    signals = np.asarray(signals)
+    close = np.asarray(close, dtype=np.float64)
+    n_bars = len(close)
+    
+    buy_slippage = 1 + config.SLIPPAGE_RATE
+    sell_slippage = 1 - config.SLIPPAGE_RATE
+    commission_rate = config.COMMISSION_RATE
+    max_position = config.MAX_POSITION_SIZE
+    
+    cash = initial_capital
+    shares = 0
+    
+    # Holdings change only at trade bars; record the state after each one
+    change_bars = [0]
+    change_cash = [cash]
+    change_shares = [shares]
+    trades = []
+    
+    def record_change(bar):
+        if change_bars[-1] == bar:
+            change_cash[-1] = cash
+            change_shares[-1] = shares
+        else:
+            change_bars.append(bar)
+            change_cash.append(cash)
+            change_shares.append(shares)
+            
+    def sell(bar, price):
+        nonlocal cash, shares
+        execution_price = price * sell_slippage
+        commission = execution_price * shares * commission_rate
+        total = execution_price * shares - commission
+        
+        cash += total
+        trades.append((bar, SELL, shares, execution_price, commission, total))
+        shares = 0
+        
+    # Open position state for risk exits: average fill price, highest price
+    # since entry and the first bar not yet checked
+    exit_reasons = {}
+    basis = peak = 0.0
+    scan_from = 0
+    if risk_exits:
+        open_, high, low = bars
+        
+    def check_exits(stop):
+        nonlocal peak
+        exit_bar, fill_price, reason, peak = risk_exits.scan(open_, high, low, scan_from, stop, basis, peak)
+        if exit_bar >= 0:
+            sell(exit_bar, fill_price)
+            exit_reasons[len(trades) - 1] = reason
+            record_change(exit_bar)
+            
+    event_bars = np.flatnonzero(signals)
+    event_signals = signals[event_bars].tolist()
+    event_prices = close[event_bars].tolist()
+    
+    for bar, signal, price in zip(event_bars.tolist(), event_signals, event_prices):
+        if risk_exits and shares > 0:
+            check_exits(bar + 1)
+        scan_from = bar + 1
+        
+        if signal == BUY:
+            # OrderExecutor.calculate_shares_to_buy
+            portfolio_value = cash + shares * price if shares else cash
+            target_value = portfolio_value * allocation_pct
+            execution_price = price * buy_slippage
+            order_shares = max(1, int(target_value / (execution_price * (1 + commission_rate))))
+            
+            # Portfolio.can_buy, valued at the execution price
+            cost = execution_price * order_shares
+            if cost > cash:
+                continue
+            current_value = cash + shares * execution_price if shares else cash
+            if shares * execution_price + cost > current_value * max_position:
+                continue
+                
+            # Portfolio.buy
+            commission = execution_price * order_shares * commission_rate
+            total = cost + commission
+            if total > cash:
+                continue
+                
+            cash -= total
+            if shares:
+                # Portfolio.buy averages the fill prices
+                basis = (shares * basis + execution_price * order_shares) / (shares + order_shares)
+            else:
+                basis, peak = execution_price, price
+            shares += order_shares
+            trades.append((bar, BUY, order_shares, execution_price, commission, total))
+            
+        elif signal == SELL and shares > 0:
+            sell(bar, price)
+            
+        else:
+            continue
+            
+        record_change(bar)
+        
+    if risk_exits and shares > 0:
+        check_exits(n_bars)
+        
+    # Expand the step functions of cash and shares to every bar
+    steps = np.searchsorted(np.asarray(change_bars), np.arange(n_bars), side='right') - 1
+    cash_curve = np.asarray(change_cash)[steps]
+    shares_curve = np.asarray(change_shares, dtype=np.int64)[steps]
+    value = cash_curve + shares_curve * close
+    
+    closed_at_end = close_at_end and shares > 0 and n_bars > 0
+    if closed_at_end:
+        sell(n_bars - 1, close[-1].item())
+        
+    trade_columns = list(zip(*trades)) if trades else [()] * 6
+    
+    return {
+        'cash': cash_curve,
+        'shares': shares_curve,
+        'value': value,
+        'positions_value': value - cash_curve,
+        'trade_bar': np.asarray(trade_columns[0], dtype=np.int64),
+        'trade_action': np.asarray(trade_columns[1], dtype=np.int8),
+        'trade_shares': np.asarray(trade_columns[2], dtype=np.int64),
+        'trade_price': np.asarray(trade_columns[3], dtype=np.float64),
+        'trade_commission': np.asarray(trade_columns[4], dtype=np.float64),
+        'trade_total': np.asarray(trade_columns[5], dtype=np.float64),
+        'final_cash': cash,
+        'final_shares': shares,
+        'closed_at_end': closed_at_end,
+        'exit_reasons': exit_reasons
+    }
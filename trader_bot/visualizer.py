@@ -6,19 +6,56 @@ from plotly.subplots import make_subplots
 import pandas as pd
 from typing import Dict, List
 from pathlib import Path
+from config import Config
+from downsample import downsample
+from performance_tracker import PerformanceTracker, ROLLING_WINDOWS
+from profiling import profiled
 
 
 class Visualizer:
-    """Creates interactive visualizations of trading results."""
+    """
+    Creates interactive visualizations of trading results.
+    
+    Line traces are downsampled with LTTB to ``max_points`` points
+    (Config.PLOT_MAX_POINTS by default) and drawn with WebGL once they are
+    longer than Config.PLOT_WEBGL_THRESHOLD, so HTML size and render time
+    stay bounded however many bars a backtest has.
+    """
     
     @staticmethod
-    def plot_equity_curve(results: Dict, output_file: str = None) -> go.Figure:
+    def _line(x, y, max_points: int = None, **kwargs):
+        """
+        Create a line trace downsampled to a point budget.
+        
+        Args:
+            x: X values
+            y: Y values
+            max_points: Point budget (None = Config.PLOT_MAX_POINTS, 0 keeps every point)
+            **kwargs: Further trace properties
+            
+        Returns:
+            go.Scatter, or go.Scattergl above Config.PLOT_WEBGL_THRESHOLD points
+        """
+        x, y = downsample(x, y, Config.PLOT_MAX_POINTS if max_points is None else max_points)
+        trace = go.Scattergl if len(y) > Config.PLOT_WEBGL_THRESHOLD else go.Scatter
+        return trace(x=x, y=y, mode='lines', **kwargs)
+    
+    @staticmethod
+    def _markers(x, y, **kwargs):
+        """Create a marker trace (every point kept, WebGL above Config.PLOT_WEBGL_THRESHOLD points)."""
+        trace = go.Scattergl if len(y) > Config.PLOT_WEBGL_THRESHOLD else go.Scatter
+        return trace(x=x, y=y, mode='markers', **kwargs)
+    
+    @staticmethod
+    @profiled('visualization')
+    def plot_equity_curve(results: Dict, output_file: str = None, max_points: int = None) -> go.Figure:
         """
         Plot portfolio equity curve.
         
         Args:
             results: Backtest results dictionary
             output_file: Optional file path to save HTML
+            max_points: Point budget of the curve (None = Config.PLOT_MAX_POINTS)
             
         Returns:
             Plotly figure
@@ -28,10 +65,10 @@ class Visualizer:
         fig = go.Figure()
         
         # Portfolio value
-        fig.add_trace(go.Scatter(
-            x=equity_curve['date'],
-            y=equity_curve['value'],
-            mode='lines',
+        fig.add_trace(Visualizer._line(
+            equity_curve['date'],
+            equity_curve['value'],
+            max_points,
             name='Portfolio Value',
             line=dict(color='#00D9FF', width=2)
         ))
@@ -59,7 +96,9 @@ class Visualizer:
         return fig
     
     @staticmethod
-    def plot_trades(results: Dict, data: pd.DataFrame, output_file: str = None) -> go.Figure:
+    @profiled('visualization')
+    def plot_trades(results: Dict, data: pd.DataFrame, output_file: str = None,
+                    max_points: int = None) -> go.Figure:
         """
         Plot price chart with buy/sell signals.
         
@@ -67,6 +106,7 @@ class Visualizer:
             results: Backtest results dictionary
             data: Historical price data
             output_file: Optional file path to save HTML
+            max_points: Point budget of the price line (None = Config.PLOT_MAX_POINTS)
             
         Returns:
             Plotly figure
@@ -74,10 +114,10 @@ class Visualizer:
         fig = go.Figure()
         
         # Price line
-        fig.add_trace(go.Scatter(
-            x=data.index,
-            y=data['Close'],
-            mode='lines',
+        fig.add_trace(Visualizer._line(
+            data.index,
+            data['Close'],
+            max_points,
             name='Price',
             line=dict(color='lightblue', width=1)
         ))
@@ -88,10 +128,9 @@ class Visualizer:
             buy_dates = [t['date'] for t in buy_trades]
             buy_prices = [t['price'] for t in buy_trades]
             
-            fig.add_trace(go.Scatter(
-                x=buy_dates,
-                y=buy_prices,
-                mode='markers',
+            fig.add_trace(Visualizer._markers(
+                buy_dates,
+                buy_prices,
                 name='Buy',
                 marker=dict(color='green', size=10, symbol='triangle-up')
             ))
@@ -102,10 +141,9 @@ class Visualizer:
             sell_dates = [t['date'] for t in sell_trades]
             sell_prices = [t['price'] for t in sell_trades]
             
-            fig.add_trace(go.Scatter(
-                x=sell_dates,
-                y=sell_prices,
-                mode='markers',
+            fig.add_trace(Visualizer._markers(
+                sell_dates,
+                sell_prices,
                 name='Sell',
                 marker=dict(color='red', size=10, symbol='triangle-down')
             ))
@@ -125,13 +163,15 @@ class Visualizer:
         return fig
     
     @staticmethod
-    def plot_drawdown(results: Dict, output_file: str = None) -> go.Figure:
+    @profiled('visualization')
+    def plot_drawdown(results: Dict, output_file: str = None, max_points: int = None) -> go.Figure:
         """
         Plot drawdown chart.
         
         Args:
             results: Backtest results dictionary
             output_file: Optional file path to save HTML
+            max_points: Point budget of the drawdown line (None = Config.PLOT_MAX_POINTS)
             
         Returns:
             Plotly figure
@@ -145,10 +185,10 @@ class Visualizer:
         
         fig = go.Figure()
         
-        fig.add_trace(go.Scatter(
-            x=equity_curve['date'],
-            y=drawdown,
-            mode='lines',
+        fig.add_trace(Visualizer._line(
+            equity_curve['date'],
+            drawdown,
+            max_points,
             name='Drawdown',
             fill='tozeroy',
             line=dict(color='red', width=1)
@@ -169,7 +209,67 @@ class Visualizer:
         return fig
     
     @staticmethod
-    def create_dashboard(results: Dict, data: pd.DataFrame, output_file: str = "dashboard.html"):
+    @profiled('visualization')
+    def plot_rolling_metrics(results: Dict, windows: List[int] = ROLLING_WINDOWS,
+                             output_file: str = None, max_points: int = None) -> go.Figure:
+        """
+        Plot rolling Sharpe, Sortino, volatility and drawdown.
+        
+        Args:
+            results: Backtest results dictionary
+            windows: Window lengths in bars (one line per window)
+            output_file: Optional file path to save HTML
+            max_points: Point budget of each line (None = Config.PLOT_MAX_POINTS)
+            
+        Returns:
+            Plotly figure
+        """
+        rolling = PerformanceTracker.rolling_metrics(results['equity_curve'], windows)
+        panels = [
+            ('sharpe_ratio', "Rolling Sharpe Ratio"),
+            ('sortino_ratio', "Rolling Sortino Ratio"),
+            ('volatility', "Rolling Volatility (%)"),
+            ('drawdown', "Drawdown from Rolling Peak (%)")
+        ]
+        
+        fig = make_subplots(
+            rows=len(panels), cols=1,
+            subplot_titles=[title for _, title in panels],
+            shared_xaxes=True,
+            vertical_spacing=0.06
+        )
+        
+        for row, (metric, _) in enumerate(panels, start=1):
+            for window in rolling[metric].columns:
+                fig.add_trace(
+                    Visualizer._line(
+                        rolling.index,
+                        rolling[(metric, window)],
+                        max_points,
+                        name=f"{window} bars",
+                        legendgroup=str(window),
+                        showlegend=row == 1,
+                        line=dict(width=1)
+                    ),
+                    row=row, col=1
+                )
+                
+        fig.update_layout(
+            title=f"Rolling Metrics - {results['strategy']}",
+            template="plotly_dark",
+            hovermode='x unified',
+            height=900
+        )
+        
+        if output_file:
+            fig.write_html(output_file)
+        
+        return fig
+    
+    @staticmethod
+    @profiled('visualization')
+    def create_dashboard(results: Dict, data: pd.DataFrame, output_file: str = "dashboard.html",
+                         rolling_windows: List[int] = ROLLING_WINDOWS, max_points: int = None):
         """
         Create comprehensive dashboard with all visualizations.
         
@@ -177,27 +277,35 @@ class Visualizer:
             results: Backtest results dictionary
             data: Historical price data
             output_file: File path to save HTML dashboard
+            rolling_windows: Window lengths of the rolling Sharpe panel
+                             (empty to leave the panel out)
+            max_points: Point budget of each line (None = Config.PLOT_MAX_POINTS)
         """
+        rolling_windows = list(rolling_windows or [])
+        titles = [
+            f"Portfolio Performance - {results['strategy']}",
+            f"Trading Signals - {results['symbol']}",
+            "Drawdown"
+        ]
+        if rolling_windows:
+            titles.append("Rolling Sharpe Ratio")
+            
         # Create subplots
         fig = make_subplots(
-            rows=3, cols=1,
-            subplot_titles=(
-                f"Portfolio Performance - {results['strategy']}",
-                f"Trading Signals - {results['symbol']}",
-                "Drawdown"
-            ),
-            vertical_spacing=0.1,
-            row_heights=[0.4, 0.4, 0.2]
+            rows=len(titles), cols=1,
+            subplot_titles=titles,
+            vertical_spacing=0.08 if rolling_windows else 0.1,
+            row_heights=[0.35, 0.35, 0.15, 0.15] if rolling_windows else [0.4, 0.4, 0.2]
         )
         
         equity_curve = results['equity_curve']
         
         # Equity curve
         fig.add_trace(
-            go.Scatter(
-                x=equity_curve['date'],
-                y=equity_curve['value'],
-                mode='lines',
+            Visualizer._line(
+                equity_curve['date'],
+                equity_curve['value'],
+                max_points,
                 name='Portfolio Value',
                 line=dict(color='#00D9FF', width=2)
             ),
@@ -206,10 +314,10 @@ class Visualizer:
         
         # Price with signals
         fig.add_trace(
-            go.Scatter(
-                x=data.index,
-                y=data['Close'],
-                mode='lines',
+            Visualizer._line(
+                data.index,
+                data['Close'],
+                max_points,
                 name='Price',
                 line=dict(color='lightblue', width=1)
             ),
@@ -220,10 +328,9 @@ class Visualizer:
         buy_trades = [t for t in results['trade_history'] if t['action'] == 'BUY']
         if buy_trades:
             fig.add_trace(
-                go.Scatter(
-                    x=[t['date'] for t in buy_trades],
-                    y=[t['price'] for t in buy_trades],
-                    mode='markers',
+                Visualizer._markers(
+                    [t['date'] for t in buy_trades],
+                    [t['price'] for t in buy_trades],
                     name='Buy',
                     marker=dict(color='green', size=10, symbol='triangle-up')
                 ),
@@ -234,10 +341,9 @@ class Visualizer:
         sell_trades = [t for t in results['trade_history'] if t['action'] == 'SELL']
         if sell_trades:
             fig.add_trace(
-                go.Scatter(
-                    x=[t['date'] for t in sell_trades],
-                    y=[t['price'] for t in sell_trades],
-                    mode='markers',
+                Visualizer._markers(
+                    [t['date'] for t in sell_trades],
+                    [t['price'] for t in sell_trades],
                     name='Sell',
                     marker=dict(color='red', size=10, symbol='triangle-down')
                 ),
@@ -250,10 +356,10 @@ class Visualizer:
         drawdown = (cumulative - running_max) / running_max * 100
         
         fig.add_trace(
-            go.Scatter(
-                x=equity_curve['date'],
-                y=drawdown,
-                mode='lines',
+            Visualizer._line(
+                equity_curve['date'],
+                drawdown,
+                max_points,
                 name='Drawdown',
                 fill='tozeroy',
                 line=dict(color='red', width=1)
@@ -261,15 +367,31 @@ class Visualizer:
             row=3, col=1
         )
         
+        # Rolling Sharpe ratio
+        if rolling_windows:
+            rolling = PerformanceTracker.rolling_metrics(equity_curve, rolling_windows)
+            for window in rolling['sharpe_ratio'].columns:
+                fig.add_trace(
+                    Visualizer._line(
+                        rolling.index,
+                        rolling[('sharpe_ratio', window)],
+                        max_points,
+                        name=f"Sharpe ({window} bars)",
+                        line=dict(width=1)
+                    ),
+                    row=4, col=1
+                )
+            fig.update_yaxes(title_text="Sharpe", row=4, col=1)
+            
         # Update layout
-        fig.update_xaxes(title_text="Date", row=3, col=1)
+        fig.update_xaxes(title_text="Date", row=len(titles), col=1)
         fig.update_yaxes(title_text="Value ($)", row=1, col=1)
         fig.update_yaxes(title_text="Price ($)", row=2, col=1)
         fig.update_yaxes(title_text="Drawdown (%)", row=3, col=1)
         
         fig.update_layout(
             template="plotly_dark",
-            height=1200,
+            height=1400 if rolling_windows else 1200,
             showlegend=True,
             hovermode='x unified'
         )
@@ -280,13 +402,16 @@ class Visualizer:
         return fig
     
     @staticmethod
-    def plot_strategy_comparison(results_list: List[Dict], output_file: str = None) -> go.Figure:
+    @profiled('visualization')
+    def plot_strategy_comparison(results_list: List[Dict], output_file: str = None,
+                                 max_points: int = None) -> go.Figure:
         """
         Compare multiple strategies on the same chart.
         
         Args:
             results_list: List of backtest result dictionaries
             output_file: Optional file path to save HTML
+            max_points: Point budget of each curve (None = Config.PLOT_MAX_POINTS)
             
         Returns:
             Plotly figure
@@ -300,10 +425,10 @@ class Visualizer:
             initial_value = equity_curve['value'].iloc[0]
             normalized_values = (equity_curve['value'] / initial_value - 1) * 100
             
-            fig.add_trace(go.Scatter(
-                x=equity_curve['date'],
-                y=normalized_values,
-                mode='lines',
+            fig.add_trace(Visualizer._line(
+                equity_curve['date'],
+                normalized_values,
+                max_points,
                 name=results['strategy'],
                 line=dict(width=2)
             ))
@@ -0,0 +1,262 @@
+"""
+Walk-forward optimization over rolling or anchored train/test folds.
+
+Each fold picks the best parameter set of a grid on its train window and
+trades it on the following test window; the test windows never overlap,
+so chaining their equity curves gives an out-of-sample track record.
+
+Folds run across a process pool attached to the same shared-memory price
+data as ParameterSweep. Signals are generated on each symbol's full
+history with causal indicators, so every fold starts with warmed-up
+indicators and the indicator cache serves the same series to every fold
+a worker runs.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from config import Config
+from data_fetcher import DataFetcher
+from data_sources import get_source
+from indicators import indicator_cache
+from performance_tracker import PerformanceTracker
+from profiling import profiler
+from shared_data import SharedPriceData, init_worker, merge_cache_stats, report_progress, set_worker_data, worker_data
+from sweep import STRATEGY_CLASSES, parameter_grid, grid_sma_windows, strategy_signals
+
+
+def walk_forward_folds(n_bars: int, train_bars: int, test_bars: int, anchored: bool = False) -> List[tuple]:
+    """
+    Split bars into consecutive train/test folds.
+    
+    Args:
+        n_bars: Number of bars available
+        train_bars: Bars in each train window (the first one when anchored)
+        test_bars: Bars in each test window
+        anchored: Grow every train window from the first bar instead of
+                  rolling a fixed-length window
+                  
+    Returns:
+        List of (train_start, test_start, test_end) bar positions; a fold
+        trains on [train_start, test_start) and tests on [test_start, test_end)
+    """
+    if train_bars < 2 or test_bars < 2:
+        raise ValueError("Train and test windows need at least 2 bars")
+        
+    folds = []
+    test_start = train_bars
+    while test_start + 2 <= n_bars:
+        test_end = min(test_start + test_bars, n_bars)
+        folds.append((0 if anchored else test_start - train_bars, test_start, test_end))
+        test_start = test_end
+    return folds
+
+
+def _backtest(strategy, symbol: str, data: pd.DataFrame, signals: np.ndarray,
+              initial_capital: float, config: Config) -> tuple:
+    """Backtest precomputed signals on a slice of data; returns (results, metrics)."""
+    backtester = Backtester(strategy, initial_capital, config, engine='vectorized', verbose=False)
+    results = backtester.run_data(symbol, data, signals)
+    metrics = PerformanceTracker.calculate_metrics(
+        results['equity_curve'], results['trade_history'], initial_capital, results['round_trips']
+    )
+    return results, metrics
+
+
+def _run_fold(strategy_name: str, combos: List[dict], symbol: str, fold: tuple, initial_capital: float,
+              config: Config, metric: str, sma_windows: tuple = None) -> tuple:
+    """
+    Optimize on one fold's train window and evaluate on its test window.
+    
+    Returns:
+        Tuple of (fold result, process id, indicator cache stats of the process)
+    """
+    data = worker_data[symbol]
+    train_start, test_start, test_end = fold
+    train = data.iloc[train_start:test_start]
+    
+    best = None
+    for params in combos:
+        strategy = STRATEGY_CLASSES[strategy_name](**params)
+        signals = np.asarray(strategy_signals(strategy, data, sma_windows))
+        _, metrics = _backtest(strategy, symbol, train, signals[train_start:test_start], initial_capital, config)
+        
+        # First best in grid order wins ties; NaN scores never win
+        score = metrics.get(metric, np.nan)
+        if best is None or score > best[0] or (np.isnan(best[0]) and not np.isnan(score)):
+            best = (score, params, strategy, signals)
+            
+    score, params, strategy, signals = best
+    results, metrics = _backtest(strategy, symbol, data.iloc[test_start:test_end],
+                                 signals[test_start:test_end], initial_capital, config)
+                                 
+    fold_result = {
+        'symbol': symbol,
+        'params': params,
+        'train_score': score,
+        'metrics': metrics,
+        'equity_curve': results['equity_curve'][['date', 'value']],
+        'round_trips': results['round_trips']
+    }
+    return fold_result, os.getpid(), indicator_cache.stats()
+
+
+class WalkForward:
+    """Runs walk-forward optimization of a strategy across a process pool."""
+    
+    def __init__(self, strategy_name: str, grid: Dict[str, list], train_bars: int = 252,
+                 test_bars: int = 63, anchored: bool = False, initial_capital: float = 100000,
+                 config: Config = None, jobs: int = None, source_name: str = None):
+        """
+        Initialize walk-forward optimization.
+        
+        Args:
+            strategy_name: Strategy key ('ma', 'rsi', 'momentum')
+            grid: Dictionary of parameter name -> list of values
+            train_bars: Bars in each train window (the first one when anchored)
+            test_bars: Bars in each test window
+            anchored: Grow train windows from the first bar instead of rolling
+            initial_capital: Starting capital
+            config: Configuration object
+            jobs: Number of worker processes (None = CPU count, 1 = in-process)
+            source_name: Data source name (defaults to Config.DATA_SOURCE)
+        """
+        if strategy_name not in STRATEGY_CLASSES:
+            raise ValueError(f"Unknown strategy: {strategy_name}")
+            
+        self.strategy_name = strategy_name
+        self.grid = grid
+        self.train_bars = train_bars
+        self.test_bars = test_bars
+        self.anchored = anchored
+        self.initial_capital = initial_capital
+        self.config = config or Config()
+        self.jobs = jobs
+        self.source_name = source_name or self.config.DATA_SOURCE
+        self.results = None
+        
+    def run(self, symbols: List[str], start_date: str, end_date: str,
+            metric: str = 'sharpe_ratio') -> Dict:
+        """
+        Run walk-forward optimization on every symbol.
+        
+        Args:
+            symbols: Stock symbols to test
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            metric: PerformanceTracker metric to optimize (higher is better)
+            
+        Returns:
+            Dictionary with 'folds' (one row per symbol and fold),
+            'equity_curves', 'round_trips' and 'metrics' (out-of-sample,
+            per symbol)
+        """
+        combos = parameter_grid(self.grid)
+        sma_windows = grid_sma_windows(self.strategy_name, combos)
+        
+        # Load once in the parent; workers attach to a shared copy
+        data_fetcher = DataFetcher(self.config.DATA_CACHE_DIR, source=get_source(self.source_name))
+        data = data_fetcher.get_multiple_symbols(symbols, start_date, end_date)
+        
+        tasks = [
+            (symbol, fold)
+            for symbol, frame in data.items()
+            for fold in walk_forward_folds(len(frame), self.train_bars, self.test_bars, self.anchored)
+        ]
+        if not tasks:
+            raise ValueError(f"Not enough data for a {self.train_bars}-bar train and {self.test_bars}-bar test window")
+            
+        mode = 'anchored' if self.anchored else 'rolling'
+        print(f"\nWalk-forward ({mode}): {len(tasks)} folds x {len(combos)} parameter sets...")
+        fold_results = [None] * len(tasks)
+        worker_stats = {}
+        started = time.perf_counter()
+        
+        with profiler.stage('execution'):
+            if self.jobs == 1:
+                set_worker_data(data)
+                baseline = indicator_cache.stats()
+                for i, (symbol, fold) in enumerate(tasks):
+                    fold_results[i], _, stats = _run_fold(
+                        self.strategy_name, combos, symbol, fold, self.initial_capital, self.config, metric,
+                        sma_windows
+                    )
+                    report_progress(i + 1, len(tasks), started)
+                worker_stats[os.getpid()] = {key: stats[key] - baseline[key] for key in ('hits', 'misses')}
+            else:
+                with SharedPriceData.publish(data) as shared, ProcessPoolExecutor(
+                    max_workers=self.jobs, initializer=init_worker, initargs=(shared.spec,)
+                ) as pool:
+                    futures = {
+                        pool.submit(
+                            _run_fold, self.strategy_name, combos, symbol, fold, self.initial_capital,
+                            self.config, metric, sma_windows
+                        ): i
+                        for i, (symbol, fold) in enumerate(tasks)
+                    }
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        fold_results[futures[future]], pid, worker_stats[pid] = future.result()
+                        report_progress(done, len(tasks), started)
+                    
+        stats = merge_cache_stats(worker_stats)
+        print(f"Indicator cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1f}% hit rate)")
+        
+        self.results = self._combine(data, tasks, fold_results, metric)
+        return self.results
+        
+    def _combine(self, data: Dict[str, pd.DataFrame], tasks: List[tuple], fold_results: List[dict],
+                 metric: str) -> Dict:
+        """Tabulate folds and stitch each symbol's test windows into one equity curve."""
+        rows = []
+        by_symbol = {}
+        
+        for (symbol, (train_start, test_start, test_end)), result in zip(tasks, fold_results):
+            dates = data[symbol].index
+            fold = len(by_symbol.setdefault(symbol, []))
+            by_symbol[symbol].append(result)
+            
+            metrics = result['metrics']
+            rows.append({
+                'symbol': symbol,
+                'fold': fold,
+                'train_start': dates[train_start],
+                'test_start': dates[test_start],
+                'test_end': dates[test_end - 1],
+                **result['params'],
+                f'train_{metric}': result['train_score'],
+                'total_return': metrics['total_return'],
+                'sharpe_ratio': metrics['sharpe_ratio'],
+                'max_drawdown': metrics['max_drawdown'],
+                'total_trades': metrics['total_trades'],
+                'win_rate': metrics['win_rate']
+            })
+            
+        equity_curves = {}
+        round_trips = {}
+        oos_metrics = {}
+        
+        for symbol, results in by_symbol.items():
+            # Every test window starts from initial capital; compound them
+            curves = []
+            capital = self.initial_capital
+            for fold, result in enumerate(results):
+                curve = result['equity_curve'].assign(fold=fold)
+                curve['value'] = curve['value'] * (capital / self.initial_capital)
+                capital = curve['value'].iloc[-1]
+                curves.append(curve)
+                
+            equity_curves[symbol] = pd.concat(curves, ignore_index=True)
+            round_trips[symbol] = pd.concat([pd.DataFrame(result['round_trips']) for result in results], ignore_index=True)
+            oos_metrics[symbol] = PerformanceTracker.calculate_metrics(
+                equity_curves[symbol], [], self.initial_capital, round_trips[symbol]
+            )
+            
+        return {
+            'folds': pd.DataFrame(rows),
+            'equity_curves': equity_curves,
+            'round_trips': round_trips,
+            'metrics': oos_metrics
+        }